@@ -1,4 +1,10 @@
-from algosdk import account, mnemonic
+from base64 import b64decode, b64encode
+
+from algosdk import account, constants, encoding, mnemonic
+from algosdk.future import transaction
+from nacl.signing import SigningKey
+
+from . import metrics
 
 
 class Account:
@@ -7,6 +13,8 @@ class Account:
     def __init__(self, privateKey: str) -> None:
         self.sk = privateKey
         self.addr = account.address_from_private_key(privateKey)
+        # decoding the key and deriving the address again costs more than the signature itself
+        self._signingKey = SigningKey(b64decode(privateKey)[:constants.key_len_bytes])
 
     def getAddress(self) -> str:
         return self.addr
@@ -17,6 +25,19 @@ class Account:
     def getMnemonic(self) -> str:
         return mnemonic.from_private_key(self.sk)
 
+    def signature(self, txn: transaction.Transaction) -> bytes:
+        """Raw ed25519 signature of the transaction, same as ``txn.raw_sign`` with this account's key"""
+        return self._signingKey.sign(constants.txid_prefix + b64decode(encoding.msgpack_encode(txn))).signature
+
+    def sign(self, txn: transaction.Transaction) -> transaction.SignedTransaction:
+        with metrics.phase("sign"):
+            return self.wrap(txn, self.signature(txn))
+
+    def wrap(self, txn: transaction.Transaction, signature: bytes) -> transaction.SignedTransaction:
+        """Build the signed transaction from a signature made with this account's key"""
+        authorizingAddress = None if txn.sender == self.addr else self.addr
+        return transaction.SignedTransaction(txn, b64encode(signature).decode(), authorizingAddress)
+
     @classmethod
     def FromMnemonic(cls, m: str) -> "Account":
         return cls(mnemonic.to_private_key(m))
@@ -0,0 +1,468 @@
+"""
+asyncio counterparts of the AlgoVerse client helpers.
+
+Submissions and confirmations are awaitables, so a single event loop can keep thousands of
+operations in flight: one task per client follows the rounds for every pending transaction
+instead of one blocked thread per transaction.
+"""
+import asyncio
+import copy
+import json
+import ssl
+import time
+import weakref
+from base64 import b64decode, b64encode
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib import parse
+
+from algosdk import constants, encoding, error
+from algosdk.future import transaction
+from algosdk.v2client.algod import api_version_path_prefix
+
+from . import metrics
+from .account import Account
+from .artifacts import ArtifactCache, buildProgram, getArtifactCache
+from .assets import President
+from .confirmation import ClientBound, PendingTxnResponse
+from .operations import BaseApp
+from .params import MAX_VALIDITY
+from .transport import LONG_POLL_PATH
+from .utils import TEAL_VERSION, compileContract, decodeState
+
+RETRYABLE_ERRORS = (ConnectionError, asyncio.IncompleteReadError)
+
+_Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+class AsyncAlgodClient:
+    """
+    algod client speaking HTTP/1.1 over asyncio streams with a pool of keep-alive connections.
+
+    Only the endpoints AlgoVerse uses are implemented, responses are the decoded JSON like
+    ``AlgodClient`` returns them.
+    """
+
+    def __init__(self, algod_token: str, algod_address: str, headers: Optional[Dict[str, str]] = None,
+                 maxConnections: int = 32, timeout: float = 10.0, longPollTimeout: float = 70.0,
+                 retries: int = 2) -> None:
+        self.algod_token = algod_token
+        self.algod_address = algod_address
+        self.headers = headers
+        url = parse.urlsplit(algod_address)
+        self._ssl = ssl.create_default_context() if url.scheme == "https" else None
+        self._host = url.hostname or "localhost"
+        self._port = url.port or (443 if url.scheme == "https" else 80)
+        self._basePath = url.path.rstrip("/")
+
+        self.timeout = timeout
+        self.longPollTimeout = longPollTimeout
+        self.retries = retries
+        self._maxConnections = maxConnections
+        self._idle: List[_Connection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+
+    async def algod_request(self, method: str, requrl: str, params: Optional[Dict[str, Any]] = None,
+                            data: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None) -> Any:
+        metrics.countAlgodCall()
+        header = {"User-Agent": "py-algorand-sdk", "Connection": "keep-alive"}
+        if self.headers:
+            header.update(self.headers)
+        if headers:
+            header.update(headers)
+        if requrl not in constants.no_auth:
+            header[constants.algod_auth_header] = self.algod_token
+
+        timeout = self.longPollTimeout if requrl.startswith(LONG_POLL_PATH) else self.timeout
+        if requrl not in constants.unversioned_paths:
+            requrl = api_version_path_prefix + requrl
+        if params:
+            requrl = requrl + "?" + parse.urlencode(params)
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._maxConnections)
+        async with self._slots:
+            status, body = await asyncio.wait_for(self._send(method, self._basePath + requrl, data, header),
+                                                  timeout)
+
+        if status >= 400:
+            message = body.decode("utf-8")
+            try:
+                message = json.loads(message)["message"]
+            except (ValueError, KeyError, TypeError):
+                pass
+            raise error.AlgodHTTPError(message, status)
+        try:
+            return json.loads(body)
+        except Exception as e:
+            raise error.AlgodResponseError("Failed to parse JSON response from algod") from e
+
+    async def _send(self, method: str, path: str, data: Optional[bytes], header: Dict[str, str]) -> Tuple[int, bytes]:
+        attempt = 0
+        while True:
+            reader, writer = self._idle.pop() if self._idle else await asyncio.open_connection(
+                self._host, self._port, ssl=self._ssl)
+            try:
+                status, body, keepAlive = await self._exchange(reader, writer, method, path, data, header)
+            except RETRYABLE_ERRORS:
+                writer.close()
+                # a submitted group may have reached algod, see PooledAlgodClient
+                if method != "GET" or attempt >= self.retries:
+                    raise
+                attempt += 1
+                continue
+            except BaseException:
+                writer.close()
+                raise
+
+            if keepAlive:
+                self._idle.append((reader, writer))
+            else:
+                writer.close()
+            return status, body
+
+    async def _exchange(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, method: str, path: str,
+                        data: Optional[bytes], header: Dict[str, str]) -> Tuple[int, bytes, bool]:
+        body = data or b""
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self._host}", f"Content-Length: {len(body)}"]
+        lines.extend(f"{key}: {value}" for key, value in header.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+        statusLine = await reader.readline()
+        if not statusLine:
+            raise ConnectionError("connection closed by algod")
+        version, status = statusLine.decode("latin-1").split(" ", 2)[:2]
+
+        responseHeaders: Dict[str, str] = dict()
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            responseHeaders[key.strip().lower()] = value.strip()
+
+        if responseHeaders.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            content = b"".join(chunks)
+        elif "content-length" in responseHeaders:
+            content = await reader.readexactly(int(responseHeaders["content-length"]))
+        else:
+            content = await reader.read()
+            return int(status), content, False
+
+        keepAlive = responseHeaders.get("connection", "").lower() != "close" and version != "HTTP/1.0"
+        return int(status), content, keepAlive
+
+    # endpoints
+
+    async def status(self) -> Dict[str, Any]:
+        return await self.algod_request("GET", "/status")
+
+    async def status_after_block(self, block_num: int) -> Dict[str, Any]:
+        return await self.algod_request("GET", f"/status/wait-for-block-after/{block_num}")
+
+    async def suggested_params(self) -> transaction.SuggestedParams:
+        res = await self.algod_request("GET", "/transactions/params")
+        return transaction.SuggestedParams(
+            res["fee"], res["last-round"], res["last-round"] + MAX_VALIDITY, res["genesis-hash"], res["genesis-id"],
+            False, res["consensus-version"], res["min-fee"],
+        )
+
+    async def send_transactions(self, signedTxns: List[transaction.SignedTransaction]) -> str:
+        raw = b"".join(b64decode(encoding.msgpack_encode(signedTxn)) for signedTxn in signedTxns)
+        response = await self.algod_request("POST", "/transactions", data=raw,
+                                            headers={"Content-Type": "application/x-binary"})
+        return response["txId"]
+
+    async def pending_transaction_info(self, txID: str) -> Dict[str, Any]:
+        return await self.algod_request("GET", f"/transactions/pending/{txID}", params={"format": "json"})
+
+    async def account_info(self, address: str) -> Dict[str, Any]:
+        return await self.algod_request("GET", f"/accounts/{address}")
+
+    async def application_info(self, app_id: int) -> Dict[str, Any]:
+        return await self.algod_request("GET", f"/applications/{app_id}")
+
+    async def application_box_by_name(self, app_id: int, name: bytes) -> Dict[str, Any]:
+        return await self.algod_request("GET", f"/applications/{app_id}/box",
+                                        params={"name": "b64:" + b64encode(name).decode()})
+
+    async def compile(self, source: str) -> Dict[str, Any]:
+        return await self.algod_request("POST", "/teal/compile", data=source.encode(),
+                                        headers={"Content-Type": "application/x-binary"})
+
+
+class AsyncConfirmationTracker(ClientBound):
+    """ConfirmationTracker for the event loop: one task waits for each block and checks every pending txid"""
+
+    def __init__(self, client: AsyncAlgodClient, concurrency: int = 16) -> None:
+        super().__init__(client)
+        self.concurrency = concurrency
+        self.lastRound = 0
+        self._pending: Dict[str, "asyncio.Future[PendingTxnResponse]"] = dict()
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    def watch(self, txID: str) -> "asyncio.Future[PendingTxnResponse]":
+        future = self._pending.get(txID)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[txID] = future
+        if self._task is None:
+            # the task keeps the client alive while there is something to follow
+            self._task = asyncio.get_running_loop().create_task(self._follow(self.client))
+        return future
+
+    async def wait(self, txID: str) -> PendingTxnResponse:
+        return await self.watch(txID)
+
+    async def waitAll(self, txIDs: List[str]) -> List[PendingTxnResponse]:
+        return list(await asyncio.gather(*(self.watch(txID) for txID in txIDs)))
+
+    def _resolve(self, txID: str, pending_txn: Union[Dict[str, Any], Exception]) -> bool:
+        future = self._pending[txID]
+        if future.done():
+            return True
+        if isinstance(pending_txn, Exception):
+            # e.g. a txid algod doesn't know, the other txids are unaffected
+            future.set_exception(pending_txn)
+            return True
+
+        if pending_txn.get("confirmed-round") and pending_txn.get("confirmed-round") > 0:
+            future.set_result(PendingTxnResponse(pending_txn))
+            return True
+
+        if pending_txn.get("pool-error"):
+            future.set_exception(Exception(f"Transaction {txID} was rejected: {pending_txn['pool-error']}"))
+            return True
+
+        lastValid = pending_txn.get("txn", {}).get("txn", {}).get("lv")
+        if lastValid is not None and lastValid < self.lastRound:
+            future.set_exception(Exception(f"Transaction {txID} expired after round {lastValid}"))
+            return True
+
+        return False
+
+    async def _follow(self, client: AsyncAlgodClient) -> None:
+        limit = asyncio.Semaphore(self.concurrency)
+
+        async def check(txID: str) -> bool:
+            async with limit:
+                try:
+                    pending_txn: Union[Dict[str, Any], Exception] = await self.client.pending_transaction_info(txID)
+                except Exception as e:
+                    pending_txn = e
+                return self._resolve(txID, pending_txn)
+
+        try:
+            self.lastRound = (await self.client.status()).get("last-round", 0)
+            while self._pending:
+                txIDs = list(self._pending.keys())
+                resolved = await asyncio.gather(*(check(txID) for txID in txIDs))
+                for txID, done in zip(txIDs, resolved):
+                    if done:
+                        del self._pending[txID]
+                if not self._pending:
+                    break
+
+                status = await self.client.status_after_block(self.lastRound)
+                self.lastRound = max(self.lastRound + 1, status.get("last-round", 0))
+        except Exception as e:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(e)
+            self._pending.clear()
+        finally:
+            self._task = None
+
+
+class AsyncSuggestedParamsProvider(ClientBound):
+    """SuggestedParamsProvider for the event loop, concurrent callers share a single fetch"""
+
+    def __init__(self, client: AsyncAlgodClient, ttl: float = 5.0) -> None:
+        super().__init__(client)
+        self.ttl = ttl
+        self._params: Optional[transaction.SuggestedParams] = None
+        self._fetchedAt = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _isStale(self) -> bool:
+        if self._params is None:
+            return True
+        if time.monotonic() - self._fetchedAt > self.ttl:
+            return True
+        return getAsyncConfirmationTracker(self.client).lastRound > self._params.first
+
+    async def get(self, validity: Optional[int] = None) -> transaction.SuggestedParams:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._isStale():
+                self._params = await self.client.suggested_params()
+                self._fetchedAt = time.monotonic()
+            params = copy.copy(self._params)
+
+        if validity is not None:
+            params.last = params.first + min(validity, MAX_VALIDITY)
+        return params
+
+
+_trackers: "weakref.WeakKeyDictionary[AsyncAlgodClient, AsyncConfirmationTracker]" = weakref.WeakKeyDictionary()
+_providers: "weakref.WeakKeyDictionary[AsyncAlgodClient, AsyncSuggestedParamsProvider]" = weakref.WeakKeyDictionary()
+
+
+def getAsyncConfirmationTracker(client: AsyncAlgodClient) -> AsyncConfirmationTracker:
+    tracker = _trackers.get(client)
+    if tracker is None:
+        tracker = AsyncConfirmationTracker(client)
+        _trackers[client] = tracker
+    return tracker
+
+
+async def getSuggestedParamsAsync(client: AsyncAlgodClient,
+                                  validity: Optional[int] = None) -> transaction.SuggestedParams:
+    provider = _providers.get(client)
+    if provider is None:
+        provider = AsyncSuggestedParamsProvider(client)
+        _providers[client] = provider
+    return await provider.get(validity)
+
+
+async def waitForTransactionAsync(client: AsyncAlgodClient, txID: str) -> PendingTxnResponse:
+    return await getAsyncConfirmationTracker(client).wait(txID)
+
+
+async def getAppGlobalStateAsync(client: AsyncAlgodClient, appID: int) -> Dict[bytes, Union[int, bytes]]:
+    appInfo = await client.application_info(appID)
+    return decodeState(appInfo["params"].get("global-state", []))
+
+
+async def getBalancesAsync(client: AsyncAlgodClient, account: str) -> Dict[int, int]:
+    accountInfo = await client.account_info(account)
+    balances = {0: accountInfo["amount"]}
+    for assetHolding in accountInfo.get("assets", []):
+        balances[assetHolding["asset-id"]] = assetHolding["amount"]
+    return balances
+
+
+async def compileCachedAsync(cache: ArtifactCache, client: AsyncAlgodClient, name: str, build,
+                             version: int = TEAL_VERSION) -> bytes:
+    """ArtifactCache.compile that assembles through the async client on a miss"""
+    network = (await getSuggestedParamsAsync(client)).gh
+    program = cache.load(name, network, version)
+    if program is not None:
+        return program
+
+    teal = compileContract(build(), version)
+    program = await client.compile(teal)
+    program = b64decode(program["result"])
+    cache.store(name, network, teal, program, version)
+    return program
+
+
+class AsyncBaseApp:
+    """
+    BaseApp for the event loop.
+
+    Transactions come from BaseApp's builders, so both classes send the same ones. With
+    ``wait=False`` methods return an asyncio future of the confirmation instead of awaiting it.
+    """
+
+    def __init__(self):
+        self.APPROVAL_PROGRAM = b""
+        self.CLEAR_STATE_PROGRAM = b""
+
+    async def get_contracts(self, client: AsyncAlgodClient) -> Tuple[bytes, bytes]:
+        if len(self.APPROVAL_PROGRAM) == 0:
+            cache = getArtifactCache()
+            self.APPROVAL_PROGRAM = await compileCachedAsync(cache, client, "approval",
+                                                             lambda: buildProgram("approval"))
+            self.CLEAR_STATE_PROGRAM = await compileCachedAsync(cache, client, "clear", lambda: buildProgram("clear"))
+        return self.APPROVAL_PROGRAM, self.CLEAR_STATE_PROGRAM
+
+    async def submit_group(self, client: AsyncAlgodClient, signedTxns: List[transaction.SignedTransaction]
+                           ) -> List["asyncio.Future[PendingTxnResponse]"]:
+        await client.send_transactions(signedTxns)
+        tracker = getAsyncConfirmationTracker(client)
+        return [tracker.watch(signedTxn.get_txid()) for signedTxn in signedTxns]
+
+    async def submit(self, client: AsyncAlgodClient,
+                     signedTxn: transaction.SignedTransaction) -> "asyncio.Future[PendingTxnResponse]":
+        return (await self.submit_group(client, [signedTxn]))[0]
+
+    async def _finish(self, future: "asyncio.Future[PendingTxnResponse]", wait: bool):
+        if not wait:
+            return future
+        return await future
+
+    async def create_app(self, client: AsyncAlgodClient, creator: Account, wait: bool = True):
+        approval, clear = await self.get_contracts(client)
+        txn = BaseApp._create_txn(await getSuggestedParamsAsync(client), creator, approval, clear)
+        future = await self.submit(client, creator.sign(txn))
+        if not wait:
+            return future
+
+        response = await future
+        assert response.applicationIndex is not None and response.applicationIndex > 0
+        return response.applicationIndex
+
+    async def close_app(self, client: AsyncAlgodClient, appID: int, sender: Account, wait: bool = True):
+        txn = BaseApp._delete_txn(await getSuggestedParamsAsync(client), sender, appID)
+        return await self._finish(await self.submit(client, sender.sign(txn)), wait)
+
+    async def fund_algo_to_app(self, client: AsyncAlgodClient, funder: Account, app_id: int, wait: bool = True,
+                               sets: int = 1):
+        txn = BaseApp._fund_txn(await getSuggestedParamsAsync(client), funder, app_id, sets)
+        return await self._finish(await self.submit(client, funder.sign(txn)), wait)
+
+    async def opt_in_to_asset(self, client: AsyncAlgodClient, asset_id: int, account: Account, wait: bool = True):
+        txn = BaseApp._opt_in_txn(await getSuggestedParamsAsync(client), account, asset_id)
+        return await self._finish(await self.submit(client, account.sign(txn)), wait)
+
+    async def setup_app(self, client: AsyncAlgodClient, sender: Account, app_id: int, asset: President,
+                        wait: bool = True):
+        asset_cnt = (await getAppGlobalStateAsync(client, app_id))[b"asset_cnt"]
+        txn = BaseApp._setup_txn(await getSuggestedParamsAsync(client), sender, app_id, asset_cnt, asset)
+        return await self._finish(await self.submit(client, sender.sign(txn)), wait)
+
+    async def send_asset(self, client: AsyncAlgodClient, sender: Account, app_id: int, base_asset_id: int,
+                         higher_asset_id: int, amount: int, wait: bool = True):
+        call_txn = BaseApp._replace_txn(await getSuggestedParamsAsync(client), sender, app_id, base_asset_id,
+                                        higher_asset_id, amount)
+
+        opted_in = higher_asset_id in await getBalancesAsync(client, sender.getAddress())
+        txns = BaseApp._opt_in_group(call_txn, await getSuggestedParamsAsync(client), sender, higher_asset_id, opted_in)
+        future = (await self.submit_group(client, [sender.sign(txn) for txn in txns]))[-1]
+        return await self._finish(future, wait)
+
+    async def upgrade_asset(self, client: AsyncAlgodClient, sender: Account, app_id: int, asset: President,
+                            source_tier: int, target_tier: int, wait: bool = True):
+        call_txn = BaseApp._upgrade_txn(await getSuggestedParamsAsync(client), sender, app_id, asset, source_tier,
+                                        target_tier)
+        target_asset_id = asset.tiers()[target_tier]
+        opted_in = target_asset_id in await getBalancesAsync(client, sender.getAddress())
+        txns = BaseApp._opt_in_group(call_txn, await getSuggestedParamsAsync(client), sender, target_asset_id, opted_in)
+        future = (await self.submit_group(client, [sender.sign(txn) for txn in txns]))[-1]
+        return await self._finish(future, wait)
+
+    async def destroy_asset(self, client: AsyncAlgodClient, sender: Account, asset_id: int, wait: bool = True):
+        txn = BaseApp._destroy_txn(await getSuggestedParamsAsync(client), sender, asset_id)
+        return await self._finish(await self.submit(client, sender.sign(txn)), wait)
+
+    async def get_global_state(self, client: AsyncAlgodClient, app_id: int) -> Dict[bytes, Union[int, bytes]]:
+        return await getAppGlobalStateAsync(client, app_id)
+
+    async def get_president(self, client: AsyncAlgodClient, app_id: int, index: int) -> President:
+        box = await client.application_box_by_name(app_id, index.to_bytes(8, "big"))
+        return President.fromBytes(b64decode(box["value"]))
@@ -0,0 +1,152 @@
+import argparse
+import hashlib
+import os
+import tempfile
+from importlib import metadata
+from typing import TYPE_CHECKING, Callable, Optional, Tuple
+
+from algosdk.v2client.algod import AlgodClient
+
+from .params import getSuggestedParams
+from .utils import TEAL_VERSION, compileContract, assembleProgram, getAlgodClient
+
+if TYPE_CHECKING:
+    from pyteal import Expr
+
+DEFAULT_ARTIFACT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "compiled")
+
+CONTRACT_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "contracts.py")
+
+PROGRAMS = ("approval", "clear")
+
+
+def _atomicWrite(path: str, data: bytes) -> None:
+    # write to a temporary file next to the target and rename it over, so concurrent
+    # readers only ever see complete files
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _readFile(path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+class ArtifactCache:
+    """
+    On-disk cache of assembled programs.
+
+    Bytecode is stored under the hash of the generated TEAL, its version and the genesis hash
+    of the network that assembled it. A second index, keyed by a fingerprint of contracts.py,
+    the installed PyTeal and the network, points at that hash so a warm lookup neither builds
+    the PyTeal AST nor compiles; it only needs the suggested params every write fetches anyway.
+
+    Keying by network keeps programs of a stand-in node, whose compile endpoint doesn't return
+    real bytecode, apart from those of a real algod.
+    """
+
+    def __init__(self, directory: str = DEFAULT_ARTIFACT_DIR) -> None:
+        self.directory = directory
+
+    @staticmethod
+    def tealKey(teal: str, network: str, version: int = TEAL_VERSION) -> str:
+        return hashlib.sha256(f"{network}\n{version}\n{teal}".encode()).hexdigest()
+
+    @staticmethod
+    def sourceKey(name: str, network: str, version: int = TEAL_VERSION) -> str:
+        digest = hashlib.sha256()
+        with open(CONTRACT_SOURCE, "rb") as f:
+            digest.update(f.read())
+        try:
+            digest.update(metadata.version("pyteal").encode())
+        except metadata.PackageNotFoundError:
+            pass
+        digest.update(f"\n{name}\n{version}\n{network}".encode())
+        return digest.hexdigest()
+
+    def _programPath(self, tealKey: str) -> str:
+        return os.path.join(self.directory, "programs", tealKey + ".bin")
+
+    def _indexPath(self, sourceKey: str) -> str:
+        return os.path.join(self.directory, "index", sourceKey)
+
+    def load(self, name: str, network: str, version: int = TEAL_VERSION) -> Optional[bytes]:
+        """
+        :param network: genesis hash of the network the program is for
+        """
+        tealKey = _readFile(self._indexPath(self.sourceKey(name, network, version)))
+        if tealKey is None:
+            return None
+        return _readFile(self._programPath(tealKey.decode()))
+
+    def store(self, name: str, network: str, teal: str, program: bytes, version: int = TEAL_VERSION) -> None:
+        tealKey = self.tealKey(teal, network, version)
+        try:
+            _atomicWrite(self._programPath(tealKey), program)
+            _atomicWrite(self._indexPath(self.sourceKey(name, network, version)), tealKey.encode())
+        except OSError:
+            # a read-only install still works, it just compiles on every cold start
+            pass
+
+    def compile(self, client: AlgodClient, name: str, build: Callable[[], "Expr"],
+                version: int = TEAL_VERSION) -> bytes:
+        network = getSuggestedParams(client).gh
+        program = self.load(name, network, version)
+        if program is not None:
+            return program
+
+        teal = compileContract(build(), version)
+        program = _readFile(self._programPath(self.tealKey(teal, network, version)))
+        if program is None:
+            program = assembleProgram(client, teal)
+        self.store(name, network, teal, program, version)
+        return program
+
+
+def getArtifactCache() -> ArtifactCache:
+    return ArtifactCache(os.environ.get("ALGOVERSE_ARTIFACT_DIR", DEFAULT_ARTIFACT_DIR))
+
+
+def buildProgram(name: str) -> "Expr":
+    """PyTeal AST of the approval or clear program, importing contracts.py and PyTeal on first use"""
+    from .contracts import AlgoVerse
+
+    app = AlgoVerse()
+    return app.approval_program() if name == "approval" else app.clear_program()
+
+
+def loadPrograms(client: AlgodClient, cache: Optional[ArtifactCache] = None) -> Tuple[bytes, bytes]:
+    """
+    Approval and clear programs, from the artifact cache when it has them for the current
+    contracts.py, otherwise rebuilt with PyTeal and assembled by algod
+    """
+    cache = cache if cache is not None else getArtifactCache()
+    approval, clear = (cache.compile(client, name, lambda name=name: buildProgram(name)) for name in PROGRAMS)
+    return approval, clear
+
+
+def prebuild(client: AlgodClient, cache: ArtifactCache) -> None:
+    loadPrograms(client, cache)
+
+
+if __name__ == "__main__":
+    import dotenv
+
+    parser = argparse.ArgumentParser(description="Prebuild the compiled AlgoVerse programs")
+    parser.add_argument("--dir", default=None, help="artifact directory, defaults to ALGOVERSE_ARTIFACT_DIR")
+    args = parser.parse_args()
+
+    dotenv.load_dotenv('.env')
+    prebuild(getAlgodClient(), ArtifactCache(args.dir) if args.dir else getArtifactCache())
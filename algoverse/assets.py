@@ -1,7 +1,123 @@
+from typing import Dict, List, Iterator, NamedTuple, Optional, Tuple
+
+TIERS = ("base", "silver", "gold", "diamond")
+
+# amount of the lower tier revoked per upgrade, by rarity (1: base -> silver, 2: silver -> gold,
+# 3: gold -> diamond), same rules as AlgoVerse.check_amount_by_rarity
+REQUIRED_AMOUNTS = (0, 2, 3, 2)
+
+RECORD_SIZE = 8 * len(TIERS)
+
+
+def upgradeAmount(sourceTier: int, targetTier: int) -> int:
+    """Amount of the source tier revoked by an upgrade straight to the target tier, as AlgoVerse.on_upgrade"""
+    if not 0 <= sourceTier < targetTier < len(TIERS):
+        raise ValueError(f"cannot upgrade from tier {sourceTier} to tier {targetTier}")
+    amount = 1
+    for tier in range(sourceTier + 1, targetTier + 1):
+        amount *= REQUIRED_AMOUNTS[tier]
+    return amount
+
+
 class President:
+    __slots__ = ("base", "silver", "gold", "diamond", "amount")
+
     def __init__(self, base: int = 0, silver: int = 0, gold: int = 0, diamond: int = 0, amount: int = 0):
         self.base = base
         self.silver = silver
         self.gold = gold
         self.diamond = diamond
         self.amount = amount
+
+    def tiers(self) -> Tuple[int, int, int, int]:
+        return self.base, self.silver, self.gold, self.diamond
+
+    def toBytes(self) -> bytes:
+        """Pack the asset ids the way on_setup stores them on chain"""
+        return b"".join(asset_id.to_bytes(8, "big") for asset_id in self.tiers())
+
+    @classmethod
+    def fromBytes(cls, record: bytes, amount: int = 0) -> "President":
+        if len(record) != RECORD_SIZE:
+            raise ValueError(f"a President record is {RECORD_SIZE} bytes, got {len(record)}")
+        return cls(*(int.from_bytes(record[i:i + 8], "big") for i in range(0, RECORD_SIZE, 8)), amount=amount)
+
+
+class Upgrade(NamedTuple):
+    index: int
+    tier: int
+    nextAsset: Optional[int]
+    requiredAmount: Optional[int]
+
+
+class PresidentRegistry:
+    """
+    President sets in registration order with a reverse index from asset id to set and tier.
+
+    The index stores ``set index * 4 + tier`` as a single int per asset, so lookups are one
+    dict access and the registry stays small for thousands of sets.
+    """
+
+    def __init__(self, presidents: Optional[List[President]] = None) -> None:
+        self.sets: List[President] = []
+        self._index: Dict[int, int] = dict()
+        for president in presidents or []:
+            self.add(president)
+
+    def _indexSet(self, index: int, president: President) -> None:
+        for tier, asset_id in enumerate(president.tiers()):
+            if asset_id != 0:
+                self._index[asset_id] = index * len(TIERS) + tier
+
+    def add(self, president: President) -> int:
+        index = len(self.sets)
+        self.sets.append(president)
+        self._indexSet(index, president)
+        return index
+
+    def set(self, index: int, president: President) -> None:
+        """Store a set under a known on-chain index, growing the registry with empty sets if needed"""
+        while len(self.sets) <= index:
+            self.sets.append(President())
+        for asset_id in self.sets[index].tiers():
+            self._index.pop(asset_id, None)
+        self.sets[index] = president
+        self._indexSet(index, president)
+
+    def __len__(self) -> int:
+        return len(self.sets)
+
+    def __getitem__(self, index: int) -> President:
+        return self.sets[index]
+
+    def __iter__(self) -> Iterator[President]:
+        return iter(self.sets)
+
+    def __contains__(self, asset_id: int) -> bool:
+        return asset_id in self._index
+
+    def lookup(self, asset_id: int) -> Optional[Upgrade]:
+        """
+        :return: set index, tier, the asset of the next tier and the amount of asset_id it costs,
+            the last two are None for a diamond
+        """
+        position = self._index.get(asset_id)
+        if position is None:
+            return None
+        index, tier = divmod(position, len(TIERS))
+        if tier == len(TIERS) - 1:
+            return Upgrade(index, tier, None, None)
+        return Upgrade(index, tier, self.sets[index].tiers()[tier + 1], REQUIRED_AMOUNTS[tier + 1])
+
+    def isUpgrade(self, asset_id: int, higher_asset_id: int, amount: int) -> bool:
+        upgrade = self.lookup(asset_id)
+        return upgrade is not None and upgrade.nextAsset == higher_asset_id and upgrade.requiredAmount == amount
+
+    def toBytes(self) -> bytes:
+        return b"".join(president.toBytes() for president in self.sets)
+
+    @classmethod
+    def fromBytes(cls, records: bytes) -> "PresidentRegistry":
+        if len(records) % RECORD_SIZE != 0:
+            raise ValueError(f"records must be a multiple of {RECORD_SIZE} bytes")
+        return cls([President.fromBytes(records[i:i + RECORD_SIZE]) for i in range(0, len(records), RECORD_SIZE)])
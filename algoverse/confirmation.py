@@ -0,0 +1,157 @@
+import threading
+import weakref
+from base64 import b64decode
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Union
+
+from algosdk.v2client.algod import AlgodClient
+
+
+class PendingTxnResponse:
+    def __init__(self, response: Dict[str, Any]) -> None:
+        self.poolError: str = response["pool-error"]
+        self.txn: Dict[str, Any] = response["txn"]
+
+        self.applicationIndex: Optional[int] = response.get("application-index")
+        self.assetIndex: Optional[int] = response.get("asset-index")
+        self.closeRewards: Optional[int] = response.get("close-rewards")
+        self.closingAmount: Optional[int] = response.get("closing-amount")
+        self.confirmedRound: Optional[int] = response.get("confirmed-round")
+        self.globalStateDelta: Optional[Any] = response.get("global-state-delta")
+        self.localStateDelta: Optional[Any] = response.get("local-state-delta")
+        self.receiverRewards: Optional[int] = response.get("receiver-rewards")
+        self.senderRewards: Optional[int] = response.get("sender-rewards")
+
+        self.innerTxns: List[Any] = response.get("inner-txns", [])
+        self.logs: List[bytes] = [b64decode(l) for l in response.get("logs", [])]
+
+
+class ClientBound:
+    """
+    Base of the objects cached per client in a WeakKeyDictionary. They only hold a weak
+    reference to their client, a strong one would keep the cache key alive forever.
+    """
+
+    def __init__(self, client: Any) -> None:
+        self._client = weakref.ref(client)
+
+    @property
+    def client(self) -> Any:
+        client = self._client()
+        if client is None:
+            raise Exception("The client has been garbage collected")
+        return client
+
+
+class ConfirmationTracker(ClientBound):
+    """
+    Follows rounds on behalf of every caller waiting for a transaction.
+
+    A single background thread waits for each new block once and then checks all
+    outstanding txids, up to ``concurrency`` at a time, so callers only hold a future instead
+    of polling algod themselves. A failed lookup only fails the future of its txid, a failure
+    to follow the rounds fails them all.
+    """
+
+    def __init__(self, client: AlgodClient, concurrency: int = 16) -> None:
+        super().__init__(client)
+        self.concurrency = concurrency
+        self.lastRound = 0
+        self._pending: Dict[str, Future] = dict()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, txID: str) -> "Future[PendingTxnResponse]":
+        with self._lock:
+            future = self._pending.get(txID)
+            if future is None:
+                future = Future()
+                self._pending[txID] = future
+            if self._thread is None:
+                # the thread keeps the client alive while there is something to follow
+                self._thread = threading.Thread(target=self._follow, args=(self.client,),
+                                                name="algoverse-confirmations", daemon=True)
+                self._thread.start()
+            return future
+
+    def wait(self, txID: str, timeout: Optional[float] = None) -> PendingTxnResponse:
+        return self.watch(txID).result(timeout)
+
+    def waitAll(self, txIDs: List[str], timeout: Optional[float] = None) -> List[PendingTxnResponse]:
+        futures = [self.watch(txID) for txID in txIDs]
+        return [future.result(timeout) for future in futures]
+
+    def _lookup(self, txID: str) -> Union[Dict[str, Any], Exception]:
+        try:
+            return self.client.pending_transaction_info(txID)
+        except Exception as e:
+            return e
+
+    def _resolve(self, txID: str, pending_txn: Union[Dict[str, Any], Exception]) -> bool:
+        future = self._pending[txID]
+        if isinstance(pending_txn, Exception):
+            # e.g. a txid algod doesn't know
+            future.set_exception(pending_txn)
+            return True
+
+        if pending_txn.get("confirmed-round") and pending_txn.get("confirmed-round") > 0:
+            future.set_result(PendingTxnResponse(pending_txn))
+            return True
+
+        if pending_txn.get("pool-error"):
+            future.set_exception(Exception(f"Transaction {txID} was rejected: {pending_txn['pool-error']}"))
+            return True
+
+        lastValid = pending_txn.get("txn", {}).get("txn", {}).get("lv")
+        if lastValid is not None and lastValid < self.lastRound:
+            future.set_exception(Exception(f"Transaction {txID} expired after round {lastValid}"))
+            return True
+
+        return False
+
+    def _follow(self, client: AlgodClient) -> None:
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="algoverse-lookups") as executor:
+            self._followRounds(executor)
+
+    def _followRounds(self, executor: ThreadPoolExecutor) -> None:
+        try:
+            self.lastRound = self.client.status().get("last-round")
+            while True:
+                with self._lock:
+                    txIDs = list(self._pending.keys())
+                    if len(txIDs) == 0:
+                        self._thread = None
+                        return
+
+                lookups = executor.map(self._lookup, txIDs) if len(txIDs) > 1 else [self._lookup(txIDs[0])]
+                resolved = [txID for txID, pending_txn in zip(txIDs, lookups) if self._resolve(txID, pending_txn)]
+
+                with self._lock:
+                    for txID in resolved:
+                        del self._pending[txID]
+                    if len(self._pending) == 0:
+                        self._thread = None
+                        return
+
+                status = self.client.status_after_block(self.lastRound)
+                self.lastRound = max(self.lastRound + 1, status.get("last-round", 0))
+        except Exception as e:
+            with self._lock:
+                for future in self._pending.values():
+                    if not future.done():
+                        future.set_exception(e)
+                self._pending.clear()
+                self._thread = None
+
+
+_trackers: "weakref.WeakKeyDictionary[AlgodClient, ConfirmationTracker]" = weakref.WeakKeyDictionary()
+_trackersLock = threading.Lock()
+
+
+def getConfirmationTracker(client: AlgodClient) -> ConfirmationTracker:
+    with _trackersLock:
+        tracker = _trackers.get(client)
+        if tracker is None:
+            tracker = ConfirmationTracker(client)
+            _trackers[client] = tracker
+        return tracker
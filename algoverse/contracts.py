@@ -4,6 +4,9 @@ from pyteal import *
 class AlgoVerse:
     class Variables:
         asset_cnt_key = Bytes("asset_cnt")
+        asset_key_prefix = Bytes("a")
+        # base assets worth one asset of each tier packed as 8 byte integers: 1, 2, 2 * 3, 2 * 3 * 2
+        tier_units = Bytes("base16", "0x" + "".join(units.to_bytes(8, "big").hex() for units in (1, 2, 6, 12)))
 
     @staticmethod
     @Subroutine(TealType.none)
@@ -21,39 +24,27 @@ class AlgoVerse:
             Return()
         )
 
+    @staticmethod
+    def asset_key(asset_id: Expr) -> Expr:
+        return Concat(AlgoVerse.Variables.asset_key_prefix, Itob(asset_id))
+
     @staticmethod
     @Subroutine(TealType.uint64)
     def check_if_asset_and_higher_exist(asset_id: Expr, higher_asset_id: Expr) -> Expr:
         """
+        Reads the box written by on_setup for asset_id, so the cost does not depend on asset_cnt
         :param asset_id: int
         :param higher_asset_id: int
-        :return: Int(0) / Int(1)
+        :return: rarity of the upgrade (1: base -> silver, 2: silver -> gold, 3: gold -> diamond) / Int(0)
         """
-        asset_cnt = Btoi(App.globalGet(AlgoVerse.Variables.asset_cnt_key))
-        i = ScratchVar(TealType.uint64)
+        entry = App.box_get(AlgoVerse.asset_key(asset_id))
+        rarity = ScratchVar(TealType.uint64)
         return Seq(
-            # App.globalPut(key, App.globalGet(key) - Int(1)),
-            For(i.store(Int(0)), i.load() < asset_cnt, i.store(i.load() + Int(1))).Do(Seq(
-                If(Or(
-                    And(
-                        BytesEq(Substring(App.globalGet(Itob(i.load())), Int(0), Int(8)), Itob(asset_id)) == Int(1),
-                        BytesEq(Substring(App.globalGet(Itob(i.load())), Int(8), Int(16)),
-                                Itob(higher_asset_id)) == Int(1)
-                    ),
-                    And(
-                        BytesEq(Substring(App.globalGet(Itob(i.load())), Int(8), Int(16)), Itob(asset_id)) == Int(1),
-                        BytesEq(Substring(App.globalGet(Itob(i.load())), Int(16), Int(24)),
-                                Itob(higher_asset_id)) == Int(1)
-                    ),
-                    And(
-                        BytesEq(Substring(App.globalGet(Itob(i.load())), Int(16), Int(24)), Itob(asset_id)) == Int(1),
-                        BytesEq(Substring(App.globalGet(Itob(i.load())), Int(24), Int(32)),
-                                Itob(higher_asset_id)) == Int(1)
-                    )
-                )).Then(
-                    Return(Int(1))
-                )
-            )),
+            entry,
+            If(Not(entry.hasValue())).Then(Return(Int(0))),
+            # the entry is the packed set record followed by the tier of asset_id
+            rarity.store(ExtractUint64(entry.value(), Int(32)) + Int(1)),
+            If(ExtractUint64(entry.value(), rarity.load() * Int(8)) == higher_asset_id).Then(Return(rarity.load())),
             Return(Int(0))
         )
 
@@ -80,11 +71,23 @@ class AlgoVerse:
 
     def on_setup(self):
         i = ScratchVar(TealType.uint64)
+        index = ScratchVar(TealType.bytes)
+        record = ScratchVar(TealType.bytes)
         return Seq(
-            App.globalPut(App.globalGet(self.Variables.asset_cnt_key),
-                          Concat(Itob(Txn.assets[0]), Itob(Txn.assets[1]), Itob(Txn.assets[2]), Itob(Txn.assets[3]))),
+            Assert(Txn.sender() == Global.creator_address()),
+            index.store(Itob(App.globalGet(self.Variables.asset_cnt_key))),
+            record.store(Concat(Itob(Txn.assets[0]), Itob(Txn.assets[1]), Itob(Txn.assets[2]), Itob(Txn.assets[3]))),
+            # box_create fails for a box that exists, so a registered asset is never moved to another set
+            Assert(App.box_create(index.load(), Int(32))),
+            App.box_replace(index.load(), Int(0), record.load()),
             self.increase(self.Variables.asset_cnt_key),
 
+            # map every upgradable asset to its set and tier so replace can find it directly
+            For(i.store(Int(0)), i.load() < Int(3), i.store(i.load() + Int(1))).Do(Seq(
+                Assert(App.box_create(self.asset_key(Txn.assets[i.load()]), Int(40))),
+                App.box_replace(self.asset_key(Txn.assets[i.load()]), Int(0), Concat(record.load(), Itob(i.load()))),
+            )),
+
             # opt into NFT asset -- because you can't opt in if you're already opted in, this is what
             # we'll use to make sure the contract has been set up
             For(i.store(Int(0)), i.load() < Txn.assets.length(), i.store(i.load() + Int(1))).Do(Seq(
@@ -94,6 +97,8 @@ class AlgoVerse:
                         TxnField.type_enum: TxnType.AssetTransfer,
                         TxnField.xfer_asset: Txn.assets[i.load()],
                         TxnField.asset_receiver: Global.current_application_address(),
+                        # paid by the outer transaction through fee pooling
+                        TxnField.fee: Int(0),
                     }
                 ),
                 InnerTxnBuilder.Submit(),
@@ -104,14 +109,15 @@ class AlgoVerse:
     def on_replace(self):
         asset = Txn.assets[0]
         higher_asset = Txn.assets[1]  # higher asset
-        r = Txn.application_args[1]  # given rarity
-        amount = Btoi(Txn.application_args[2])  # amount
+        amount = Btoi(Txn.application_args[1])  # amount
+        rarity = ScratchVar(TealType.uint64)
         return Seq(
+            rarity.store(AlgoVerse.check_if_asset_and_higher_exist(asset, higher_asset)),
+            Assert(rarity.load()),
+            Assert(AlgoVerse.check_amount_by_rarity(amount, rarity.load())),
 
-            Assert(AlgoVerse.check_amount_by_rarity(amount, Btoi(r))),
-            Assert(AlgoVerse.check_if_asset_and_higher_exist(asset, higher_asset)),
-
-            # revoke given amount of assets
+            # revoke and transfer go out as one inner group, their fees are pooled from the app call.
+            # the sender has to be opted into higher_asset already, BaseApp.send_asset groups the opt-in
             InnerTxnBuilder.Begin(),
             InnerTxnBuilder.SetFields(
                 {
@@ -120,40 +126,124 @@ class AlgoVerse:
                     TxnField.asset_receiver: Global.current_application_address(),
                     TxnField.asset_amount: amount,
                     TxnField.asset_sender: Txn.sender(),
+                    TxnField.fee: Int(0),
                 }
             ),
-            InnerTxnBuilder.Submit(),
-
-            # opt-in the higher asset
-            InnerTxnBuilder.Begin(),
+            InnerTxnBuilder.Next(),
             InnerTxnBuilder.SetFields(
                 {
                     TxnField.type_enum: TxnType.AssetTransfer,
                     TxnField.xfer_asset: higher_asset,
                     TxnField.asset_receiver: Txn.sender(),
+                    TxnField.asset_amount: Int(1),
+                    TxnField.fee: Int(0),
                 }
             ),
             InnerTxnBuilder.Submit(),
+            Approve()
+        )
 
-            # transfer the higher asset
+    def on_upgrade(self):
+        """
+        Upgrade over several tiers at once, the tier of the source asset comes from its box and the
+        revoked amount is the product of the required amounts of every tier in between
+        """
+        asset = Txn.assets[0]
+        target_asset = Txn.assets[1]
+        target_tier = Btoi(Txn.application_args[1])
+        entry = App.box_get(AlgoVerse.asset_key(asset))
+        source_tier = ScratchVar(TealType.uint64)
+        amount = ScratchVar(TealType.uint64)
+        return Seq(
+            entry,
+            Assert(entry.hasValue()),
+            source_tier.store(ExtractUint64(entry.value(), Int(32))),
+            Assert(target_tier > source_tier.load()),
+            Assert(target_tier <= Int(3)),
+            Assert(ExtractUint64(entry.value(), target_tier * Int(8)) == target_asset),
+            amount.store(
+                ExtractUint64(self.Variables.tier_units, target_tier * Int(8))
+                / ExtractUint64(self.Variables.tier_units, source_tier.load() * Int(8))
+            ),
+
+            # one clawback of the whole amount and one transfer, fees pooled from the app call
             InnerTxnBuilder.Begin(),
             InnerTxnBuilder.SetFields(
                 {
                     TxnField.type_enum: TxnType.AssetTransfer,
-                    TxnField.xfer_asset: higher_asset,
+                    TxnField.xfer_asset: asset,
+                    TxnField.asset_receiver: Global.current_application_address(),
+                    TxnField.asset_amount: amount.load(),
+                    TxnField.asset_sender: Txn.sender(),
+                    TxnField.fee: Int(0),
+                }
+            ),
+            InnerTxnBuilder.Next(),
+            InnerTxnBuilder.SetFields(
+                {
+                    TxnField.type_enum: TxnType.AssetTransfer,
+                    TxnField.xfer_asset: target_asset,
                     TxnField.asset_receiver: Txn.sender(),
                     TxnField.asset_amount: Int(1),
+                    TxnField.fee: Int(0),
                 }
             ),
             InnerTxnBuilder.Submit(),
             Approve()
         )
 
+    @staticmethod
+    @Subroutine(TealType.none)
+    def close_out_asset(asset_id: Expr) -> Expr:
+        """
+        Send the app's remaining units of asset_id to the sender and drop the opt-in
+        :param asset_id: int
+        """
+        return Seq(
+            InnerTxnBuilder.Begin(),
+            InnerTxnBuilder.SetFields(
+                {
+                    TxnField.type_enum: TxnType.AssetTransfer,
+                    TxnField.xfer_asset: asset_id,
+                    TxnField.asset_receiver: Txn.sender(),
+                    TxnField.asset_close_to: Txn.sender(),
+                    TxnField.fee: Int(0),
+                }
+            ),
+            InnerTxnBuilder.Submit(),
+            Return()
+        )
+
+    def on_retire(self):
+        """
+        Hand a registered set back to the creator: the app closes out its 4 holdings and deletes the
+        set's boxes, which frees their min balance for on_delete
+        """
+        index = Itob(Btoi(Txn.application_args[1]))
+        record = App.box_get(index)
+        i = ScratchVar(TealType.uint64)
+        return Seq(
+            Assert(Txn.sender() == Global.creator_address()),
+            record,
+            Assert(record.hasValue()),
+            For(i.store(Int(0)), i.load() < Int(4), i.store(i.load() + Int(1))).Do(Seq(
+                Assert(ExtractUint64(record.value(), i.load() * Int(8)) == Txn.assets[i.load()]),
+                self.close_out_asset(Txn.assets[i.load()]),
+            )),
+            For(i.store(Int(0)), i.load() < Int(3), i.store(i.load() + Int(1))).Do(
+                Pop(App.box_delete(self.asset_key(Txn.assets[i.load()])))
+            ),
+            Pop(App.box_delete(index)),
+            Approve(),
+        )
+
     def on_call(self):
         call_method = Txn.application_args[0]
         return Cond(
             [call_method == Bytes("setup"), self.on_setup()],
-            [call_method == Bytes("replace"), self.on_replace()]
+            [call_method == Bytes("replace"), self.on_replace()],
+            [call_method == Bytes("upgrade"), self.on_upgrade()],
+            [call_method == Bytes("retire"), self.on_retire()]
         )
 
     def on_opting_in(self):
@@ -162,7 +252,23 @@ class AlgoVerse:
         )
 
     def on_delete(self):
+        app_address = Global.current_application_address()
         return Seq(
+            Assert(Txn.sender() == Global.creator_address()),
+            # an account holding assets can't be closed, only once every set is retired (on_retire) is
+            # its min balance back to that of an empty account and the Algos go to the creator
+            If(And(Balance(app_address) > Int(0), MinBalance(app_address) == Global.min_balance())).Then(Seq(
+                InnerTxnBuilder.Begin(),
+                InnerTxnBuilder.SetFields(
+                    {
+                        TxnField.type_enum: TxnType.Payment,
+                        TxnField.receiver: Txn.sender(),
+                        TxnField.close_remainder_to: Txn.sender(),
+                        TxnField.fee: Int(0),
+                    }
+                ),
+                InnerTxnBuilder.Submit(),
+            )),
             Approve()
         )
 
@@ -196,9 +302,9 @@ class AlgoVerse:
 if __name__ == "__main__":
     contract = AlgoVerse()
     with open("algoverse_approval.teal", "w") as f:
-        compiled = compileTeal(contract.approval_program(), mode=Mode.Application, version=5)
+        compiled = compileTeal(contract.approval_program(), mode=Mode.Application, version=8)
         f.write(compiled)
 
     with open("algoverse_clear_state.teal", "w") as f:
-        compiled = compileTeal(contract.clear_program(), mode=Mode.Application, version=5)
+        compiled = compileTeal(contract.clear_program(), mode=Mode.Application, version=8)
         f.write(compiled)
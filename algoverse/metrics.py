@@ -0,0 +1,279 @@
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from algosdk.future import transaction
+
+from .confirmation import PendingTxnResponse
+
+# seconds, from a local node up to a congested network
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+OPERATION_SECONDS = "algoverse_operation_seconds"
+PHASE_SECONDS = "algoverse_phase_seconds"
+OPERATIONS = "algoverse_operations_total"
+ALGOD_CALLS = "algoverse_algod_calls_total"
+FEES = "algoverse_fees_microalgos_total"
+INNER_TXNS = "algoverse_inner_txns_total"
+ROUNDS_WAITED = "algoverse_rounds_waited_total"
+
+Labels = Dict[str, str]
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class MetricsHook:
+    """Receives the measurements, subclass it to forward them to a metrics system"""
+
+    def observe(self, name: str, value: float, labels: Labels) -> None:
+        pass
+
+    def increment(self, name: str, value: float, labels: Labels) -> None:
+        pass
+
+
+class _Histogram:
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+
+class Metrics(MetricsHook):
+    """
+    Keeps histograms and counters in memory and renders them in the Prometheus text format.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], _Histogram] = dict()
+        self.counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = dict()
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, labels: Labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = _Histogram(self.buckets)
+                self.histograms[key] = histogram
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram.counts[i] += 1
+            histogram.sum += value
+            histogram.count += 1
+
+    def increment(self, name: str, value: float, labels: Labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def exportPrometheus(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            typed = set()
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                for bound, count in zip(self.buckets, histogram.counts):
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', repr(float(bound))),))} {count}")
+                lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                lines.append(f"{name}_sum{_labels(labels)} {histogram.sum!r}")
+                lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+            for (name, labels), value in sorted(self.counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+_hook: Optional[MetricsHook] = None
+_current: "contextvars.ContextVar[Optional[_Operation]]" = contextvars.ContextVar("algoverse_operation", default=None)
+_inPhase: "contextvars.ContextVar[bool]" = contextvars.ContextVar("algoverse_phase", default=False)
+_disabled = nullcontext()
+
+
+def enableMetrics(hook: Optional[MetricsHook] = None) -> MetricsHook:
+    """Start measuring, by default into a new in-memory Metrics"""
+    global _hook
+    _hook = hook if hook is not None else Metrics()
+    return _hook
+
+
+def disableMetrics() -> None:
+    global _hook
+    _hook = None
+
+
+def getMetricsHook() -> Optional[MetricsHook]:
+    return _hook
+
+
+class _Operation:
+    def __init__(self, hook: MetricsHook, name: str) -> None:
+        self.hook = hook
+        self.name = name
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = dict()
+        self.fees = 0
+        self.submitRound = 0
+        self.submitted: Optional[float] = None
+        self.futures: List["Future[PendingTxnResponse]"] = []
+        self._lock = threading.Lock()
+
+    def finish(self, error: Optional[BaseException]) -> None:
+        finished = time.perf_counter()
+        labels = {"operation": self.name}
+        if self.submitted is not None:
+            self.phases["confirm"] = finished - self.submitted
+
+        innerTxns = 0
+        confirmedRound = 0
+        for future in self.futures:
+            if future.done() and future.exception() is None:
+                response = future.result()
+                innerTxns += len(response.innerTxns)
+                confirmedRound = max(confirmedRound, response.confirmedRound or 0)
+
+        hook = self.hook
+        hook.observe(OPERATION_SECONDS, finished - self.started, labels)
+        for phase, seconds in self.phases.items():
+            hook.observe(PHASE_SECONDS, seconds, {"operation": self.name, "phase": phase})
+        hook.increment(OPERATIONS, 1, {"operation": self.name, "status": "error" if error else "ok"})
+        if error is None:
+            hook.increment(FEES, self.fees, labels)
+            hook.increment(INNER_TXNS, innerTxns, labels)
+            if self.submitRound and confirmedRound:
+                hook.increment(ROUNDS_WAITED, confirmedRound - self.submitRound, labels)
+
+
+class _Phase:
+    def __init__(self, operation: _Operation, name: str) -> None:
+        self.operation = operation
+        self.name = name
+        self.started = 0.0
+        self.token: Optional[contextvars.Token] = None
+
+    def __enter__(self) -> "_Phase":
+        self.token = _inPhase.set(True)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        operation = self.operation
+        _inPhase.reset(self.token)
+        with operation._lock:
+            operation.phases[self.name] = operation.phases.get(self.name, 0.0) + time.perf_counter() - self.started
+
+
+def phase(name: str):
+    """Time a phase (params, sign, submit) of the operation running in this context"""
+    if _hook is None:
+        return _disabled
+    operation = _current.get()
+    if operation is None or _inPhase.get():
+        # a sign inside a batch sign is already part of the outer phase
+        return _disabled
+    return _Phase(operation, name)
+
+
+def countAlgodCall() -> None:
+    hook = _hook
+    if hook is None:
+        return
+    operation = _current.get()
+    hook.increment(ALGOD_CALLS, 1, {"operation": operation.name if operation is not None else ""})
+
+
+def recordSubmitted(signedTxns: Sequence[transaction.SignedTransaction],
+                    futures: Sequence["Future[PendingTxnResponse]"], lastRound: int) -> None:
+    """Account the fees of sent transactions and keep their futures for the confirm phase"""
+    if _hook is None:
+        return
+    operation = _current.get()
+    if operation is None:
+        return
+    with operation._lock:
+        operation.fees += sum(signedTxn.transaction.fee for signedTxn in signedTxns)
+        operation.futures.extend(futures)
+        if operation.submitted is None:
+            operation.submitted = time.perf_counter()
+            operation.submitRound = lastRound
+
+
+def bind(fn: F) -> F:
+    """Run fn in the operation of the calling context, for work handed to other threads"""
+    operation = _current.get()
+    if _hook is None or operation is None:
+        return fn
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        token = _current.set(operation)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return wrapper  # type: ignore
+
+
+def _finishAfter(operation: _Operation, futures: List[Future]) -> None:
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def done(_: Future) -> None:
+        with lock:
+            remaining[0] -= 1
+            if remaining[0] > 0:
+                return
+        errors = [future.exception() for future in futures if future.exception() is not None]
+        operation.finish(errors[0] if errors else None)
+
+    for future in futures:
+        future.add_done_callback(done)
+
+
+def instrumented(name: str) -> Callable[[F], F]:
+    """
+    Measure every call of a BaseApp method as operation ``name``.
+
+    A returned Future (``wait=False``) or list of Futures ends the operation when they resolve.
+    """
+    def decorator(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            hook = _hook
+            if hook is None or _current.get() is not None:
+                return fn(*args, **kwargs)
+
+            operation = _Operation(hook, name)
+            token = _current.set(operation)
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                operation.finish(e)
+                raise
+            finally:
+                _current.reset(token)
+
+            if isinstance(result, Future):
+                result.add_done_callback(lambda done: operation.finish(done.exception()))
+            elif isinstance(result, list) and result and all(isinstance(future, Future) for future in result):
+                _finishAfter(operation, result)
+            else:
+                operation.finish(None)
+            return result
+        return wrapper  # type: ignore
+    return decorator
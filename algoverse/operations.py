@@ -1,13 +1,89 @@
-from typing import Tuple, List
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Tuple, List, NamedTuple, Optional, Union
 
+from algosdk.error import AlgodHTTPError
 from algosdk.future import transaction
 from algosdk.logic import get_application_address
 from algosdk.v2client.algod import AlgodClient
 
+from . import metrics
 from .account import Account
-from .assets import President
-from .contracts import AlgoVerse
-from .utils import fullyCompileContract, waitForTransaction, PendingTxnResponse
+from .artifacts import loadPrograms
+from .assets import President, upgradeAmount
+from .confirmation import getConfirmationTracker
+from .params import getSuggestedParams
+from .scheduler import getScheduler
+from .signing import signTransactions
+from .state import AppStateMirror
+from .utils import PendingTxnResponse, getAppGlobalState, getBalances
+
+
+ACCOUNT_MIN_BALANCE = 100_000
+ASSET_MIN_BALANCE = 100_000
+BOX_FLAT_MIN_BALANCE = 2_500
+BOX_BYTE_MIN_BALANCE = 400
+MIN_TXN_FEE = 1_000
+MAX_GROUP_SIZE = 16
+
+# the replace call and its inner group of revoke and transfer
+REPLACE_FEE = 3 * MIN_TXN_FEE
+# the upgrade call, one clawback and one transfer
+UPGRADE_FEE = 3 * MIN_TXN_FEE
+# the retire call and the close-out of the set's 4 assets
+RETIRE_FEE = 5 * MIN_TXN_FEE
+# the delete call and the payment closing the app account
+DELETE_FEE = 2 * MIN_TXN_FEE
+
+SET_RECORD_SIZE = 32
+ASSET_ENTRY_SIZE = SET_RECORD_SIZE + 8
+
+
+def box_min_balance(key_size: int, value_size: int) -> int:
+    return BOX_FLAT_MIN_BALANCE + BOX_BYTE_MIN_BALANCE * (key_size + value_size)
+
+
+# min balance the app account needs for one President set: 4 asset opt-ins, the set record and 3 asset entries
+SET_MIN_BALANCE = 4 * ASSET_MIN_BALANCE + box_min_balance(8, SET_RECORD_SIZE) + 3 * box_min_balance(9, ASSET_ENTRY_SIZE)
+
+
+def set_box_key(index: int) -> bytes:
+    return index.to_bytes(8, "big")
+
+
+def asset_box_key(asset_id: int) -> bytes:
+    return b"a" + asset_id.to_bytes(8, "big")
+
+
+def unique_note() -> bytes:
+    # params are cached, so the same call built twice would otherwise be the same transaction and run once
+    return os.urandom(8)
+
+
+class Replace(NamedTuple):
+    holder: Account
+    base_asset_id: int
+    higher_asset_id: int
+    amount: int
+
+
+class ReplaceResult(NamedTuple):
+    entry: Replace
+    response: Optional[PendingTxnResponse]
+    error: Optional[Exception]
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class Teardown(NamedTuple):
+    retired: List[int]
+    destroyed: List[int]
+    # assets of the sender left alone because other accounts still hold units
+    kept: List[int]
+    # the app no longer exists, deleted now or by an earlier run
+    app_deleted: bool
 
 
 class BaseApp:
@@ -16,22 +92,53 @@ class BaseApp:
         self.CLEAR_STATE_PROGRAM = b""
 
     def get_contracts(self, client: AlgodClient) -> Tuple[bytes, bytes]:
-        app = AlgoVerse()
-
         if len(self.APPROVAL_PROGRAM) == 0:
-            self.APPROVAL_PROGRAM = fullyCompileContract(client, app.approval_program())
-            self.CLEAR_STATE_PROGRAM = fullyCompileContract(client, app.clear_program())
+            self.APPROVAL_PROGRAM, self.CLEAR_STATE_PROGRAM = loadPrograms(client)
 
         return self.APPROVAL_PROGRAM, self.CLEAR_STATE_PROGRAM
 
-    def create_app(self, client: AlgodClient, creator: Account):
+    def submit(self, client: AlgodClient, signedTxn: transaction.SignedTransaction) -> "Future[PendingTxnResponse]":
+        """Send a signed transaction and return a future resolved once it is confirmed"""
+        return self.submit_group(client, [signedTxn])[0]
+
+    def submit_group(self, client: AlgodClient,
+                     signedTxns: List[transaction.SignedTransaction]) -> List["Future[PendingTxnResponse]"]:
+        """
+        Send signed transactions in one request and return a future per transaction, waiting
+        while the client's SubmissionScheduler has too many transactions in flight
+        """
+        tracker = getConfirmationTracker(client)
+        with metrics.phase("submit"):
+            futures = getScheduler(client).submit(signedTxns)
+        metrics.recordSubmitted(signedTxns, futures, tracker.lastRound)
+        return futures
+
+    @metrics.instrumented("create")
+    def create_app(self, client: AlgodClient, creator: Account,
+                   wait: bool = True) -> Union[int, "Future[PendingTxnResponse]"]:
         approval, clear = self.get_contracts(client)
+        txn = self._create_txn(getSuggestedParams(client), creator, approval, clear)
+
+        signedTxn = creator.sign(txn)
+
+        future = self.submit(client, signedTxn)
+        if not wait:
+            return future
+
+        response = future.result()
+        assert response.applicationIndex is not None and response.applicationIndex > 0
+        return response.applicationIndex
+
+    # transaction builders, shared with AsyncBaseApp: they take params and return unsigned transactions
 
-        globalSchema = transaction.StateSchema(num_uints=64,
-                                               num_byte_slices=8)  # must be num_units * num_byte_slices = 64
+    @staticmethod
+    def _create_txn(params: transaction.SuggestedParams, creator: Account, approval: bytes, clear: bytes,
+                    note: Optional[bytes] = None) -> transaction.ApplicationCreateTxn:
+        # asset_cnt is the only global value, the President registry lives in boxes
+        globalSchema = transaction.StateSchema(num_uints=1, num_byte_slices=0)
         localSchema = transaction.StateSchema(num_uints=0, num_byte_slices=8)
 
-        txn = transaction.ApplicationCreateTxn(
+        return transaction.ApplicationCreateTxn(
             sender=creator.getAddress(),
             on_complete=transaction.OnComplete.NoOpOC,
             approval_program=approval,
@@ -39,132 +146,450 @@ class BaseApp:
             global_schema=globalSchema,
             local_schema=localSchema,
             # accounts=[],  # max number of accounts is 4
-            sp=client.suggested_params(),
+            sp=params,
+            note=note or unique_note(),
         )
 
-        signedTxn = txn.sign(creator.getPrivateKey())
+    @staticmethod
+    def _fund_txn(params: transaction.SuggestedParams, funder: Account, app_id: int, sets: int = 1,
+                  note: Optional[bytes] = None) -> transaction.PaymentTxn:
+        return transaction.PaymentTxn(
+            sender=funder.getAddress(),
+            receiver=get_application_address(app_id),
+            amt=ACCOUNT_MIN_BALANCE + sets * SET_MIN_BALANCE + 3 * MIN_TXN_FEE,
+            sp=params,
+            note=note or unique_note(),
+        )
 
-        client.send_transaction(signedTxn)
+    @staticmethod
+    def _upgrade_txn(params: transaction.SuggestedParams, sender: Account, app_id: int, asset: President,
+                     source_tier: int, target_tier: int, note: Optional[bytes] = None) -> transaction.ApplicationCallTxn:
+        upgradeAmount(source_tier, target_tier)
+        source_asset_id = asset.tiers()[source_tier]
 
-        response = waitForTransaction(client, signedTxn.get_txid())
-        assert response.applicationIndex is not None and response.applicationIndex > 0
-        return response.applicationIndex
+        params.fee = UPGRADE_FEE
+        params.flat_fee = True
+        return transaction.ApplicationCallTxn(
+            sender=sender.getAddress(),
+            index=app_id,
+            on_complete=transaction.OnComplete.NoOpOC,
+            app_args=[b"upgrade", target_tier.to_bytes(8, 'big')],
+            foreign_assets=[source_asset_id, asset.tiers()[target_tier]],
+            boxes=[(app_id, asset_box_key(source_asset_id))],
+            sp=params,
+            note=note or unique_note(),
+        )
 
+    @staticmethod
+    def _destroy_txn(params: transaction.SuggestedParams, sender: Account, asset_id: int,
+                     note: Optional[bytes] = None) -> transaction.AssetConfigTxn:
+        return transaction.AssetConfigTxn(
+            sender=sender.getAddress(),
+            index=asset_id,
+            strict_empty_address_check=False,
+            sp=params,
+            note=note or unique_note(),
+        )
+
+    @staticmethod
+    def _opt_in_group(call_txn: transaction.Transaction, params: transaction.SuggestedParams, sender: Account,
+                      asset_id: int, opted_in: bool) -> List[transaction.Transaction]:
+        """
+        The app call alone, or behind an opt-in of the sender to asset_id in the same group when the
+        sender isn't opted in yet: the app can't opt the sender in
+        """
+        if opted_in:
+            return [call_txn]
+        txns = [BaseApp._opt_in_txn(params, sender, asset_id), call_txn]
+        transaction.assign_group_id(txns)
+        return txns
+
+    @metrics.instrumented("close")
     def close_app(
             self,
             client: AlgodClient,
             appID: int,
-            sender: Account
+            sender: Account,
+            wait: bool = True,
     ):
-        deleteTxn = transaction.ApplicationDeleteTxn(
-            sender=sender.getAddress(),
-            index=appID,
-            sp=client.suggested_params()
-        )
-        signedDeleteTxn = deleteTxn.sign(sender.getPrivateKey())
+        deleteTxn = self._delete_txn(getSuggestedParams(client), sender, appID)
+        signedDeleteTxn = sender.sign(deleteTxn)
+
+        future = self.submit(client, signedDeleteTxn)
+        if not wait:
+            return future
 
-        client.send_transaction(signedDeleteTxn)
+        future.result()
 
-        waitForTransaction(client, signedDeleteTxn.get_txid())
+    @staticmethod
+    def _delete_txn(params: transaction.SuggestedParams, sender: Account, app_id: int,
+                    note: Optional[bytes] = None) -> transaction.ApplicationDeleteTxn:
+        params.fee = DELETE_FEE  # the call and the inner payment closing the app account
+        params.flat_fee = True
+        return transaction.ApplicationDeleteTxn(sender=sender.getAddress(), index=app_id, sp=params,
+                                                note=note or unique_note())
 
+    @metrics.instrumented("fund")
     def fund_algo_to_app(
             self,
             client: AlgodClient,
             funder: Account,
             app_id: int,
+            wait: bool = True,
+            sets: int = 1,
     ):
-        app_adr = get_application_address(app_id)
+        fund_app_txn = self._fund_txn(getSuggestedParams(client), funder, app_id, sets)
+        signed_fund_app_txn = funder.sign(fund_app_txn)
+        future = self.submit(client, signed_fund_app_txn)
+        if not wait:
+            return future
 
-        params = client.suggested_params()
-        funding_amount = 100_000 + 100_000 + 3 * 1_000
-        fund_app_txn = transaction.PaymentTxn(
-            sender=funder.getAddress(),
-            receiver=app_adr,
-            amt=funding_amount,
-            sp=params,
-        )
-        signed_fund_app_txn = fund_app_txn.sign(funder.getPrivateKey())
-        client.send_transaction(signed_fund_app_txn)
-
-        waitForTransaction(client, signed_fund_app_txn.get_txid())
+        future.result()
 
+    @metrics.instrumented("opt-in")
     def opt_in_to_asset(
             self,
-            client: AlgodClient, asset_id: int, account: Account
-    ) -> PendingTxnResponse:
-        txn = transaction.AssetOptInTxn(
-            sender=account.getAddress(),
-            index=asset_id,
-            sp=client.suggested_params(),
-        )
-        signedTxn = txn.sign(account.getPrivateKey())
-
-        client.send_transaction(signedTxn)
-        return waitForTransaction(client, signedTxn.get_txid())
-
-    def setup_app(self, client: AlgodClient, sender: Account, app_id: int, asset: President):
-        params = client.suggested_params()
-        app_args = [b"setup"]
-        setup_app_txn = transaction.ApplicationCallTxn(
+            client: AlgodClient, asset_id: int, account: Account, wait: bool = True
+    ) -> Union[PendingTxnResponse, "Future[PendingTxnResponse]"]:
+        txn = self._opt_in_txn(getSuggestedParams(client), account, asset_id)
+        signedTxn = account.sign(txn)
+
+        future = self.submit(client, signedTxn)
+        if not wait:
+            return future
+
+        return future.result()
+
+    @staticmethod
+    def _setup_txn(params: transaction.SuggestedParams, sender: Account, app_id: int, index: int,
+                   asset: President, note: Optional[bytes] = None) -> transaction.ApplicationCallTxn:
+        params.fee = 5 * MIN_TXN_FEE  # the call itself and the 4 inner opt-ins
+        params.flat_fee = True
+        return transaction.ApplicationCallTxn(
             sender=sender.getAddress(),
             sp=params,
             index=app_id,
             on_complete=transaction.OnComplete.NoOpOC,
-            app_args=app_args,
+            app_args=[b"setup"],
             foreign_assets=[
                 asset.base,
                 asset.silver,
                 asset.gold,
                 asset.diamond,
-            ]
+            ],
+            boxes=[
+                (app_id, set_box_key(index)),
+                (app_id, asset_box_key(asset.base)),
+                (app_id, asset_box_key(asset.silver)),
+                (app_id, asset_box_key(asset.gold)),
+            ],
+            note=note or unique_note(),
         )
 
-        signed_setup_app_txn = setup_app_txn.sign(sender.getPrivateKey())
-
-        client.send_transaction(signed_setup_app_txn)
-
-        waitForTransaction(client, signed_setup_app_txn.get_txid())
-
-    def send_asset(self, client: AlgodClient, sender: Account, app_id: int, base_asset_id: int, higher_asset_id: int,
-                   amount: int):
-        params = client.suggested_params()
-
-        app_args = [
-            b"replace",
-            amount.to_bytes(8, 'big')
-        ]
-
-        call_txn = transaction.ApplicationCallTxn(
+    @metrics.instrumented("setup")
+    def setup_app(self, client: AlgodClient, sender: Account, app_id: int, asset: President, wait: bool = True):
+        asset_cnt = getAppGlobalState(client, app_id)[b"asset_cnt"]
+        setup_app_txn = self._setup_txn(getSuggestedParams(client), sender, app_id, asset_cnt, asset)
+
+        signed_setup_app_txn = sender.sign(setup_app_txn)
+
+        future = self.submit(client, signed_setup_app_txn)
+        if not wait:
+            return future
+
+        future.result()
+
+    @metrics.instrumented("setup")
+    def setup_group(self, client: AlgodClient, sender: Account, app_id: int, first_index: int,
+                    assets: List[President]) -> List["Future[PendingTxnResponse]"]:
+        """
+        Send up to 16 setup calls in one group without waiting, the app's asset_cnt must be
+        first_index when the group is evaluated and the app must already hold the min balance
+        """
+        if len(assets) > MAX_GROUP_SIZE:
+            raise Exception(f"at most {MAX_GROUP_SIZE} sets fit in one group")
+        txns = [self._setup_txn(getSuggestedParams(client), sender, app_id, first_index + i, asset)
+                for i, asset in enumerate(assets)]
+        if len(txns) > 1:
+            transaction.assign_group_id(txns)
+        return self.submit_group(client, signTransactions(sender, txns))
+
+    @metrics.instrumented("setup")
+    def setup_apps(self, client: AlgodClient, sender: Account, app_id: int,
+                   assets: List[President]) -> List[PendingTxnResponse]:
+        """
+        Register many President sets at once.
+
+        The first group carries a single payment covering the min balance the app account is
+        missing for all the sets; once it is confirmed the remaining setup calls are sent in
+        groups of 16 without waiting on each other.
+        """
+        asset_cnt = getAppGlobalState(client, app_id)[b"asset_cnt"]
+
+        app_info = client.account_info(get_application_address(app_id))
+        required = max(app_info.get("min-balance", 0), ACCOUNT_MIN_BALANCE) + len(assets) * SET_MIN_BALANCE
+        shortfall = required - app_info.get("amount", 0)
+
+        txns: List[transaction.Transaction] = []
+        if shortfall > 0:
+            txns.append(transaction.PaymentTxn(
+                sender=sender.getAddress(),
+                receiver=get_application_address(app_id),
+                amt=shortfall,
+                sp=getSuggestedParams(client),
+                note=unique_note(),
+            ))
+        txns.extend(self._setup_txn(getSuggestedParams(client), sender, app_id, asset_cnt + i, asset)
+                    for i, asset in enumerate(assets))
+
+        for start in range(0, len(txns), MAX_GROUP_SIZE):
+            group = txns[start:start + MAX_GROUP_SIZE]
+            if len(group) > 1:
+                transaction.assign_group_id(group)
+        signed = signTransactions(sender, txns)
+
+        groups = [signed[start:start + MAX_GROUP_SIZE] for start in range(0, len(signed), MAX_GROUP_SIZE)]
+        futures: List["Future[PendingTxnResponse]"] = []
+        for number, signedTxns in enumerate(groups):
+            futures.extend(self.submit_group(client, signedTxns))
+
+            if number == 0 and shortfall > 0:
+                # every later group spends the funds of this payment
+                futures[-1].result()
+
+        responses = [future.result() for future in futures]
+        return responses[1:] if shortfall > 0 else responses
+
+    @staticmethod
+    def _replace_txn(params: transaction.SuggestedParams, sender: Account, app_id: int, base_asset_id: int,
+                     higher_asset_id: int, amount: int, note: Optional[bytes] = None) -> transaction.ApplicationCallTxn:
+        params.fee = REPLACE_FEE
+        params.flat_fee = True
+        return transaction.ApplicationCallTxn(
             sender=sender.getAddress(),
             index=app_id,
             on_complete=transaction.OnComplete.NoOpOC,
-            app_args=app_args,
+            app_args=[b"replace", amount.to_bytes(8, 'big')],
             foreign_assets=[base_asset_id, higher_asset_id],
+            boxes=[(app_id, asset_box_key(base_asset_id))],
             sp=params,
+            note=note or unique_note(),
         )
 
-        signed_call_txn = call_txn.sign(sender.getPrivateKey())
-
-        client.send_transaction(signed_call_txn)
-
-        waitForTransaction(client, signed_call_txn.get_txid())
+    @staticmethod
+    def _opt_in_txn(params: transaction.SuggestedParams, sender: Account, asset_id: int,
+                    note: Optional[bytes] = None) -> transaction.AssetTransferTxn:
+        return transaction.AssetOptInTxn(sender=sender.getAddress(), sp=params, index=asset_id,
+                                         note=note or unique_note())
 
+    @metrics.instrumented("replace")
+    def send_asset(self, client: AlgodClient, sender: Account, app_id: int, base_asset_id: int, higher_asset_id: int,
+                   amount: int, wait: bool = True):
+        call_txn = self._replace_txn(getSuggestedParams(client), sender, app_id, base_asset_id, higher_asset_id,
+                                     amount)
+
+        opted_in = higher_asset_id in getBalances(client, sender.getAddress())
+        txns = self._opt_in_group(call_txn, getSuggestedParams(client), sender, higher_asset_id, opted_in)
+        signedTxns = [sender.sign(txn) for txn in txns]
+        future = self.submit_group(client, signedTxns)[-1]
+
+        if not wait:
+            return future
+
+        future.result()
+
+    @metrics.instrumented("upgrade")
+    def upgrade_asset(self, client: AlgodClient, sender: Account, app_id: int, asset: President, source_tier: int,
+                      target_tier: int, wait: bool = True):
+        """
+        Upgrade from source_tier straight to target_tier (0: base ... 3: diamond) in one call,
+        revoking upgradeAmount(source_tier, target_tier) of the source asset.
+        The sender is opted into the target asset in the same group when needed
+        """
+        call_txn = self._upgrade_txn(getSuggestedParams(client), sender, app_id, asset, source_tier, target_tier)
+        target_asset_id = asset.tiers()[target_tier]
+        opted_in = target_asset_id in getBalances(client, sender.getAddress())
+        txns = self._opt_in_group(call_txn, getSuggestedParams(client), sender, target_asset_id, opted_in)
+        signedTxns = [sender.sign(txn) for txn in txns]
+
+        future = self.submit_group(client, signedTxns)[-1]
+        if not wait:
+            return future
+
+        future.result()
+
+    def _submit_replaces(self, client: AlgodClient, app_id: int,
+                         entries: List[Tuple[Replace, bool]]
+                         ) -> List[Tuple[Replace, Union["Future[PendingTxnResponse]", Exception]]]:
+        """
+        :param entries: (entry, whether the holder needs an opt-in to the higher asset)
+        """
+        txns: List[transaction.Transaction] = []
+        signers: List[Account] = []
+        for entry, needs_opt_in in entries:
+            if needs_opt_in:
+                txns.append(self._opt_in_txn(getSuggestedParams(client), entry.holder, entry.higher_asset_id))
+                signers.append(entry.holder)
+            txns.append(self._replace_txn(getSuggestedParams(client), entry.holder, app_id, entry.base_asset_id,
+                                          entry.higher_asset_id, entry.amount))
+            signers.append(entry.holder)
+        if len(txns) > 1:
+            transaction.assign_group_id(txns)
+        signedTxns = [signer.sign(txn) for signer, txn in zip(signers, txns)]
+
+        try:
+            futures = self.submit_group(client, signedTxns)
+        except AlgodHTTPError as e:
+            if len(entries) == 1:
+                return [(entries[0][0], e)]
+            # one bad entry rejects the whole group, retry them one by one to find it
+            return [submitted for entry in entries for submitted in self._submit_replaces(client, app_id, [entry])]
+
+        # every entry ends with its app call
+        calls = [future for future, signedTxn in zip(futures, signedTxns) if signedTxn.transaction.type == "appl"]
+        return [(entry, call) for (entry, _), call in zip(entries, calls)]
+
+    @metrics.instrumented("replace")
+    def send_assets(self, client: AlgodClient, app_id: int, entries: List[Replace],
+                    max_workers: int = 4) -> List[ReplaceResult]:
+        """
+        Replace many assets at once, entries are (holder, base asset, higher asset, amount).
+
+        Up to 16 transactions go into one atomic group and groups are submitted concurrently. Holders
+        not opted into the higher asset get an opt-in in front of their app call. A group rejected by
+        algod is retried entry by entry, so each entry gets its own result, in input order.
+        """
+        entries = [Replace(*entry) for entry in entries]
+        holdings = {holder.getAddress(): set(getBalances(client, holder.getAddress()))
+                    for holder in {entry.holder for entry in entries}}
+
+        # every entry missing the opt-in gets its own, an opt-in of an opted in account is a no-op,
+        # so the entries don't depend on which group lands first
+        units = [(entry, entry.higher_asset_id not in holdings[entry.holder.getAddress()]) for entry in entries]
+
+        groups: List[List[Tuple[Replace, bool]]] = [[]]
+        size = 0
+        for unit in units:
+            unit_size = 2 if unit[1] else 1
+            if size + unit_size > MAX_GROUP_SIZE:
+                groups.append([])
+                size = 0
+            groups[-1].append(unit)
+            size += unit_size
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            submitted = list(executor.map(metrics.bind(lambda group: self._submit_replaces(client, app_id, group)),
+                                          [group for group in groups if group]))
+
+        results: List[ReplaceResult] = []
+        for entry, outcome in (pair for group in submitted for pair in group):
+            if isinstance(outcome, Exception):
+                results.append(ReplaceResult(entry, None, outcome))
+                continue
+            try:
+                results.append(ReplaceResult(entry, outcome.result(), None))
+            except Exception as e:
+                results.append(ReplaceResult(entry, None, e))
+        return results
+
+    @metrics.instrumented("destroy")
     def destroy_asset(
             self,
             client: AlgodClient,
             sender: Account,
             asset_id: int,
+            wait: bool = True,
     ):
-        params = client.suggested_params()
-
-        txn = transaction.AssetConfigTxn(
+        txn = self._destroy_txn(getSuggestedParams(client), sender, asset_id)
+        signedTxn = sender.sign(txn)
+
+        future = self.submit(client, signedTxn)
+        if not wait:
+            return future
+
+        future.result()
+
+    def _submit_in_groups(self, client: AlgodClient, sender: Account,
+                          txns: List[transaction.Transaction]) -> List["Future[PendingTxnResponse]"]:
+        for start in range(0, len(txns), MAX_GROUP_SIZE):
+            group = txns[start:start + MAX_GROUP_SIZE]
+            if len(group) > 1:
+                transaction.assign_group_id(group)
+        signed = signTransactions(sender, txns)
+        futures: List["Future[PendingTxnResponse]"] = []
+        for start in range(0, len(signed), MAX_GROUP_SIZE):
+            futures.extend(self.submit_group(client, signed[start:start + MAX_GROUP_SIZE]))
+        return futures
+
+    @staticmethod
+    def _retire_txn(params: transaction.SuggestedParams, sender: Account, app_id: int, index: int,
+                    asset: President, note: Optional[bytes] = None) -> transaction.ApplicationCallTxn:
+        params.fee = RETIRE_FEE
+        params.flat_fee = True
+        return transaction.ApplicationCallTxn(
             sender=sender.getAddress(),
-            index=asset_id,
-            strict_empty_address_check=False,
-            sp=params
+            sp=params,
+            index=app_id,
+            on_complete=transaction.OnComplete.NoOpOC,
+            app_args=[b"retire", index.to_bytes(8, "big")],
+            foreign_assets=list(asset.tiers()),
+            boxes=[
+                (app_id, set_box_key(index)),
+                (app_id, asset_box_key(asset.base)),
+                (app_id, asset_box_key(asset.silver)),
+                (app_id, asset_box_key(asset.gold)),
+            ],
+            note=note or unique_note(),
         )
-        signedTxn = txn.sign(sender.getPrivateKey())
-
-        client.send_transaction(signedTxn)
 
-        waitForTransaction(client, signedTxn.get_txid())
+    @metrics.instrumented("teardown")
+    def teardown_app(self, client: AlgodClient, sender: Account, app_id: int,
+                     presidents: Optional[List[President]] = None) -> Teardown:
+        """
+        Retire an AlgoVerse deployment: every registered set is handed back to the sender, then the
+        assets are destroyed and the app is deleted, which closes its account to the sender.
+
+        Retire calls and destroys go out in groups of 16 without waiting on each other, so the whole
+        teardown takes two rounds. Everything is read from the chain first, so a teardown that failed
+        halfway can just be run again. Assets created by the sender with the app as clawback are
+        destroyed along with the tiers of presidents, unless someone else still holds some of them.
+        """
+        app_address = get_application_address(app_id)
+        try:
+            mirror: Optional[AppStateMirror] = AppStateMirror(client, app_id).load()
+        except AlgodHTTPError as e:
+            # only a missing app means it was deleted by an earlier run
+            if e.code != 404 and "application does not exist" not in str(e):
+                raise
+            mirror = None
+
+        candidates = {asset_id for president in presidents or [] for asset_id in president.tiers()}
+        retired: List[int] = []
+        if mirror is not None:
+            registered = [(index, president) for index, president in enumerate(mirror.registry)
+                          if president.base != 0]
+            txns = [self._retire_txn(getSuggestedParams(client), sender, app_id, index, president)
+                    for index, president in registered]
+            for future in self._submit_in_groups(client, sender, txns):
+                future.result()
+            retired = [index for index, _ in registered]
+            candidates.update(asset_id for _, president in registered for asset_id in president.tiers())
+
+        account = client.account_info(sender.getAddress())
+        holdings = {holding["asset-id"]: holding["amount"] for holding in account.get("assets", [])}
+        created = {asset["index"]: asset.get("params", {}) for asset in account.get("created-assets", [])}
+        candidates.update(asset_id for asset_id, params in created.items() if params.get("clawback") == app_address)
+
+        destroyed = sorted(asset_id for asset_id in candidates
+                           if asset_id in created and holdings.get(asset_id) == created[asset_id].get("total"))
+        # assets destroyed by an earlier run or created by someone else are not the sender's to keep
+        kept = sorted(candidates.intersection(created).difference(destroyed))
+
+        txns = [self._destroy_txn(getSuggestedParams(client), sender, asset_id) for asset_id in destroyed]
+        futures = self._submit_in_groups(client, sender, txns)
+        if mirror is not None:
+            futures.append(self.submit(client, sender.sign(self._delete_txn(getSuggestedParams(client), sender,
+                                                                              app_id))))
+        for future in futures:
+            future.result()
+        return Teardown(retired, destroyed, kept, True)
@@ -0,0 +1,75 @@
+import copy
+import threading
+import time
+import weakref
+from typing import Optional
+
+from algosdk.future import transaction
+from algosdk.v2client.algod import AlgodClient
+
+from . import metrics
+from .confirmation import ClientBound, getConfirmationTracker
+
+MAX_VALIDITY = 1000
+
+
+class SuggestedParamsProvider(ClientBound):
+    """
+    Caches suggested params for a client.
+
+    The cached value is refreshed once the confirmation tracker has seen a newer round or
+    once it is older than ``ttl`` seconds, so a burst of writes shares a single fetch.
+    """
+
+    def __init__(self, client: AlgodClient, ttl: float = 5.0, validity: Optional[int] = None) -> None:
+        super().__init__(client)
+        self.ttl = ttl
+        self.validity = validity
+        self._params: Optional[transaction.SuggestedParams] = None
+        self._fetchedAt = 0.0
+        self._lock = threading.Lock()
+
+    def _isStale(self) -> bool:
+        if self._params is None:
+            return True
+        if time.monotonic() - self._fetchedAt > self.ttl:
+            return True
+        return getConfirmationTracker(self.client).lastRound > self._params.first
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._params = None
+
+    def get(self, validity: Optional[int] = None) -> transaction.SuggestedParams:
+        """
+        :param validity: number of rounds the transaction stays valid for, up to 1000
+        :return: a private copy of the cached params
+        """
+        with self._lock:
+            if self._isStale():
+                self._params = self.client.suggested_params()
+                self._fetchedAt = time.monotonic()
+            params = copy.copy(self._params)
+
+        validity = validity if validity is not None else self.validity
+        if validity is not None:
+            params.last = params.first + min(validity, MAX_VALIDITY)
+        return params
+
+
+_providers: "weakref.WeakKeyDictionary[AlgodClient, SuggestedParamsProvider]" = weakref.WeakKeyDictionary()
+_providersLock = threading.Lock()
+
+
+def getParamsProvider(client: AlgodClient) -> SuggestedParamsProvider:
+    with _providersLock:
+        provider = _providers.get(client)
+        if provider is None:
+            provider = SuggestedParamsProvider(client)
+            _providers[client] = provider
+        return provider
+
+
+def getSuggestedParams(client: AlgodClient, validity: Optional[int] = None) -> transaction.SuggestedParams:
+    with metrics.phase("params"):
+        return getParamsProvider(client).get(validity)
@@ -0,0 +1,247 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from algosdk.future import transaction
+from algosdk.logic import get_application_address
+from algosdk.v2client.algod import AlgodClient
+
+from .account import Account
+from .assets import President, PresidentRegistry
+from .confirmation import PendingTxnResponse
+from .operations import BaseApp, MAX_GROUP_SIZE, unique_note
+from .params import getSuggestedParams
+from .signing import signTransactions
+from .tokens import submitTokens
+
+# a step either returns a plain value or the futures of the transactions it sent
+StepRun = Callable[[Dict[str, Any]], Any]
+
+
+class Step:
+    def __init__(self, name: str, run: StepRun, after: Sequence[str] = (), txns: int = 1) -> None:
+        self.name = name
+        self.run = run
+        self.after = tuple(after)
+        self.txns = txns
+        self.started = 0.0
+        self.finished = 0.0
+
+
+class ProvisioningReport:
+    def __init__(self, seconds: float, rounds: int, steps: Dict[str, float], results: Dict[str, Any]) -> None:
+        self.seconds = seconds
+        self.rounds = rounds
+        self.steps = steps
+        self.results = results
+
+    def __str__(self) -> str:
+        return f"{len(self.steps)} steps in {self.seconds:.2f}s over {self.rounds} rounds"
+
+
+class Pipeline:
+    """
+    Runs steps as soon as the steps they depend on are confirmed.
+
+    Steps send their transactions and return the futures right away, so waiting for
+    confirmations costs no thread: the shared ConfirmationTracker resolves them and the next
+    steps start from its callbacks. At most ``maxInFlight`` transactions are unconfirmed at once.
+    A step gets the results of its dependencies, a list of responses for steps that sent
+    transactions.
+    """
+
+    def __init__(self, client: AlgodClient, maxInFlight: int = 64, workers: int = 4) -> None:
+        self.client = client
+        self.maxInFlight = maxInFlight
+        self.workers = workers
+        self.steps: Dict[str, Step] = dict()
+
+    def add(self, name: str, run: StepRun, after: Sequence[str] = (), txns: int = 1) -> str:
+        if name in self.steps:
+            raise Exception(f"Duplicate step: {name}")
+        for dependency in after:
+            if dependency not in self.steps:
+                raise Exception(f"Step {name} depends on unknown step {dependency}")
+        self.steps[name] = Step(name, run, after, txns)
+        return name
+
+    def run(self) -> ProvisioningReport:
+        started = time.perf_counter()
+        firstRound = self.client.status().get("last-round", 0)
+
+        condition = threading.Condition()
+        results: Dict[str, Any] = dict()
+        waiting = list(self.steps.values())
+        running = set()
+        inFlight = [0]
+        errors: List[BaseException] = []
+        lastRound = [firstRound]
+
+        def complete(step: Step, value: Any, error: Optional[BaseException]) -> None:
+            with condition:
+                step.finished = time.perf_counter()
+                running.discard(step.name)
+                inFlight[0] -= step.txns
+                if error is not None:
+                    errors.append(Exception(f"Step {step.name} failed: {error}"))
+                else:
+                    results[step.name] = value
+                condition.notify_all()
+
+        def execute(step: Step) -> None:
+            try:
+                value = step.run({dependency: results[dependency] for dependency in step.after})
+            except BaseException as e:
+                complete(step, None, e)
+                return
+
+            futures = value if isinstance(value, list) and value and isinstance(value[0], Future) else None
+            if futures is None:
+                complete(step, value, None)
+                return
+
+            remaining = [len(futures)]
+
+            def confirmed(_: "Future[PendingTxnResponse]") -> None:
+                with condition:
+                    remaining[0] -= 1
+                    if remaining[0] > 0:
+                        return
+                failed = [future.exception() for future in futures if future.exception() is not None]
+                responses = [] if failed else [future.result() for future in futures]
+                if responses:
+                    with condition:
+                        lastRound[0] = max([lastRound[0]] + [r.confirmedRound or 0 for r in responses])
+                complete(step, responses, failed[0] if failed else None)
+
+            for future in futures:
+                future.add_done_callback(confirmed)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            with condition:
+                while (waiting or running) and not (errors and not running):
+                    if not errors:
+                        for step in list(waiting):
+                            if not all(dependency in results for dependency in step.after):
+                                continue
+                            # a step larger than the cap still runs, alone
+                            if inFlight[0] and inFlight[0] + step.txns > self.maxInFlight:
+                                continue
+                            waiting.remove(step)
+                            running.add(step.name)
+                            inFlight[0] += step.txns
+                            step.started = time.perf_counter()
+                            executor.submit(execute, step)
+                    condition.wait()
+
+        if errors:
+            raise errors[0]
+
+        return ProvisioningReport(
+            seconds=time.perf_counter() - started,
+            rounds=lastRound[0] - firstRound,
+            steps={name: step.finished - step.started for name, step in self.steps.items()},
+            results=results,
+        )
+
+
+class AlgoVerseSpec:
+    """
+    What to provision: an AlgoVerse app, ``sets`` President sets of ``amount`` tokens each
+    and ``stock`` silver, gold and diamond tokens per set moved into the app to hand out
+    """
+
+    def __init__(self, creator: Account, sets: int, amount: int, stock: int = 0) -> None:
+        self.creator = creator
+        self.sets = sets
+        self.amount = amount
+        self.stock = stock
+
+
+class Provisioned:
+    def __init__(self, app_id: int, presidents: PresidentRegistry, report: ProvisioningReport) -> None:
+        self.app_id = app_id
+        self.presidents = presidents
+        self.report = report
+
+
+def _stock(app: BaseApp, client: AlgodClient, creator: Account, app_id: int, presidents: List[President],
+           stock: int) -> List["Future[PendingTxnResponse]"]:
+    txns = [
+        transaction.AssetTransferTxn(creator.getAddress(), getSuggestedParams(client), get_application_address(app_id),
+                                     stock, asset_id, note=unique_note())
+        for president in presidents for asset_id in president.tiers()[1:]
+    ]
+    if len(txns) > 1:
+        transaction.assign_group_id(txns)
+    return app.submit_group(client, signTransactions(creator, txns))
+
+
+def provisionAlgoVerse(client: AlgodClient, spec: AlgoVerseSpec, app: Optional[BaseApp] = None,
+                       maxInFlight: int = 64) -> Provisioned:
+    """
+    Deploy and fill an AlgoVerse app.
+
+    Tokens are minted 4 sets per group alongside the funding. Each setup group waits for its
+    tokens, the funding and the previous setup group, because the app stores a set under its
+    asset_cnt at that time. Stocking a set waits for its setup, which opts the app in.
+    """
+    app = app or BaseApp()
+    creator = spec.creator
+    pipeline = Pipeline(client, maxInFlight)
+    setsPerTokenGroup = MAX_GROUP_SIZE // 4
+    setsPerStockGroup = MAX_GROUP_SIZE // 3
+
+    def appID(results: Dict[str, Any]) -> int:
+        return results["create"][0].applicationIndex
+
+    def tokenStep(index: int) -> str:
+        return f"tokens-{index - index % setsPerTokenGroup}"
+
+    def setupStep(index: int) -> str:
+        return f"setup-{index - index % MAX_GROUP_SIZE}"
+
+    def president(results: Dict[str, Any], index: int) -> President:
+        offset = 4 * (index % setsPerTokenGroup)
+        responses = results[tokenStep(index)][offset:offset + 4]
+        return President(*(response.assetIndex for response in responses), spec.amount)
+
+    def mint(results: Dict[str, Any], count: int) -> List[Future]:
+        return submitTokens(client, creator, [(spec.amount, get_application_address(appID(results)))] * (4 * count))
+
+    def setup(results: Dict[str, Any], first: int, count: int) -> List[Future]:
+        sets = [president(results, index) for index in range(first, first + count)]
+        return app.setup_group(client, creator, appID(results), first, sets)
+
+    def stock(results: Dict[str, Any], first: int, count: int) -> List[Future]:
+        sets = [president(results, index) for index in range(first, first + count)]
+        return _stock(app, client, creator, appID(results), sets, spec.stock)
+
+    pipeline.add("create", lambda results: [app.create_app(client, creator, wait=False)])
+    pipeline.add("fund", lambda results: [app.fund_algo_to_app(client, creator, appID(results), wait=False,
+                                                               sets=spec.sets)], ["create"])
+
+    for first in range(0, spec.sets, setsPerTokenGroup):
+        count = min(setsPerTokenGroup, spec.sets - first)
+        pipeline.add(tokenStep(first), lambda results, count=count: mint(results, count), ["create"], 4 * count)
+
+    for first in range(0, spec.sets, MAX_GROUP_SIZE):
+        count = min(MAX_GROUP_SIZE, spec.sets - first)
+        after = {"create", "fund"} | {tokenStep(index) for index in range(first, first + count)}
+        if first > 0:
+            after.add(setupStep(first - 1))
+        pipeline.add(setupStep(first), lambda results, first=first, count=count: setup(results, first, count),
+                     sorted(after), count)
+
+    if spec.stock > 0:
+        for first in range(0, spec.sets, setsPerStockGroup):
+            count = min(setsPerStockGroup, spec.sets - first)
+            # setups run in order, so the one of the last set covers all of them
+            after = {"create", setupStep(first + count - 1)} | {tokenStep(index) for index in range(first, first + count)}
+            pipeline.add(f"stock-{first}", lambda results, first=first, count=count: stock(results, first, count),
+                         sorted(after), 3 * count)
+
+    report = pipeline.run()
+    presidents = PresidentRegistry([president(report.results, index) for index in range(spec.sets)])
+    return Provisioned(appID(report.results), presidents, report)
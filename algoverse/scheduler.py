@@ -0,0 +1,309 @@
+import base64
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+from algosdk import encoding
+from algosdk.error import AlgodHTTPError
+from algosdk.future import transaction
+from algosdk.v2client.algod import AlgodClient
+
+from .confirmation import ClientBound, PendingTxnResponse, getConfirmationTracker
+from .transport import RETRYABLE_ERRORS
+
+MAX_GROUP_SIZE = 16
+MAX_BACKOFF = 2.0
+
+
+def _isOverloaded(e: Exception) -> bool:
+    """The node turned the request down for lack of capacity, the same bytes can be sent again"""
+    if isinstance(e, RETRYABLE_ERRORS):
+        return True
+    return isinstance(e, AlgodHTTPError) and (e.code in (429, 503) or "pool is full" in str(e))
+
+
+def _isAlreadySent(e: Exception) -> bool:
+    # a resubmission of a transaction the node already has
+    return isinstance(e, AlgodHTTPError) and ("already in ledger" in str(e) or "already in pool" in str(e))
+
+
+class SchedulerStats:
+    def __init__(self) -> None:
+        self.submitted = 0
+        self.resubmitted = 0
+        self.confirmed = 0
+        self.failed = 0
+        self.expired = 0
+        self.overloaded = 0
+
+    def asDict(self) -> Dict[str, int]:
+        return {
+            "submitted": self.submitted,
+            "resubmitted": self.resubmitted,
+            "confirmed": self.confirmed,
+            "failed": self.failed,
+            "expired": self.expired,
+            "overloaded": self.overloaded,
+        }
+
+
+def encodeGroup(signedTxns: List[transaction.SignedTransaction]) -> bytes:
+    """The signed transactions back to back in msgpack, the body of a POST /transactions"""
+    return b"".join(base64.b64decode(encoding.msgpack_encode(signedTxn)) for signedTxn in signedTxns)
+
+
+class _Group:
+    def __init__(self, body: bytes, txIDs: List[str], lastValid: int) -> None:
+        self.body = body
+        self.txIDs = txIDs
+        self.lastValid = lastValid
+        self.futures: List["Future[PendingTxnResponse]"] = [Future() for _ in txIDs]
+        self.sentRound = 0
+        self.retryAt: Optional[float] = None
+        self.attempts = 0
+        self.finished = False
+
+
+class SubmissionScheduler(ClientBound):
+    """
+    Sends transaction groups to algod on behalf of every writer of a client.
+
+    At most ``window`` transactions are unconfirmed at once, callers of ``submit`` wait for
+    room. The window grows by ``increase`` transactions per round of confirmations and halves,
+    at most once a round, when algod reports a full pool or a group takes longer than
+    ``targetRounds`` to confirm. Sends turned down for lack of capacity are retried with
+    backoff, and groups not confirmed after ``resubmitRounds`` or lost by the confirmation
+    tracker are sent again, as long as they are inside their validity window.
+
+    The futures fail with the error algod gave once a group is rejected for good or expired.
+    """
+
+    def __init__(self, client: AlgodClient, window: int = 64, minWindow: int = MAX_GROUP_SIZE,
+                 maxWindow: int = 1024, increase: int = MAX_GROUP_SIZE, targetRounds: int = 2,
+                 resubmitRounds: int = 4, backoff: float = 0.1, interval: float = 0.5) -> None:
+        super().__init__(client)
+        self.window = float(window)
+        self.minWindow = minWindow
+        self.maxWindow = maxWindow
+        self.increase = increase
+        self.targetRounds = targetRounds
+        self.resubmitRounds = resubmitRounds
+        self.backoff = backoff
+        self.interval = interval
+        self.inFlight = 0
+        self.stats = SchedulerStats()
+
+        self._groups: List[_Group] = []
+        self._decreasedAt = -1
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, signedTxns: List[transaction.SignedTransaction]) -> List["Future[PendingTxnResponse]"]:
+        """
+        Send a group once the window has room and return a future per transaction.
+
+        :raises AlgodHTTPError: when algod rejects the group, e.g. because it fails evaluation or is
+            a duplicate of a transaction algod already has
+        """
+        return self.submitEncoded(encodeGroup(signedTxns), [signedTxn.get_txid() for signedTxn in signedTxns],
+                                  min(signedTxn.transaction.last_valid_round for signedTxn in signedTxns))
+
+    def submitEncoded(self, body: bytes, txIDs: List[str], lastValid: int) -> List["Future[PendingTxnResponse]"]:
+        """
+        Same as ``submit`` for a group that is already encoded, e.g. taken from a Spool
+
+        :param body: the signed transactions as returned by encodeGroup
+        :param lastValid: the lowest last valid round of the group
+        """
+        group = _Group(body, txIDs, lastValid)
+        size = len(txIDs)
+        with self._condition:
+            # a group larger than the window still goes, alone
+            while self.inFlight and self.inFlight + size > self.window:
+                self._condition.wait()
+            self.inFlight += size
+
+        try:
+            self._send(group)
+        except BaseException as e:
+            with self._condition:
+                self.inFlight -= size
+                if _isOverloaded(e):
+                    self.stats.expired += size
+                else:
+                    self.stats.failed += size
+                self._condition.notify_all()
+            raise
+
+        with self._condition:
+            self.stats.submitted += size
+            self._groups.append(group)
+            if self._thread is None:
+                # held by the thread until the last group is finished
+                self._thread = threading.Thread(target=self._follow, args=(self.client,), name="algoverse-scheduler",
+                                                daemon=True)
+                self._thread.start()
+        self._watch(group)
+        return group.futures
+
+    def _round(self) -> int:
+        tracker = getConfirmationTracker(self.client)
+        if tracker.lastRound:
+            return tracker.lastRound
+        return self.client.status().get("last-round", 0)
+
+    def _decrease(self, round: int) -> None:
+        with self._condition:
+            if round > self._decreasedAt:
+                self._decreasedAt = round
+                self.window = max(self.minWindow, self.window / 2)
+
+    def _send(self, group: _Group, resend: bool = False) -> None:
+        """
+        Send until algod takes the group, retrying while it is overloaded and the group is valid
+
+        :param resend: the group was sent before, so algod already having it means it got through
+        """
+        attempt = 0
+        # a request that failed on the connection may still have reached algod
+        delivered = resend
+        while True:
+            try:
+                self.client.send_raw_transaction(base64.b64encode(group.body))
+                break
+            except Exception as e:
+                if delivered and _isAlreadySent(e):
+                    break
+                if not _isOverloaded(e):
+                    raise
+                if isinstance(e, RETRYABLE_ERRORS):
+                    delivered = True
+                round = self._round()
+                with self._condition:
+                    self.stats.overloaded += 1
+                self._decrease(round)
+                if round >= group.lastValid:
+                    raise
+            attempt += 1
+            time.sleep(min(self.backoff * 2 ** attempt, MAX_BACKOFF))
+        group.sentRound = getConfirmationTracker(self.client).lastRound
+
+    def _watch(self, group: _Group) -> None:
+        tracker = getConfirmationTracker(self.client)
+        watched = [tracker.watch(txID) for txID in group.txIDs]
+        remaining = [len(watched)]
+        lock = threading.Lock()
+
+        def done(_: "Future[PendingTxnResponse]") -> None:
+            with lock:
+                remaining[0] -= 1
+                if remaining[0] > 0:
+                    return
+            self._resolved(group, watched)
+
+        for future in watched:
+            future.add_done_callback(done)
+
+    def _resolved(self, group: _Group, watched: List["Future[PendingTxnResponse]"]) -> None:
+        errors = [future.exception() for future in watched if future.exception() is not None]
+        if not errors:
+            responses = [future.result() for future in watched]
+            confirmedRound = max(response.confirmedRound or 0 for response in responses)
+            late = group.sentRound and confirmedRound - group.sentRound > self.targetRounds
+            if late:
+                self._decrease(confirmedRound)
+            with self._condition:
+                if not late:
+                    self.window = min(self.maxWindow, self.window + self.increase * len(watched) / self.window)
+                self.stats.confirmed += len(watched)
+            self._finish(group, responses, None)
+            return
+
+        if getConfirmationTracker(self.client).lastRound > group.lastValid:
+            with self._condition:
+                self.stats.expired += len(watched)
+            self._finish(group, None, errors[0])
+            return
+
+        # the tracker lost it, e.g. on a network error or once it dropped out of the pool
+        with self._condition:
+            group.attempts += 1
+            group.retryAt = time.monotonic() + min(self.backoff * 2 ** group.attempts, MAX_BACKOFF)
+            self._condition.notify_all()
+
+    def _finish(self, group: _Group, responses: Optional[List[PendingTxnResponse]],
+                error: Optional[BaseException]) -> None:
+        with self._condition:
+            if group.finished:
+                return
+            group.finished = True
+            self.inFlight -= len(group.futures)
+            self._groups.remove(group)
+            self._condition.notify_all()
+        for i, future in enumerate(group.futures):
+            if error is None:
+                future.set_result(responses[i])
+            else:
+                future.set_exception(error)
+
+    def _resend(self, group: _Group, rewatch: bool) -> None:
+        try:
+            self._send(group, resend=True)
+        except Exception as e:
+            if not rewatch:
+                # the tracker still watches the group and reports how it ends, try again only
+                # after another resubmitRounds instead of on every tick
+                with self._condition:
+                    group.sentRound = getConfirmationTracker(self.client).lastRound
+                return
+            with self._condition:
+                if _isOverloaded(e):
+                    self.stats.expired += len(group.futures)
+                else:
+                    self.stats.failed += len(group.futures)
+            self._finish(group, None, e)
+            return
+        with self._condition:
+            self.stats.resubmitted += len(group.futures)
+        if rewatch:
+            self._watch(group)
+
+    def _follow(self, client: AlgodClient) -> None:
+        while True:
+            with self._condition:
+                if not self._groups:
+                    self._thread = None
+                    return
+                self._condition.wait(self.interval)
+                now = time.monotonic()
+                round = getConfirmationTracker(self.client).lastRound
+                for group in self._groups:
+                    # sent before the tracker knew the round
+                    if group.sentRound == 0:
+                        group.sentRound = round
+                retries = [group for group in self._groups if group.retryAt is not None and group.retryAt <= now]
+                stale = [group for group in self._groups if group.retryAt is None and group.sentRound and
+                         round - group.sentRound >= self.resubmitRounds and round <= group.lastValid]
+                for group in retries:
+                    group.retryAt = None
+
+            for group in retries:
+                self._resend(group, rewatch=True)
+            for group in stale:
+                # still unconfirmed, the node may have dropped it from its pool
+                self._resend(group, rewatch=False)
+
+
+_schedulers: "weakref.WeakKeyDictionary[AlgodClient, SubmissionScheduler]" = weakref.WeakKeyDictionary()
+_schedulersLock = threading.Lock()
+
+
+def getScheduler(client: AlgodClient) -> SubmissionScheduler:
+    with _schedulersLock:
+        scheduler = _schedulers.get(client)
+        if scheduler is None:
+            scheduler = SubmissionScheduler(client)
+            _schedulers[client] = scheduler
+        return scheduler
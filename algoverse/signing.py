@@ -0,0 +1,83 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, List, Optional, Sequence
+
+from algosdk.future import transaction
+
+from . import metrics
+from .account import Account
+
+# below this many transactions shipping them to worker processes costs more than it saves
+PARALLEL_THRESHOLD = 512
+CHUNK_SIZE = 256
+
+# accounts used by this worker process, so each key is decoded once per worker
+_workerAccounts: Dict[str, Account] = dict()
+
+_pool: Optional[ProcessPoolExecutor] = None
+_poolWorkers = 0
+_poolLock = threading.Lock()
+
+
+def _signChunk(privateKey: str, txns: List[transaction.Transaction]) -> List[bytes]:
+    account = _workerAccounts.get(privateKey)
+    if account is None:
+        account = Account(privateKey)
+        _workerAccounts[privateKey] = account
+    return [account.signature(txn) for txn in txns]
+
+
+def getSigningPool(processes: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Shared process pool for signing, recreated when a different number of processes is asked for.
+
+    Workers are spawned rather than forked: by the time a large batch is signed the tracker,
+    scheduler and transport threads are running, and a fork taken while one of them holds a
+    lock can deadlock the child. Like any spawned pool, scripts need an ``if __name__ == "__main__"``
+    guard.
+    """
+    global _pool, _poolWorkers
+    processes = processes or os.cpu_count() or 1
+    with _poolLock:
+        if _pool is None or _poolWorkers != processes:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+            _poolWorkers = processes
+        return _pool
+
+
+def shutdownSigningPool() -> None:
+    global _pool
+    with _poolLock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+def signTransactions(signer: Account, txns: Sequence[transaction.Transaction], processes: Optional[int] = None,
+                     chunkSize: int = CHUNK_SIZE) -> List[transaction.SignedTransaction]:
+    """
+    Sign all transactions with one account, in input order.
+
+    Large batches are split into chunks signed in a process pool, only the 64 byte signatures
+    travel back. Group ids must be assigned before signing.
+    """
+    with metrics.phase("sign"):
+        return _signAll(signer, txns, processes or os.cpu_count() or 1, chunkSize)
+
+
+def _signAll(signer: Account, txns: Sequence[transaction.Transaction], processes: int,
+             chunkSize: int) -> List[transaction.SignedTransaction]:
+    if processes == 1 or len(txns) < PARALLEL_THRESHOLD:
+        return [signer.sign(txn) for txn in txns]
+
+    chunks = [list(txns[start:start + chunkSize]) for start in range(0, len(txns), chunkSize)]
+    pool = getSigningPool(processes)
+    signed: List[transaction.SignedTransaction] = []
+    for chunk, signatures in zip(chunks, pool.map(_signChunk, repeat(signer.getPrivateKey()), chunks)):
+        signed.extend(signer.wrap(txn, signature) for txn, signature in zip(chunk, signatures))
+    return signed
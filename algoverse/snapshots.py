@@ -0,0 +1,148 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set
+
+from algosdk.v2client.indexer import IndexerClient
+
+from .assets import PresidentRegistry
+
+PAGE_SIZE = 1000
+
+_DONE = object()
+
+
+class Holding(NamedTuple):
+    asset_id: int
+    address: str
+    amount: int
+    # False when the account opted out or closed, incremental snapshots report these so the
+    # previous entry can be dropped
+    opted_in: bool
+    round: int
+
+
+def presidentAssets(presidents: PresidentRegistry) -> List[int]:
+    """Every registered base, silver, gold and diamond asset"""
+    return [asset_id for president in presidents for asset_id in president.tiers() if asset_id != 0]
+
+
+class HolderSnapshot:
+    """
+    Holders of a list of assets read from the indexer, as a stream of Holding records.
+
+    Assets are paged through by ``concurrency`` threads at once. At most ``buffer`` pages wait
+    for the consumer, so memory stays bounded no matter how many holders there are.
+
+    Without ``minRound`` every current holding is yielded. With it only holdings touched by an
+    asset transfer since that round are, with their balance as of now. After iterating,
+    ``round`` is the indexer round the snapshot is complete up to, the ``minRound`` for the
+    next incremental run.
+    """
+
+    def __init__(self, indexer: IndexerClient, assetIDs: Iterable[int], minRound: Optional[int] = None,
+                 pageSize: int = PAGE_SIZE, concurrency: int = 8, buffer: int = 16) -> None:
+        self.indexer = indexer
+        self.assetIDs = list(assetIDs)
+        self.minRound = minRound
+        self.pageSize = pageSize
+        self.concurrency = concurrency
+        self.buffer = buffer
+        self.round = 0
+        self._roundLock = threading.Lock()
+
+    def _seen(self, response: Dict[str, Any]) -> int:
+        currentRound = response.get("current-round", 0)
+        with self._roundLock:
+            # the snapshot is only complete up to the oldest page
+            self.round = currentRound if self.round == 0 else min(self.round, currentRound)
+        return currentRound
+
+    def _pages(self, fetch: Callable[[Optional[str]], Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        nextPage: Optional[str] = None
+        while True:
+            response = fetch(nextPage)
+            yield response
+            nextPage = response.get("next-token")
+            if not nextPage:
+                return
+
+    def _holders(self, assetID: int) -> Iterator[List[Holding]]:
+        for response in self._pages(lambda nextPage: self.indexer.asset_balances(
+                assetID, limit=self.pageSize, next_page=nextPage)):
+            currentRound = self._seen(response)
+            yield [Holding(assetID, balance["address"], balance["amount"], True, currentRound)
+                   for balance in response.get("balances", []) if not balance.get("deleted")]
+
+    def _changes(self, assetID: int) -> Iterator[List[Holding]]:
+        touched: Set[str] = set()
+        for response in self._pages(lambda nextPage: self.indexer.search_asset_transactions(
+                assetID, limit=self.pageSize, next_page=nextPage, min_round=self.minRound)):
+            self._seen(response)
+            for txn in response.get("transactions", []):
+                transfer = txn.get("asset-transfer-transaction")
+                if transfer is None:
+                    continue
+                # a clawback moves the asset out of transfer["sender"], not the txn sender
+                touched.update(address for address in (txn.get("sender"), transfer.get("sender"),
+                                                       transfer.get("receiver"), transfer.get("close-to"))
+                               if address)
+
+        page: List[Holding] = []
+        for address in sorted(touched):
+            response = self.indexer.lookup_account_assets(address, asset_id=assetID, include_all=True)
+            currentRound = self._seen(response)
+            holdings = [holding for holding in response.get("assets", []) if holding.get("asset-id") == assetID]
+            if holdings and not holdings[0].get("deleted"):
+                page.append(Holding(assetID, address, holdings[0]["amount"], True, currentRound))
+            else:
+                page.append(Holding(assetID, address, 0, False, currentRound))
+            if len(page) >= self.pageSize:
+                yield page
+                page = []
+        if page:
+            yield page
+
+    def __iter__(self) -> Iterator[Holding]:
+        pages: "queue.Queue[Any]" = queue.Queue(maxsize=self.buffer)
+        stop = threading.Event()
+        produce = self._holders if self.minRound is None else self._changes
+
+        def put(item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def work(assetID: int) -> None:
+            if stop.is_set():
+                return
+            try:
+                for page in produce(assetID):
+                    if not put(page):
+                        return
+            except Exception as e:
+                put(e)
+
+        def run() -> None:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                for assetID in self.assetIDs:
+                    executor.submit(work, assetID)
+            put(_DONE)
+
+        producer = threading.Thread(target=run, name="algoverse-snapshot", daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = pages.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield from item
+        finally:
+            # also reached when the consumer stops early, the workers exit at their next page
+            stop.set()
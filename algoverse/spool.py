@@ -0,0 +1,418 @@
+"""
+Pre-signed transactions, built while idle and sent without fetching params or signing.
+
+A ``Spool`` keeps signed groups for replace calls, opt-ins and asset transfers in a file:
+
+    spool = Spool(client, "replace.spool")
+    key = spool.addReplace(app_id, Replace(holder, base, silver, 2), copies=50)
+    ...
+    futures = spool.send([key] * 10)
+
+``send`` never raises for a single key: a group that could not be sent gets a future holding the
+error and goes back to the spool.
+
+Groups are valid for ``MAX_VALIDITY`` rounds. ``refresh``, or the thread started by ``start``,
+expires groups about to run out and builds them again for accounts this process added.
+"""
+import mmap
+import os
+import struct
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+import msgpack
+from algosdk.future import transaction
+from algosdk.v2client.algod import AlgodClient
+
+from .account import Account
+from .confirmation import PendingTxnResponse
+from .operations import BaseApp, Replace, unique_note
+from .params import MAX_VALIDITY, getSuggestedParams
+from .scheduler import _isAlreadySent, encodeGroup, getScheduler
+from .signing import signTransactions
+from .utils import getBalances
+
+MAGIC = b"AVSPOOL1"
+
+# payload size, state and last valid round of a record, followed by the msgpack payload
+_HEADER = struct.Struct(">IBQ")
+_STATE = 4
+
+READY = 0
+TAKEN = 1
+EXPIRED = 2
+
+# what a group is for, e.g. ("replace", app id, holder, base asset, higher asset, amount)
+Key = Tuple[Union[str, int], ...]
+
+
+def replaceKey(app_id: int, holder: str, base_asset_id: int, higher_asset_id: int, amount: int) -> Key:
+    return "replace", app_id, holder, base_asset_id, higher_asset_id, amount
+
+
+def optInKey(address: str, asset_id: int) -> Key:
+    return "opt-in", address, asset_id
+
+
+def transferKey(sender: str, receiver: str, asset_id: int, amount: int) -> Key:
+    return "transfer", sender, receiver, asset_id, amount
+
+
+def signerOf(key: Key) -> str:
+    return key[2] if key[0] == "replace" else key[1]
+
+
+class Entry(NamedTuple):
+    key: Key
+    txIDs: List[str]
+    lastValid: int
+    body: bytes
+
+
+class SpoolStats:
+    def __init__(self) -> None:
+        self.built = 0
+        self.taken = 0
+        self.missed = 0
+        self.expired = 0
+        self.rebuilt = 0
+
+    def asDict(self) -> Dict[str, int]:
+        return {
+            "built": self.built,
+            "taken": self.taken,
+            "missed": self.missed,
+            "expired": self.expired,
+            "rebuilt": self.rebuilt,
+        }
+
+
+class Spool:
+    """
+    Signed transaction groups in an append-only file read through mmap.
+
+    Every record is a small header with the state and last valid round and a msgpack payload
+    with the key, the txids and the encoded group exactly as algod takes it. Taking a group
+    flips its state byte in place, so a reopened spool never hands out a group twice. Private
+    keys are not written, groups of accounts not added in this process are sent but not rebuilt.
+
+    Groups are considered stale ``margin`` rounds before their last valid round.
+    """
+
+    def __init__(self, client: AlgodClient, path: str, margin: int = 10, validity: int = MAX_VALIDITY) -> None:
+        self.client = client
+        self.path = path
+        self.margin = margin
+        self.validity = validity
+        self.stats = SpoolStats()
+
+        self._accounts: Dict[str, Account] = dict()
+        self._ready: Dict[Key, Deque[Tuple[int, int]]] = dict()
+        self._stale: List[Key] = []
+        self._dead = 0
+        # bumped by compact, offsets taken before it are gone
+        self._compactions = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "wb") as f:
+                f.write(MAGIC)
+        self._file = open(path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise Exception(f"{path} is not a spool file")
+        self._scan()
+
+    # file
+
+    def _records(self) -> Iterable[Tuple[int, int, int, int]]:
+        """offset, state, last valid round and payload size of every record"""
+        offset = len(MAGIC)
+        while offset + _HEADER.size <= len(self._map):
+            size, state, lastValid = _HEADER.unpack_from(self._map, offset)
+            if offset + _HEADER.size + size > len(self._map):
+                # torn append, the rest is dropped by the next compact
+                break
+            yield offset, state, lastValid, size
+            offset += _HEADER.size + size
+
+    def _payload(self, offset: int, size: int) -> Dict[str, Any]:
+        start = offset + _HEADER.size
+        return msgpack.unpackb(self._map[start:start + size], raw=False)
+
+    def _scan(self) -> None:
+        self._ready = dict()
+        self._dead = 0
+        for offset, state, lastValid, size in self._records():
+            if state != READY:
+                self._dead += _HEADER.size + size
+                continue
+            key = tuple(self._payload(offset, size)["k"])
+            self._ready.setdefault(key, deque()).append((offset, lastValid))
+
+    def _append(self, entries: List[Entry]) -> None:
+        if not entries:
+            return
+        data = bytearray()
+        positions = []
+        end = len(self._map)
+        for entry in entries:
+            payload = msgpack.packb({"k": list(entry.key), "t": entry.txIDs, "b": entry.body}, use_bin_type=True)
+            positions.append((entry.key, end + len(data), entry.lastValid))
+            data += _HEADER.pack(len(payload), READY, entry.lastValid) + payload
+        self._file.seek(end)
+        self._file.write(data)
+        self._file.flush()
+        self._map.close()
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        for key, offset, lastValid in positions:
+            self._ready.setdefault(key, deque()).append((offset, lastValid))
+
+    def _mark(self, offset: int, state: int) -> None:
+        self._map[offset + _STATE] = state
+        self._dead += _HEADER.size + _HEADER.unpack_from(self._map, offset)[0]
+
+    def compact(self) -> None:
+        """Rewrite the file with only the groups still ready to send"""
+        with self._lock:
+            temporary = self.path + ".tmp"
+            with open(temporary, "wb") as f:
+                f.write(MAGIC)
+                for offset, state, _, size in self._records():
+                    if state == READY:
+                        f.write(self._map[offset:offset + _HEADER.size + size])
+            self._map.close()
+            self._file.close()
+            os.replace(temporary, self.path)
+            self._file = open(self.path, "r+b")
+            self._map = mmap.mmap(self._file.fileno(), 0)
+            self._scan()
+            self._compactions += 1
+
+    def close(self) -> None:
+        self.stop()
+        with self._lock:
+            self._map.flush()
+            self._map.close()
+            self._file.close()
+
+    # building
+
+    def _build(self, key: Key, params: transaction.SuggestedParams,
+               optedIn: Dict[str, set]) -> List[transaction.Transaction]:
+        kind = key[0]
+        if kind == "replace":
+            _, app_id, holder, base_asset_id, higher_asset_id, amount = key
+            account = self._accounts[holder]
+            call = BaseApp._replace_txn(params, account, app_id, base_asset_id, higher_asset_id, amount)
+            if higher_asset_id in optedIn[holder]:
+                return [call]
+            # same as BaseApp.send_asset, an opt-in of an opted in account is a no-op
+            return [BaseApp._opt_in_txn(getSuggestedParams(self.client, self.validity), account, higher_asset_id),
+                    call]
+        if kind == "opt-in":
+            _, address, asset_id = key
+            return [BaseApp._opt_in_txn(params, self._accounts[address], asset_id)]
+        if kind == "transfer":
+            _, sender, receiver, asset_id, amount = key
+            return [transaction.AssetTransferTxn(sender, params, receiver, amount, asset_id, note=unique_note())]
+        raise Exception(f"Unknown spool entry: {kind}")
+
+    def _buildAll(self, keys: List[Key]) -> List[Entry]:
+        """Build and sign one group per key, signing every account's transactions in one batch"""
+        holders = {key[2] for key in keys if key[0] == "replace"}
+        optedIn = {holder: set(getBalances(self.client, holder)) for holder in holders}
+
+        groups = []
+        for key in keys:
+            txns = self._build(key, getSuggestedParams(self.client, self.validity), optedIn)
+            if len(txns) > 1:
+                transaction.assign_group_id(txns)
+            groups.append(txns)
+
+        signed: Dict[int, transaction.SignedTransaction] = dict()
+        bySigner: Dict[str, List[transaction.Transaction]] = dict()
+        for txns in groups:
+            for txn in txns:
+                bySigner.setdefault(txn.sender, []).append(txn)
+        for sender, txns in bySigner.items():
+            for txn, signedTxn in zip(txns, signTransactions(self._accounts[sender], txns)):
+                signed[id(txn)] = signedTxn
+
+        entries = []
+        for key, txns in zip(keys, groups):
+            signedTxns = [signed[id(txn)] for txn in txns]
+            entries.append(Entry(key, [signedTxn.get_txid() for signedTxn in signedTxns],
+                                 min(txn.last_valid_round for txn in txns), encodeGroup(signedTxns)))
+        return entries
+
+    def add(self, account: Account, key: Key, copies: int = 1) -> Key:
+        """
+        Build, sign and store copies of the group for key, account signs all of its transactions
+
+        :return: key
+        """
+        self._accounts[account.getAddress()] = account
+        entries = self._buildAll([key] * copies)
+        with self._lock:
+            self._append(entries)
+            self.stats.built += len(entries)
+        return key
+
+    def addReplace(self, app_id: int, entry: Replace, copies: int = 1) -> Key:
+        """Replace calls of entry.holder, with an opt-in in front while the holder isn't opted in"""
+        entry = Replace(*entry)
+        key = replaceKey(app_id, entry.holder.getAddress(), entry.base_asset_id, entry.higher_asset_id, entry.amount)
+        return self.add(entry.holder, key, copies)
+
+    def addOptIn(self, account: Account, asset_id: int, copies: int = 1) -> Key:
+        return self.add(account, optInKey(account.getAddress(), asset_id), copies)
+
+    def addTransfer(self, sender: Account, receiver: str, asset_id: int, amount: int, copies: int = 1) -> Key:
+        return self.add(sender, transferKey(sender.getAddress(), receiver, asset_id, amount), copies)
+
+    # sending
+
+    def _round(self) -> int:
+        # the confirmation tracker only follows rounds while it watches transactions, a spool
+        # mostly sits idle
+        return self.client.status().get("last-round", 0)
+
+    def available(self, key: Key) -> int:
+        with self._lock:
+            return len(self._ready.get(key, ()))
+
+    def take(self, key: Key, round: Optional[int] = None) -> Optional[Entry]:
+        """
+        Take the oldest group for key still valid for ``margin`` rounds, stale ones on the way are
+        expired and queued for ``refresh``
+
+        :return: None when the spool has no group for key
+        """
+        taken = self._take(key, round)
+        return taken[2] if taken is not None else None
+
+    def _take(self, key: Key, round: Optional[int] = None) -> Optional[Tuple[int, int, Entry]]:
+        """
+        :return: the entry with its offset and the compaction count it is valid for
+        """
+        round = round if round is not None else self._round()
+        with self._lock:
+            ready = self._ready.get(key)
+            while ready:
+                offset, lastValid = ready.popleft()
+                if lastValid < round + self.margin:
+                    self._mark(offset, EXPIRED)
+                    self._stale.append(key)
+                    self.stats.expired += 1
+                    continue
+                self._mark(offset, TAKEN)
+                self.stats.taken += 1
+                payload = self._payload(offset, _HEADER.unpack_from(self._map, offset)[0])
+                return offset, self._compactions, Entry(key, payload["t"], lastValid, payload["b"])
+            self.stats.missed += 1
+            return None
+
+    def _putBack(self, entry: Entry, taken: Optional[Tuple[int, int, Entry]]) -> None:
+        """Return a group that was never sent to the front of its queue, or append it when it was built live"""
+        with self._lock:
+            if taken is not None:
+                self.stats.taken -= 1
+            if taken is None or taken[1] != self._compactions:
+                # compact dropped the taken record
+                self._append([entry])
+                return
+            offset = taken[0]
+            self._map[offset + _STATE] = READY
+            self._dead -= _HEADER.size + _HEADER.unpack_from(self._map, offset)[0]
+            self._ready.setdefault(entry.key, deque()).appendleft((offset, entry.lastValid))
+
+    def send(self, keys: Iterable[Key]) -> List["Future[PendingTxnResponse]"]:
+        """
+        Send a group per key and return the future of its last transaction, e.g. the replace call.
+
+        Besides one status call for the current round, the groups go out as stored through the
+        client's SubmissionScheduler, which paces them. A key the spool has run out of is built and
+        signed on the spot, if its account was added here.
+
+        A key that fails, e.g. because the spool has nothing for it or algod rejects the group, gets
+        a future holding the error and the remaining keys are still sent. Its group, if it has one,
+        goes back to the spool unless algod already has it.
+        """
+        round = self._round()
+        scheduler = getScheduler(self.client)
+        futures: List["Future[PendingTxnResponse]"] = []
+        for key in keys:
+            taken = None
+            entry = None
+            try:
+                taken = self._take(key, round)
+                if taken is not None:
+                    entry = taken[2]
+                elif signerOf(key) not in self._accounts:
+                    raise Exception(f"No spooled transactions for {key}")
+                else:
+                    entry = self._buildAll([key])[0]
+                futures.append(scheduler.submitEncoded(entry.body, entry.txIDs, entry.lastValid)[-1])
+            except Exception as e:
+                if entry is not None and not _isAlreadySent(e):
+                    self._putBack(entry, taken)
+                failed: "Future[PendingTxnResponse]" = Future()
+                failed.set_exception(e)
+                futures.append(failed)
+        return futures
+
+    # expiry
+
+    def refresh(self) -> int:
+        """
+        Expire every stale group and build it again when its account was added in this process,
+        compacting the file once most of it is dead
+
+        :return: number of groups built again
+        """
+        round = self._round()
+        with self._lock:
+            for key, ready in self._ready.items():
+                while ready and ready[0][1] < round + self.margin:
+                    self._mark(ready.popleft()[0], EXPIRED)
+                    self._stale.append(key)
+                    self.stats.expired += 1
+            stale = [key for key in self._stale if signerOf(key) in self._accounts]
+            self._stale = []
+            compact = self._dead > len(self._map) // 2
+
+        if compact:
+            self.compact()
+        rebuilt = self._buildAll(stale)
+        with self._lock:
+            self._append(rebuilt)
+            self.stats.rebuilt += len(rebuilt)
+        return len(rebuilt)
+
+    def start(self, interval: float = 30.0) -> "Spool":
+        """Refresh from a background thread every interval seconds"""
+        self._stopped.clear()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._follow, args=(interval,), name="algoverse-spool",
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _follow(self, interval: float) -> None:
+        while not self._stopped.wait(interval):
+            try:
+                self.refresh()
+            except Exception:
+                # e.g. algod unreachable, the next refresh tries again
+                continue
@@ -0,0 +1,130 @@
+import threading
+from base64 import b64decode
+from concurrent.futures import Future
+from typing import Dict, Union, List, Any, Optional
+
+from algosdk.v2client.algod import AlgodClient
+
+from .assets import President, PresidentRegistry, Upgrade
+from .confirmation import PendingTxnResponse
+from .utils import decodeState
+
+
+def decodeStateDelta(delta: List[Dict[str, Any]]) -> Dict[bytes, Optional[Union[int, bytes]]]:
+    """
+    :return: new value per key, None when the key was deleted
+    """
+    changes: Dict[bytes, Optional[Union[int, bytes]]] = dict()
+    for pair in delta:
+        key = b64decode(pair["key"])
+        value = pair["value"]
+        action = value["action"]
+
+        if action == 1:
+            changes[key] = b64decode(value.get("bytes", ""))
+        elif action == 2:
+            changes[key] = value.get("uint", 0)
+        elif action == 3:
+            changes[key] = None
+        else:
+            raise Exception(f"Unexpected delta action: {action}")
+    return changes
+
+
+class AppStateMirror:
+    """
+    Local copy of an AlgoVerse app's state.
+
+    ``load`` reads global state and the President boxes once; afterwards ``apply`` keeps the
+    copy current from the confirmed transactions' responses, so reads never hit algod.
+    """
+
+    def __init__(self, client: AlgodClient, appID: int) -> None:
+        self.client = client
+        self.appID = appID
+        self.round = 0
+        self.globalState: Dict[bytes, Union[int, bytes]] = dict()
+        self.localState: Dict[str, Dict[bytes, Union[int, bytes]]] = dict()
+        self.registry = PresidentRegistry()
+        self._lock = threading.Lock()
+
+    def load(self) -> "AppStateMirror":
+        round = self.client.status().get("last-round", 0)
+        appInfo = self.client.application_info(self.appID)
+        globalState = decodeState(appInfo["params"].get("global-state", []))
+
+        registry = PresidentRegistry()
+        for box in self.client.application_boxes(self.appID).get("boxes", []):
+            name = b64decode(box["name"])
+            if len(name) != 8:
+                continue
+            value = b64decode(self.client.application_box_by_name(self.appID, name)["value"])
+            registry.set(int.from_bytes(name, "big"), President.fromBytes(value))
+
+        with self._lock:
+            self.round = round
+            self.globalState = globalState
+            self.localState = dict()
+            self.registry = registry
+        return self
+
+    def apply(self, response: PendingTxnResponse) -> bool:
+        """
+        Apply the state changes of a confirmed transaction.
+
+        :return: False when the transaction is not a call to this app or is already part of the copy
+        """
+        txn = response.txn.get("txn", {})
+        if txn.get("type") != "appl" or txn.get("apid", response.applicationIndex) != self.appID:
+            return False
+        if response.confirmedRound is None or response.confirmedRound <= self.round:
+            return False
+
+        changes = decodeStateDelta(response.globalStateDelta or [])
+        counted = changes.get(b"asset_cnt")
+        with self._lock:
+            # callbacks of transactions confirmed in the same round may arrive in any order,
+            # the counter only ever grows
+            if isinstance(changes.get(b"asset_cnt"), int):
+                changes[b"asset_cnt"] = max(changes[b"asset_cnt"], self.globalState.get(b"asset_cnt", 0))
+            for key, value in changes.items():
+                if value is None:
+                    self.globalState.pop(key, None)
+                else:
+                    self.globalState[key] = value
+
+            for account in response.localStateDelta or []:
+                state = self.localState.setdefault(account["address"], dict())
+                for key, value in decodeStateDelta(account.get("delta", [])).items():
+                    if value is None:
+                        state.pop(key, None)
+                    else:
+                        state[key] = value
+
+            # box writes are not part of the response, but a setup call always stores its assets
+            # under the asset count it found and a retire call deletes the set it names
+            args = [b64decode(arg) for arg in txn.get("apaa", [])]
+            if args[:1] == [b"setup"] and isinstance(counted, int):
+                self.registry.set(counted - 1, President(*txn.get("apas", [])))
+            elif args[:1] == [b"retire"] and len(args) > 1:
+                self.registry.set(int.from_bytes(args[1], "big"), President())
+        return True
+
+    def watch(self, future: "Future[PendingTxnResponse]") -> None:
+        """Apply the transaction as soon as it is confirmed"""
+        future.add_done_callback(lambda done: done.exception() is None and self.apply(done.result()))
+
+    @property
+    def assetCount(self) -> int:
+        return self.globalState.get(b"asset_cnt", 0)
+
+    def presidents(self) -> Dict[int, President]:
+        with self._lock:
+            return dict(enumerate(self.registry))
+
+    def lookup(self, assetID: int) -> Optional[Upgrade]:
+        """
+        :return: set index, tier (0 is base and 3 is diamond), next tier asset and required amount
+        """
+        with self._lock:
+            return self.registry.lookup(assetID)
@@ -0,0 +1,859 @@
+"""
+In-process evaluator for the TEAL produced by AlgoVerse.
+
+Only the opcodes and transaction fields the AlgoVerse programs use are implemented. The
+program is parsed once, so a single ``Program`` can evaluate thousands of calls per second
+against a simulated ``Ledger`` without an algod node.
+"""
+import base64
+from typing import Dict, List, Any, Optional, Tuple, Union
+
+from algosdk import encoding
+from algosdk.logic import get_application_address
+
+from ..contracts import AlgoVerse
+from ..operations import ACCOUNT_MIN_BALANCE, ASSET_MIN_BALANCE, box_min_balance
+from ..utils import compileContract
+
+MIN_TXN_FEE = 1_000
+MAX_COST = 700
+
+TxnValue = Union[int, bytes]
+
+NAMED_INTS = {
+    "NoOp": 0, "OptIn": 1, "CloseOut": 2, "ClearState": 3, "UpdateApplication": 4, "DeleteApplication": 5,
+    "unknown": 0, "pay": 1, "keyreg": 2, "acfg": 3, "axfer": 4, "afrz": 5, "appl": 6,
+}
+
+
+class EvalError(Exception):
+    pass
+
+
+class Ledger:
+    """Simulated state of a single application and the accounts and assets it touches"""
+
+    def __init__(self, appId: int = 1, creator: Optional[str] = None) -> None:
+        self.appId = appId
+        self.appAddress = get_application_address(appId)
+        self.creator = creator
+        self.globalState: Dict[bytes, TxnValue] = dict()
+        self.boxes: Dict[bytes, bytes] = dict()
+        # (address, asset id) -> amount, an entry means the account is opted in
+        self.holdings: Dict[Tuple[str, int], int] = dict()
+        self.clawbacks: Dict[int, str] = dict()
+        self.balances: Dict[str, int] = dict()
+
+    def createAsset(self, assetId: int, creator: str, total: int, clawback: Optional[str] = None) -> None:
+        self.holdings[(creator, assetId)] = total
+        self.clawbacks[assetId] = clawback if clawback is not None else self.appAddress
+
+    def optIn(self, address: str, assetId: int) -> None:
+        self.holdings.setdefault((address, assetId), 0)
+
+    def commit(self, result: "EvalResult") -> None:
+        if not result.passed:
+            raise EvalError(f"cannot commit a failed evaluation: {result.error}")
+        for key, value in result.globalDelta.items():
+            if value is None:
+                self.globalState.pop(key, None)
+            else:
+                self.globalState[key] = value
+        for key, box in result.boxDelta.items():
+            if box is None:
+                self.boxes.pop(key, None)
+            else:
+                self.boxes[key] = box
+        for holding, amount in result.holdingDelta.items():
+            if amount is None:
+                self.holdings.pop(holding, None)
+            else:
+                self.holdings[holding] = amount
+        for address, amount in result.balanceDelta.items():
+            self.balances[address] = amount
+
+
+class AppCall:
+    def __init__(self, sender: str, appArgs: Optional[List[bytes]] = None, assets: Optional[List[int]] = None,
+                 accounts: Optional[List[str]] = None, boxes: Optional[List[bytes]] = None,
+                 onCompletion: int = 0, fee: int = MIN_TXN_FEE, appId: Optional[int] = None) -> None:
+        self.sender = sender
+        self.appArgs = appArgs or []
+        self.assets = assets or []
+        self.accounts = accounts or []
+        # None disables the box reference check
+        self.boxes = boxes
+        self.onCompletion = onCompletion
+        self.fee = fee
+        self.appId = appId
+
+
+class EvalResult:
+    def __init__(self) -> None:
+        self.passed = False
+        self.error: Optional[str] = None
+        self.cost = 0
+        # opcodes executed under each label of the program
+        self.branchCost: Dict[str, int] = dict()
+        self.globalDelta: Dict[bytes, Optional[TxnValue]] = dict()
+        self.boxDelta: Dict[bytes, Optional[bytes]] = dict()
+        self.holdingDelta: Dict[Tuple[str, int], Optional[int]] = dict()
+        self.balanceDelta: Dict[str, int] = dict()
+        self.innerTxns: List[Dict[str, Any]] = []
+        self.logs: List[bytes] = []
+
+
+def _parseBytes(literal: str) -> bytes:
+    if literal.startswith('"'):
+        return literal[1:-1].encode().decode("unicode_escape").encode("latin-1")
+    if literal.startswith("0x"):
+        return bytes.fromhex(literal[2:])
+    if literal.startswith("base64(") or literal.startswith("b64("):
+        return base64.b64decode(literal[literal.index("(") + 1:-1])
+    if literal in ("base64", "b64"):
+        raise EvalError("unsupported byte literal")
+    return base64.b64decode(literal)
+
+
+def _parseInt(literal: str) -> int:
+    if literal in NAMED_INTS:
+        return NAMED_INTS[literal]
+    return int(literal, 0)
+
+
+class Program:
+    def __init__(self, teal: str) -> None:
+        self.ops: List[Tuple[str, Tuple[Any, ...]]] = []
+        self.labels: Dict[str, int] = dict()
+        self.blocks: List[str] = []
+
+        block = "main"
+        for line in teal.splitlines():
+            line = line.strip()
+            if not line or line.startswith("//") or line.startswith("#pragma"):
+                continue
+            if line.endswith(":"):
+                block = line[:-1]
+                self.labels[block] = len(self.ops)
+                continue
+
+            opcode, _, rest = line.partition(" ")
+            rest = rest.strip()
+            if opcode in ("int", "pushint"):
+                args: Tuple[Any, ...] = (_parseInt(rest),)
+            elif opcode in ("byte", "pushbytes"):
+                if rest.startswith("base64 ") or rest.startswith("b64 "):
+                    args = (base64.b64decode(rest.split(" ", 1)[1]),)
+                else:
+                    args = (_parseBytes(rest),)
+            else:
+                args = tuple(int(arg) if arg.lstrip("-").isdigit() else arg for arg in rest.split())
+            self.ops.append((opcode, args))
+            self.blocks.append(block)
+
+    @classmethod
+    def approval(cls) -> "Program":
+        return cls(compileContract(AlgoVerse().approval_program()))
+
+    @classmethod
+    def clear(cls) -> "Program":
+        return cls(compileContract(AlgoVerse().clear_program()))
+
+    def evaluate(self, ledger: Ledger, call: AppCall, maxCost: int = MAX_COST) -> EvalResult:
+        return _Evaluation(self, ledger, call, maxCost).run()
+
+
+class _Evaluation:
+    def __init__(self, program: Program, ledger: Ledger, call: AppCall, maxCost: int) -> None:
+        self.program = program
+        self.ledger = ledger
+        self.call = call
+        self.maxCost = maxCost
+        self.appId = call.appId if call.appId is not None else ledger.appId
+        self.result = EvalResult()
+        self.stack: List[TxnValue] = []
+        self.scratch: List[TxnValue] = [0] * 256
+        # return pc, stack height at callsub, and the arguments and return values declared by proto
+        self.frames: List[Tuple[int, int, Optional[Tuple[int, int]]]] = []
+        self.pc = 0
+        self.inner: Optional[Dict[str, Any]] = None
+        self.feeCredit = call.fee - MIN_TXN_FEE
+        self.senderBytes = encoding.decode_address(call.sender)
+        self.appAddress = ledger.appAddress if self.appId == ledger.appId else get_application_address(self.appId)
+        self.appAddressBytes = encoding.decode_address(self.appAddress)
+
+    # state access goes through the deltas so a failed call leaves the ledger untouched
+
+    def _global(self, key: bytes) -> Optional[TxnValue]:
+        if key in self.result.globalDelta:
+            return self.result.globalDelta[key]
+        return self.ledger.globalState.get(key)
+
+    def _box(self, key: bytes) -> Optional[bytes]:
+        if self.call.boxes is not None and key not in self.call.boxes:
+            raise EvalError(f"box {key!r} is not referenced")
+        if key in self.result.boxDelta:
+            return self.result.boxDelta[key]
+        return self.ledger.boxes.get(key)
+
+    def _holding(self, address: str, assetId: int) -> Optional[int]:
+        if (address, assetId) in self.result.holdingDelta:
+            return self.result.holdingDelta[(address, assetId)]
+        return self.ledger.holdings.get((address, assetId))
+
+    def _holdings(self) -> List[Tuple[Tuple[str, int], Optional[int]]]:
+        merged: Dict[Tuple[str, int], Optional[int]] = dict(self.ledger.holdings)
+        merged.update(self.result.holdingDelta)
+        return list(merged.items())
+
+    def _minBalance(self, address: str) -> int:
+        minBalance = ACCOUNT_MIN_BALANCE
+        minBalance += ASSET_MIN_BALANCE * sum(1 for (holder, _), amount in self._holdings()
+                                              if holder == address and amount is not None)
+        if address == self.appAddress:
+            boxes = dict(self.ledger.boxes)
+            boxes.update(self.result.boxDelta)
+            minBalance += sum(box_min_balance(len(key), len(value)) for key, value in boxes.items()
+                              if value is not None)
+        return minBalance
+
+    def _balance(self, address: str) -> int:
+        if address in self.result.balanceDelta:
+            return self.result.balanceDelta[address]
+        return self.ledger.balances.get(address, 0)
+
+    def _txnField(self, field: str, index: Optional[int] = None) -> TxnValue:
+        call = self.call
+        if field == "Sender":
+            return self.senderBytes
+        if field == "ApplicationID":
+            return self.appId
+        if field == "OnCompletion":
+            return call.onCompletion
+        if field == "TypeEnum":
+            return NAMED_INTS["appl"]
+        if field == "Fee":
+            return call.fee
+        if field == "GroupIndex":
+            return 0
+        if field == "NumAppArgs":
+            return len(call.appArgs)
+        if field == "NumAssets":
+            return len(call.assets)
+        if field == "NumAccounts":
+            return len(call.accounts)
+        if field == "ApplicationArgs":
+            return self._index(call.appArgs, index, field)
+        if field == "Assets":
+            return self._index(call.assets, index, field)
+        if field == "Accounts":
+            if index == 0:
+                return self.senderBytes
+            return encoding.decode_address(self._index(call.accounts, index - 1, field))
+        raise EvalError(f"unsupported txn field {field}")
+
+    @staticmethod
+    def _index(values: List[Any], index: Optional[int], field: str) -> Any:
+        if index is None or index < 0 or index >= len(values):
+            raise EvalError(f"{field} index {index} out of range")
+        return values[index]
+
+    def _globalField(self, field: str) -> TxnValue:
+        if field == "CurrentApplicationAddress":
+            return self.appAddressBytes
+        if field == "CurrentApplicationID":
+            return self.appId
+        if field == "CreatorAddress":
+            if self.appId == 0:
+                return self.senderBytes
+            if self.ledger.creator is None:
+                raise EvalError("ledger has no creator")
+            return encoding.decode_address(self.ledger.creator)
+        if field == "MinTxnFee":
+            return MIN_TXN_FEE
+        if field == "MinBalance":
+            return ACCOUNT_MIN_BALANCE
+        if field == "GroupSize":
+            return 1
+        if field == "ZeroAddress":
+            return bytes(32)
+        if field in ("Round", "LatestTimestamp"):
+            return 0
+        raise EvalError(f"unsupported global field {field}")
+
+    def _pop(self) -> TxnValue:
+        if not self.stack:
+            raise EvalError("stack underflow")
+        return self.stack.pop()
+
+    def _popInt(self) -> int:
+        value = self._pop()
+        if not isinstance(value, int):
+            raise EvalError("expected uint64")
+        return value
+
+    def _popBytes(self) -> bytes:
+        value = self._pop()
+        if not isinstance(value, bytes):
+            raise EvalError("expected bytes")
+        return value
+
+    def _check(self, value: int) -> int:
+        if value < 0 or value >= 1 << 64:
+            raise EvalError("uint64 overflow")
+        return value
+
+    def run(self) -> EvalResult:
+        result = self.result
+        try:
+            passed = self._loop()
+            if passed:
+                result.passed = True
+            else:
+                result.error = "rejected"
+        except EvalError as e:
+            result.error = str(e)
+
+        if not result.passed:
+            result.globalDelta.clear()
+            result.boxDelta.clear()
+            result.holdingDelta.clear()
+            result.balanceDelta.clear()
+            result.innerTxns.clear()
+        return result
+
+    def _loop(self) -> bool:
+        ops = self.program.ops
+        blocks = self.program.blocks
+        branchCost = self.result.branchCost
+        while self.pc < len(ops):
+            opcode, args = ops[self.pc]
+            block = blocks[self.pc]
+            branchCost[block] = branchCost.get(block, 0) + 1
+            self.result.cost += 1
+            if self.result.cost > self.maxCost:
+                raise EvalError("dynamic cost budget exceeded")
+            self.pc += 1
+
+            handler = _HANDLERS.get(opcode)
+            if handler is None:
+                raise EvalError(f"unsupported opcode {opcode}")
+            done = handler(self, *args)
+            if done is not None:
+                return done
+
+        if len(self.stack) != 1:
+            raise EvalError("stack must contain exactly one value at the end")
+        value = self.stack[0]
+        return isinstance(value, int) and value != 0
+
+    def _jump(self, label: str) -> None:
+        self.pc = self.program.labels[label]
+
+    # inner transactions
+
+    def _submitInner(self) -> None:
+        fields = self.inner
+        if fields is None:
+            raise EvalError("itxn_submit without itxn_begin")
+        self.inner = None
+
+        appAddress = self.appAddress
+        fee = fields.get("Fee")
+        if fee is None or fee > 0:
+            fee = MIN_TXN_FEE if fee is None else fee
+            self.result.balanceDelta[appAddress] = self._balance(appAddress) - fee
+        else:
+            self.feeCredit -= MIN_TXN_FEE
+            if self.feeCredit < 0:
+                raise EvalError("fee too small to cover pooled inner transactions")
+
+        typeEnum = fields.get("TypeEnum")
+        if typeEnum == NAMED_INTS["axfer"]:
+            self._assetTransfer(appAddress, fields)
+        elif typeEnum == NAMED_INTS["pay"]:
+            self._payment(appAddress, fields)
+        else:
+            raise EvalError(f"unsupported inner transaction type {typeEnum}")
+        self.result.innerTxns.append(fields)
+
+    def _assetTransfer(self, appAddress: str, fields: Dict[str, Any]) -> None:
+        assetId = fields.get("XferAsset", 0)
+        amount = fields.get("AssetAmount", 0)
+        receiver = _encodeAddress(fields.get("AssetReceiver", bytes(32)))
+        closeTo = fields.get("AssetCloseTo")
+
+        if "AssetSender" in fields:
+            source = _encodeAddress(fields["AssetSender"])
+            if self.ledger.clawbacks.get(assetId) != appAddress:
+                raise EvalError(f"app is not the clawback of asset {assetId}")
+        else:
+            source = appAddress
+
+        if source == receiver and amount == 0 and "AssetSender" not in fields:
+            if self._holding(source, assetId) is None:
+                self.result.holdingDelta[(source, assetId)] = 0
+            return
+
+        sourceAmount = self._holding(source, assetId)
+        receiverAmount = self._holding(receiver, assetId)
+        if sourceAmount is None:
+            raise EvalError(f"{source} is not opted in to asset {assetId}")
+        if receiverAmount is None:
+            raise EvalError(f"{receiver} is not opted in to asset {assetId}")
+        if sourceAmount < amount:
+            raise EvalError(f"underflow on asset {assetId}")
+        self.result.holdingDelta[(source, assetId)] = sourceAmount - amount
+        self.result.holdingDelta[(receiver, assetId)] = receiverAmount + amount
+
+        if closeTo is not None:
+            closeAddress = _encodeAddress(closeTo)
+            closeAmount = self._holding(closeAddress, assetId)
+            if closeAmount is None:
+                raise EvalError(f"{closeAddress} is not opted in to asset {assetId}")
+            remaining = self.result.holdingDelta[(source, assetId)]
+            self.result.holdingDelta[(closeAddress, assetId)] = closeAmount + remaining
+            self.result.holdingDelta[(source, assetId)] = None
+
+    def _payment(self, appAddress: str, fields: Dict[str, Any]) -> None:
+        amount = fields.get("Amount", 0)
+        receiver = _encodeAddress(fields.get("Receiver", bytes(32)))
+        balance = self._balance(appAddress)
+        if balance < amount:
+            raise EvalError("overspend")
+        self.result.balanceDelta[appAddress] = balance - amount
+        self.result.balanceDelta[receiver] = self._balance(receiver) + amount
+        if "CloseRemainderTo" in fields:
+            if any(holder == appAddress and amount is not None for (holder, _), amount in self._holdings()):
+                raise EvalError(f"cannot close account {appAddress} while it holds assets")
+            closeTo = _encodeAddress(fields["CloseRemainderTo"])
+            self.result.balanceDelta[closeTo] = self._balance(closeTo) + balance - amount
+            self.result.balanceDelta[appAddress] = 0
+
+
+_addresses: Dict[bytes, str] = dict()
+
+
+def _encodeAddress(address: bytes) -> str:
+    # the same few addresses come back on every call, skip recomputing their checksum
+    encoded = _addresses.get(address)
+    if encoded is None:
+        encoded = encoding.encode_address(address)
+        if len(_addresses) < 4096:
+            _addresses[address] = encoded
+    return encoded
+
+
+def _binary(op):
+    def handler(ev: _Evaluation) -> None:
+        b = ev._popInt()
+        a = ev._popInt()
+        ev.stack.append(op(a, b))
+    return handler
+
+
+def _op_int(ev: _Evaluation, value: int) -> None:
+    ev.stack.append(value)
+
+
+def _op_bytes(ev: _Evaluation, value: bytes) -> None:
+    ev.stack.append(value)
+
+
+def _op_add(ev: _Evaluation) -> None:
+    b = ev._popInt()
+    a = ev._popInt()
+    ev.stack.append(ev._check(a + b))
+
+
+def _op_sub(ev: _Evaluation) -> None:
+    b = ev._popInt()
+    a = ev._popInt()
+    ev.stack.append(ev._check(a - b))
+
+
+def _op_mul(ev: _Evaluation) -> None:
+    b = ev._popInt()
+    a = ev._popInt()
+    ev.stack.append(ev._check(a * b))
+
+
+def _op_div(ev: _Evaluation) -> None:
+    b = ev._popInt()
+    a = ev._popInt()
+    if b == 0:
+        raise EvalError("division by zero")
+    ev.stack.append(a // b)
+
+
+def _op_mod(ev: _Evaluation) -> None:
+    b = ev._popInt()
+    a = ev._popInt()
+    if b == 0:
+        raise EvalError("modulo by zero")
+    ev.stack.append(a % b)
+
+
+def _op_eq(ev: _Evaluation) -> None:
+    b = ev._pop()
+    a = ev._pop()
+    if type(a) != type(b):
+        raise EvalError("== on mismatched types")
+    ev.stack.append(int(a == b))
+
+
+def _op_neq(ev: _Evaluation) -> None:
+    b = ev._pop()
+    a = ev._pop()
+    if type(a) != type(b):
+        raise EvalError("!= on mismatched types")
+    ev.stack.append(int(a != b))
+
+
+def _op_not(ev: _Evaluation) -> None:
+    ev.stack.append(int(ev._popInt() == 0))
+
+
+def _op_itob(ev: _Evaluation) -> None:
+    ev.stack.append(ev._popInt().to_bytes(8, "big"))
+
+
+def _op_btoi(ev: _Evaluation) -> None:
+    value = ev._popBytes()
+    if len(value) > 8:
+        raise EvalError("btoi arg too long")
+    ev.stack.append(int.from_bytes(value, "big"))
+
+
+def _op_concat(ev: _Evaluation) -> None:
+    b = ev._popBytes()
+    a = ev._popBytes()
+    if len(a) + len(b) > 4096:
+        raise EvalError("concat produced a too big byte array")
+    ev.stack.append(a + b)
+
+
+def _op_len(ev: _Evaluation) -> None:
+    ev.stack.append(len(ev._popBytes()))
+
+
+def _slice(value: bytes, start: int, end: int) -> bytes:
+    if start > end or end > len(value):
+        raise EvalError("substring range beyond length of string")
+    return value[start:end]
+
+
+def _op_substring(ev: _Evaluation, start: int, end: int) -> None:
+    ev.stack.append(_slice(ev._popBytes(), start, end))
+
+
+def _op_substring3(ev: _Evaluation) -> None:
+    end = ev._popInt()
+    start = ev._popInt()
+    ev.stack.append(_slice(ev._popBytes(), start, end))
+
+
+def _op_extract(ev: _Evaluation, start: int, length: int) -> None:
+    value = ev._popBytes()
+    ev.stack.append(_slice(value, start, len(value) if length == 0 else start + length))
+
+
+def _op_extract3(ev: _Evaluation) -> None:
+    length = ev._popInt()
+    start = ev._popInt()
+    ev.stack.append(_slice(ev._popBytes(), start, start + length))
+
+
+def _op_extract_uint64(ev: _Evaluation) -> None:
+    start = ev._popInt()
+    ev.stack.append(int.from_bytes(_slice(ev._popBytes(), start, start + 8), "big"))
+
+
+def _op_b(ev: _Evaluation, label: str) -> None:
+    ev._jump(label)
+
+
+def _op_bz(ev: _Evaluation, label: str) -> None:
+    if ev._popInt() == 0:
+        ev._jump(label)
+
+
+def _op_bnz(ev: _Evaluation, label: str) -> None:
+    if ev._popInt() != 0:
+        ev._jump(label)
+
+
+def _op_callsub(ev: _Evaluation, label: str) -> None:
+    ev.frames.append((ev.pc, len(ev.stack), None))
+    ev._jump(label)
+
+
+def _op_retsub(ev: _Evaluation) -> None:
+    if not ev.frames:
+        raise EvalError("retsub with empty callstack")
+    returnPc, height, proto = ev.frames.pop()
+    if proto is not None:
+        # proto frames drop their arguments and keep the declared return values
+        args, returns = proto
+        values = ev.stack[len(ev.stack) - returns:] if returns else []
+        del ev.stack[height - args:]
+        ev.stack.extend(values)
+    ev.pc = returnPc
+
+
+def _op_proto(ev: _Evaluation, args: int, returns: int) -> None:
+    returnPc, height, _ = ev.frames.pop()
+    if height < args:
+        raise EvalError("proto with too few arguments on the stack")
+    # frame offsets stay relative to the height at callsub, frame_dig -1 is the last argument
+    ev.frames.append((returnPc, height, (args, returns)))
+
+
+def _op_frame_dig(ev: _Evaluation, offset: int) -> None:
+    ev.stack.append(ev.stack[ev.frames[-1][1] + offset])
+
+
+def _op_frame_bury(ev: _Evaluation, offset: int) -> None:
+    value = ev._pop()
+    ev.stack[ev.frames[-1][1] + offset] = value
+
+
+def _op_return(ev: _Evaluation) -> bool:
+    value = ev._pop()
+    return isinstance(value, int) and value != 0
+
+
+def _op_err(ev: _Evaluation) -> None:
+    raise EvalError(f"err opcode executed at {ev.program.blocks[ev.pc - 1]}")
+
+
+def _op_assert(ev: _Evaluation) -> None:
+    if ev._popInt() == 0:
+        raise EvalError(f"assert failed at {ev.program.blocks[ev.pc - 1]}")
+
+
+def _op_pop(ev: _Evaluation) -> None:
+    ev._pop()
+
+
+def _op_dup(ev: _Evaluation) -> None:
+    value = ev._pop()
+    ev.stack.extend((value, value))
+
+
+def _op_dup2(ev: _Evaluation) -> None:
+    ev.stack.extend(ev.stack[-2:])
+
+
+def _op_swap(ev: _Evaluation) -> None:
+    ev.stack[-1], ev.stack[-2] = ev.stack[-2], ev.stack[-1]
+
+
+def _op_select(ev: _Evaluation) -> None:
+    condition = ev._popInt()
+    b = ev._pop()
+    a = ev._pop()
+    ev.stack.append(b if condition else a)
+
+
+def _op_dig(ev: _Evaluation, depth: int) -> None:
+    ev.stack.append(ev.stack[-1 - depth])
+
+
+def _op_cover(ev: _Evaluation, depth: int) -> None:
+    ev.stack.insert(len(ev.stack) - 1 - depth, ev._pop())
+
+
+def _op_uncover(ev: _Evaluation, depth: int) -> None:
+    ev.stack.append(ev.stack.pop(-1 - depth))
+
+
+def _op_bury(ev: _Evaluation, depth: int) -> None:
+    value = ev._pop()
+    ev.stack[-depth] = value
+
+
+def _op_store(ev: _Evaluation, slot: int) -> None:
+    ev.scratch[slot] = ev._pop()
+
+
+def _op_load(ev: _Evaluation, slot: int) -> None:
+    ev.stack.append(ev.scratch[slot])
+
+
+def _op_txn(ev: _Evaluation, field: str, index: Optional[int] = None) -> None:
+    ev.stack.append(ev._txnField(field, index))
+
+
+def _op_txnas(ev: _Evaluation, field: str) -> None:
+    ev.stack.append(ev._txnField(field, ev._popInt()))
+
+
+def _op_global(ev: _Evaluation, field: str) -> None:
+    ev.stack.append(ev._globalField(field))
+
+
+def _op_app_global_get(ev: _Evaluation) -> None:
+    value = ev._global(ev._popBytes())
+    ev.stack.append(0 if value is None else value)
+
+
+def _op_app_global_get_ex(ev: _Evaluation) -> None:
+    key = ev._popBytes()
+    app = ev._popInt()
+    if app not in (0, ev.appId):
+        raise EvalError("foreign apps are not simulated")
+    value = ev._global(key)
+    ev.stack.extend((0, 0) if value is None else (value, 1))
+
+
+def _op_app_global_put(ev: _Evaluation) -> None:
+    value = ev._pop()
+    key = ev._popBytes()
+    ev.result.globalDelta[key] = value
+
+
+def _op_app_global_del(ev: _Evaluation) -> None:
+    ev.result.globalDelta[ev._popBytes()] = None
+
+
+def _op_box_create(ev: _Evaluation) -> None:
+    size = ev._popInt()
+    key = ev._popBytes()
+    existing = ev._box(key)
+    if existing is not None:
+        if len(existing) != size:
+            raise EvalError("box_create with a different size")
+        ev.stack.append(0)
+        return
+    ev.result.boxDelta[key] = bytes(size)
+    ev.stack.append(1)
+
+
+def _op_box_put(ev: _Evaluation) -> None:
+    value = ev._popBytes()
+    key = ev._popBytes()
+    existing = ev._box(key)
+    if existing is not None and len(existing) != len(value):
+        raise EvalError("box_put wrong size")
+    ev.result.boxDelta[key] = value
+
+
+def _op_box_get(ev: _Evaluation) -> None:
+    value = ev._box(ev._popBytes())
+    ev.stack.extend((b"", 0) if value is None else (value, 1))
+
+
+def _op_box_len(ev: _Evaluation) -> None:
+    value = ev._box(ev._popBytes())
+    ev.stack.extend((0, 0) if value is None else (len(value), 1))
+
+
+def _op_box_extract(ev: _Evaluation) -> None:
+    length = ev._popInt()
+    start = ev._popInt()
+    value = ev._box(ev._popBytes())
+    if value is None:
+        raise EvalError("no such box")
+    ev.stack.append(_slice(value, start, start + length))
+
+
+def _op_box_replace(ev: _Evaluation) -> None:
+    replacement = ev._popBytes()
+    start = ev._popInt()
+    key = ev._popBytes()
+    value = ev._box(key)
+    if value is None:
+        raise EvalError("no such box")
+    _slice(value, start, start + len(replacement))
+    ev.result.boxDelta[key] = value[:start] + replacement + value[start + len(replacement):]
+
+
+def _op_box_del(ev: _Evaluation) -> None:
+    key = ev._popBytes()
+    existed = ev._box(key) is not None
+    ev.result.boxDelta[key] = None
+    ev.stack.append(int(existed))
+
+
+def _account(ev: _Evaluation) -> str:
+    # an address or an index into the accounts array
+    account = ev._pop()
+    if isinstance(account, int):
+        account = ev._txnField("Accounts", account)
+    return _encodeAddress(account)
+
+
+def _op_balance(ev: _Evaluation) -> None:
+    ev.stack.append(ev._balance(_account(ev)))
+
+
+def _op_min_balance(ev: _Evaluation) -> None:
+    ev.stack.append(ev._minBalance(_account(ev)))
+
+
+def _op_asset_holding_get(ev: _Evaluation, field: str) -> None:
+    assetId = ev._popInt()
+    address = _encodeAddress(ev._popBytes())
+    amount = ev._holding(address, assetId)
+    if field == "AssetBalance":
+        ev.stack.extend((0, 0) if amount is None else (amount, 1))
+    elif field == "AssetOptedIn":
+        ev.stack.extend((0, 0) if amount is None else (1, 1))
+    else:
+        raise EvalError(f"unsupported asset holding field {field}")
+
+
+def _op_itxn_begin(ev: _Evaluation) -> None:
+    if ev.inner is not None:
+        raise EvalError("itxn_begin without itxn_submit")
+    ev.inner = dict()
+
+
+def _op_itxn_field(ev: _Evaluation, field: str) -> None:
+    if ev.inner is None:
+        raise EvalError("itxn_field without itxn_begin")
+    ev.inner[field] = ev._pop()
+
+
+def _op_itxn_next(ev: _Evaluation) -> None:
+    ev._submitInner()
+    ev.inner = dict()
+
+
+def _op_itxn_submit(ev: _Evaluation) -> None:
+    ev._submitInner()
+
+
+def _op_log(ev: _Evaluation) -> None:
+    ev.result.logs.append(ev._popBytes())
+
+
+_HANDLERS = {
+    "int": _op_int, "pushint": _op_int,
+    "byte": _op_bytes, "pushbytes": _op_bytes,
+    "+": _op_add, "-": _op_sub, "*": _op_mul, "/": _op_div, "%": _op_mod,
+    "<": _binary(lambda a, b: int(a < b)), ">": _binary(lambda a, b: int(a > b)),
+    "<=": _binary(lambda a, b: int(a <= b)), ">=": _binary(lambda a, b: int(a >= b)),
+    "&&": _binary(lambda a, b: int(a != 0 and b != 0)), "||": _binary(lambda a, b: int(a != 0 or b != 0)),
+    "&": _binary(lambda a, b: a & b), "|": _binary(lambda a, b: a | b), "^": _binary(lambda a, b: a ^ b),
+    "==": _op_eq, "!=": _op_neq, "!": _op_not,
+    "itob": _op_itob, "btoi": _op_btoi, "concat": _op_concat, "len": _op_len,
+    "substring": _op_substring, "substring3": _op_substring3,
+    "extract": _op_extract, "extract3": _op_extract3, "extract_uint64": _op_extract_uint64,
+    "b": _op_b, "bz": _op_bz, "bnz": _op_bnz, "callsub": _op_callsub, "retsub": _op_retsub,
+    "proto": _op_proto, "frame_dig": _op_frame_dig, "frame_bury": _op_frame_bury,
+    "return": _op_return, "err": _op_err, "assert": _op_assert,
+    "pop": _op_pop, "dup": _op_dup, "dup2": _op_dup2, "swap": _op_swap, "select": _op_select,
+    "dig": _op_dig, "cover": _op_cover, "uncover": _op_uncover, "bury": _op_bury,
+    "store": _op_store, "load": _op_load,
+    "txn": _op_txn, "txna": _op_txn, "txnas": _op_txnas, "global": _op_global,
+    "app_global_get": _op_app_global_get, "app_global_get_ex": _op_app_global_get_ex,
+    "app_global_put": _op_app_global_put, "app_global_del": _op_app_global_del,
+    "box_create": _op_box_create, "box_put": _op_box_put, "box_get": _op_box_get, "box_len": _op_box_len,
+    "box_extract": _op_box_extract, "box_replace": _op_box_replace, "box_del": _op_box_del,
+    "balance": _op_balance, "min_balance": _op_min_balance, "asset_holding_get": _op_asset_holding_get,
+    "itxn_begin": _op_itxn_begin, "itxn_field": _op_itxn_field, "itxn_next": _op_itxn_next,
+    "itxn_submit": _op_itxn_submit,
+    "log": _op_log,
+}
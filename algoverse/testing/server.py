@@ -0,0 +1,343 @@
+"""
+HTTP stand-in for algod, so flows built on ``getAlgodClient`` run without a real node.
+
+``serve`` answers from a LocalNode, ``record`` forwards every request to a real node and
+writes the exchanges to a session file, ``replay`` answers a recorded session again. Replayed
+``status/wait-for-block-after`` calls take ``--round-time`` seconds, 0 runs at full speed.
+
+    python -m algoverse.testing.server serve --port 4001 --fund "$ACCOUNT_MNEMONIC"
+    python -m algoverse.testing.server record --port 4002 --upstream http://localhost:4001 \\
+        --token "$ALGOD_TOKEN" --session session.jsonl
+    python -m algoverse.testing.server replay --port 4001 --session session.jsonl
+
+Then point ``ALGOD_ADDRESS`` at the stand-in. Like the in-process client, ``serve`` returns
+TEAL sources as compiled programs; they are cached under the stand-in's own genesis hash.
+"""
+import argparse
+import base64
+import http.client
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib import parse
+
+from algosdk import constants, mnemonic
+from algosdk.account import address_from_private_key
+from algosdk.future import transaction
+
+from ..transport import PooledAlgodClient
+from .node import LocalNode, NodeError, _route, decodeGroup
+
+API_PREFIX = "/v2"
+
+# what a backend answers: HTTP status and JSON body
+Response = Tuple[int, bytes]
+
+
+def _json(status: int, value: Any) -> Response:
+    return status, json.dumps(value).encode()
+
+
+def _group(body: Optional[bytes]) -> Tuple[List[str], Tuple[str, ...]]:
+    """txids and transaction types of a POST /transactions body"""
+    try:
+        stxns = decodeGroup(body or b"")
+        txIDs = [transaction.Transaction.undictify(stxn["txn"]).get_txid() for stxn in stxns]
+    except Exception:
+        return [], ()
+    return txIDs, tuple(stxn["txn"].get("type", "") for stxn in stxns)
+
+
+class NodeBackend:
+    """Answers from a LocalNode"""
+
+    def __init__(self, node: LocalNode) -> None:
+        self.node = node
+
+    def respond(self, method: str, path: str, query: Dict[str, str], body: Optional[bytes]) -> Response:
+        try:
+            return _json(200, self.node.handle(method, path, query, body))
+        except NodeError as e:
+            return _json(e.code, {"message": str(e)})
+
+
+class ProxyBackend:
+    """Forwards to a real algod"""
+
+    def __init__(self, address: str, token: str, timeout: float = 70.0) -> None:
+        url = parse.urlsplit(address)
+        self.scheme = url.scheme or "http"
+        self.host = url.hostname or "localhost"
+        self.port = url.port
+        self.basePath = url.path.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+
+    def respond(self, method: str, path: str, query: Dict[str, str], body: Optional[bytes]) -> Response:
+        connectionType = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        connection = connectionType(self.host, self.port, timeout=self.timeout)
+        target = self.basePath + API_PREFIX + path + ("?" + parse.urlencode(query) if query else "")
+        try:
+            connection.request(method, target, body=body, headers={constants.algod_auth_header: self.token,
+                                                                    "X-API-Key": self.token})
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally:
+            connection.close()
+
+
+class RecordingBackend:
+    """Passes requests on to another backend and appends every exchange to a session file"""
+
+    def __init__(self, backend: Any, path: str) -> None:
+        self.backend = backend
+        self.path = path
+        self._file = open(path, "a")
+        self._lock = threading.Lock()
+
+    def respond(self, method: str, path: str, query: Dict[str, str], body: Optional[bytes]) -> Response:
+        status, payload = self.backend.respond(method, path, query, body)
+        record = {
+            "method": method,
+            "path": path,
+            "query": query,
+            "body": base64.b64encode(body).decode() if body else "",
+            "status": status,
+            "response": payload.decode(),
+        }
+        with self._lock:
+            self._file.write(json.dumps(record, sort_keys=True) + "\n")
+            self._file.flush()
+        return status, payload
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class _Recorded:
+    def __init__(self, record: Dict[str, Any]) -> None:
+        self.status: int = record["status"]
+        self.response: bytes = record["response"].encode()
+        self.used = False
+
+
+class ReplayBackend:
+    """
+    Answers from a recorded session.
+
+    A request gets the next unused answer recorded for the same method, path, query and body,
+    or else for the same endpoint, since signatures and notes change between runs. A sent
+    group takes the place of the next recorded group with the same transaction types, and
+    lookups of its txids get the answers recorded for that group's. Once the answers are used
+    up the last one is repeated.
+    """
+
+    def __init__(self, path: str, roundTime: float = 0.0) -> None:
+        self.roundTime = roundTime
+        self.exact: Dict[Tuple[str, str, str, str], Deque[_Recorded]] = dict()
+        self.endpoints: Dict[Tuple[str, str], Deque[_Recorded]] = dict()
+        self.last: Dict[Tuple[str, ...], _Recorded] = dict()
+        self.groups: List[Tuple[List[str], Tuple[str, ...], _Recorded]] = []
+        self.txIDs: Dict[str, str] = dict()
+        self._lock = threading.Lock()
+
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                recorded = _Recorded(record)
+                self.exact.setdefault(self._exactKey(record["method"], record["path"], record["query"],
+                                                     record["body"]), deque()).append(recorded)
+                self.endpoints.setdefault(self._endpointKey(record["method"], record["path"]),
+                                          deque()).append(recorded)
+                if record["method"] == "POST" and record["path"] == "/transactions":
+                    self.groups.append((*_group(base64.b64decode(record["body"])), recorded))
+
+    @staticmethod
+    def _exactKey(method: str, path: str, query: Dict[str, str], body: str) -> Tuple[str, str, str, str]:
+        return method, path, json.dumps(query, sort_keys=True), body
+
+    @staticmethod
+    def _endpointKey(method: str, path: str) -> Tuple[str, str]:
+        return method, _route([part for part in path.split("/") if part])
+
+    @staticmethod
+    def _next(recorded: Optional[Deque[_Recorded]]) -> Optional[_Recorded]:
+        while recorded:
+            candidate = recorded.popleft()
+            if not candidate.used:
+                candidate.used = True
+                return candidate
+        return None
+
+    def _sent(self, body: Optional[bytes]) -> Optional[_Recorded]:
+        txIDs, types = _group(body)
+        for recordedIDs, recordedTypes, recorded in self.groups:
+            if not recorded.used and recordedTypes == types:
+                recorded.used = True
+                self.txIDs.update(zip(txIDs, recordedIDs))
+                return recorded
+        return None
+
+    def respond(self, method: str, path: str, query: Dict[str, str], body: Optional[bytes]) -> Response:
+        endpoint = self._endpointKey(method, path)
+        if endpoint[1] == "status/wait-for-block-after" and self.roundTime > 0:
+            time.sleep(self.roundTime)
+
+        with self._lock:
+            if endpoint[1] == "transactions/pending":
+                txID = path.rsplit("/", 1)[-1]
+                path = path[:-len(txID)] + self.txIDs.get(txID, txID)
+
+            exact = self._exactKey(method, path, query, base64.b64encode(body).decode() if body else "")
+            recorded = self._next(self.exact.get(exact))
+            if recorded is not None:
+                self.last[exact] = recorded
+            elif exact in self.last:
+                # e.g. polling a transaction more often than the recorded session did
+                recorded = self.last[exact]
+            else:
+                if endpoint == ("POST", "transactions"):
+                    recorded = self._sent(body)
+                if recorded is None:
+                    recorded = self._next(self.endpoints.get(endpoint))
+                if recorded is None:
+                    recorded = self.last.get(endpoint)
+                else:
+                    self.last[endpoint] = recorded
+        if recorded is None:
+            return _json(404, {"message": f"no recorded response for {method} {path}"})
+        return recorded.status, recorded.response
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body go out as separate writes, without this every response waits on a delayed ACK
+    disable_nagle_algorithm = True
+    server: "StandinServer"
+
+    def _dispatch(self, method: str) -> None:
+        url = parse.urlsplit(self.path)
+        query = dict(parse.parse_qsl(url.query))
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else None
+
+        path = url.path
+        if path in ("/health", "/ready"):
+            status, payload = _json(200, {})
+        elif path.startswith(API_PREFIX + "/"):
+            status, payload = self.server.backend.respond(method, path[len(API_PREFIX):], query, body)
+        else:
+            status, payload = _json(404, {"message": f"unsupported endpoint {method} {path}"})
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:
+        self._dispatch("POST")
+
+    def do_DELETE(self) -> None:
+        self._dispatch("DELETE")
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, backend: Any, host: str = "127.0.0.1", port: int = 0) -> None:
+        super().__init__((host, port), _Handler)
+        self.backend = backend
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandinServer":
+        """Serve from a background thread"""
+        self._thread = threading.Thread(target=self.serve_forever, name="algoverse-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if isinstance(self.backend, RecordingBackend):
+            self.backend.close()
+
+    def client(self, **kwargs) -> PooledAlgodClient:
+        """
+        :param kwargs: connection pool settings passed to PooledAlgodClient
+        """
+        return PooledAlgodClient("", self.address, **kwargs)
+
+
+def _fundedAddress(value: str) -> str:
+    # an address or the mnemonic of the account
+    if len(value.split()) > 1:
+        return address_from_private_key(mnemonic.to_private_key(value))
+    return value
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run an HTTP stand-in for algod")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4001)
+    modes = parser.add_subparsers(dest="mode", required=True)
+
+    serve = modes.add_parser("serve", help="answer from an in-process node")
+    serve.add_argument("--round-time", type=float, default=0.0, help="seconds per round, 0 for a round per wait")
+    serve.add_argument("--fund", action="append", default=[], help="address or mnemonic to give a balance")
+    serve.add_argument("--amount", type=int, default=1_000_000_000_000)
+    serve.add_argument("--session", help="also record the exchanges to this file")
+
+    record = modes.add_parser("record", help="forward to a real node and record the exchanges")
+    record.add_argument("--upstream", required=True, help="algod address")
+    record.add_argument("--token", default="")
+    record.add_argument("--session", required=True)
+
+    replay = modes.add_parser("replay", help="answer from a recorded session")
+    replay.add_argument("--session", required=True)
+    replay.add_argument("--round-time", type=float, default=0.0, help="seconds per round, 0 for full speed")
+
+    args = parser.parse_args(argv)
+    if args.mode == "serve":
+        node = LocalNode(roundTime=args.round_time)
+        for value in args.fund:
+            node.fund(_fundedAddress(value), args.amount)
+        backend: Any = NodeBackend(node)
+        if args.session:
+            backend = RecordingBackend(backend, args.session)
+    elif args.mode == "record":
+        backend = RecordingBackend(ProxyBackend(args.upstream, args.token), args.session)
+    else:
+        backend = ReplayBackend(args.session, args.round_time)
+
+    server = StandinServer(backend, args.host, args.port)
+    print(f"algod stand-in ({args.mode}) listening on {server.address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if isinstance(backend, RecordingBackend):
+            backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Minting of the fungible President tokens and NFTs an AlgoVerse app works with.
+"""
+from concurrent.futures import Future
+from random import randint
+from typing import List, Tuple, Union
+
+from algosdk.future import transaction
+from algosdk.v2client.algod import AlgodClient
+
+from .account import Account
+from .confirmation import PendingTxnResponse
+from .operations import MAX_GROUP_SIZE, unique_note
+from .params import getSuggestedParams
+from .scheduler import getScheduler
+from .signing import signTransactions
+
+
+def createNFT(client: AlgodClient, creator: Account,
+              wait: bool = True) -> Union[int, "Future[PendingTxnResponse]"]:
+    randomNumber = randint(0, 999)
+    # this random note reduces the likelihood of this transaction looking like a duplicate
+    randomNote = bytes(randint(0, 255) for _ in range(20))
+
+    txn = transaction.AssetCreateTxn(
+        sender=creator.getAddress(),
+        total=1,  # NFTs have totalIssuance of exactly 1
+        decimals=0,  # NFTs have decimals of exactly 0
+        default_frozen=False,
+        manager=creator.getAddress(),
+        reserve=creator.getAddress(),
+        freeze=creator.getAddress(),
+        clawback=creator.getAddress(),
+        unit_name=f"D{randomNumber}",
+        asset_name=f"ALGOVERSE NFT {randomNumber}",
+        url=f"https://dummy.asset/{randomNumber}",
+        note=randomNote,
+        sp=getSuggestedParams(client),
+    )
+    signedTxn = creator.sign(txn)
+
+    future = getScheduler(client).submit([signedTxn])[0]
+    if not wait:
+        return future
+
+    response = future.result()
+    assert response.assetIndex is not None and response.assetIndex > 0
+    return response.assetIndex
+
+
+def createToken(client: AlgodClient, creator: Account, amount: int, clawback_address: str,
+                wait: bool = True) -> Union[int, "Future[PendingTxnResponse]"]:
+    randomNumber = randint(1, 45)
+
+    txn = transaction.AssetConfigTxn(
+        sender=creator.getAddress(),
+        sp=getSuggestedParams(client),
+        total=amount,  # Fungible tokens have totalIssuance greater than 1
+        decimals=0,  # Fungible tokens typically have decimals greater than 0
+        default_frozen=False,
+        unit_name="President",
+        asset_name=f"President {randomNumber}",
+        manager=creator.getAddress(),
+        reserve=creator.getAddress(),
+        freeze=creator.getAddress(),
+        clawback=clawback_address,
+        note=unique_note(),
+    )
+
+    signedTxn = creator.sign(txn)
+
+    future = getScheduler(client).submit([signedTxn])[0]
+    if not wait:
+        return future
+
+    response = future.result()
+
+    assert response.assetIndex is not None and response.assetIndex > 0
+    return response.assetIndex
+
+
+def submitTokens(client: AlgodClient, creator: Account,
+                 specs: List[Tuple[int, str]]) -> List["Future[PendingTxnResponse]"]:
+    """
+    Send the creation of many fungible tokens without waiting for them.
+
+    :param specs: list of (amount, clawback_address), one per token
+    :return: futures in the same order as specs, the asset id is their assetIndex
+    """
+    params = getSuggestedParams(client)
+
+    txns: List[transaction.Transaction] = []
+    for amount, clawback_address in specs:
+        randomNumber = randint(1, 45)
+        # several tokens may share a name inside one group, so the note keeps every txid unique
+        randomNote = bytes(randint(0, 255) for _ in range(20))
+        txns.append(transaction.AssetConfigTxn(
+            sender=creator.getAddress(),
+            sp=params,
+            total=amount,
+            decimals=0,
+            default_frozen=False,
+            unit_name="President",
+            asset_name=f"President {randomNumber}",
+            manager=creator.getAddress(),
+            reserve=creator.getAddress(),
+            freeze=creator.getAddress(),
+            clawback=clawback_address,
+            note=randomNote,
+        ))
+
+    for start in range(0, len(txns), MAX_GROUP_SIZE):
+        group = txns[start:start + MAX_GROUP_SIZE]
+        if len(group) > 1:
+            transaction.assign_group_id(group)
+    signed = signTransactions(creator, txns)
+
+    scheduler = getScheduler(client)
+    futures: List["Future[PendingTxnResponse]"] = []
+    for start in range(0, len(signed), MAX_GROUP_SIZE):
+        futures.extend(scheduler.submit(signed[start:start + MAX_GROUP_SIZE]))
+    return futures
+
+
+def createTokens(client: AlgodClient, creator: Account, specs: List[Tuple[int, str]]) -> List[int]:
+    """
+    Mint many fungible tokens at once.
+
+    :param specs: list of (amount, clawback_address), one per token
+    :return: asset ids in the same order as specs
+    """
+    futures = submitTokens(client, creator, specs)
+    responses = [future.result() for future in futures]
+
+    assetIDs: List[int] = []
+    for response in responses:
+        assert response.assetIndex is not None and response.assetIndex > 0
+        assetIDs.append(response.assetIndex)
+    return assetIDs
@@ -0,0 +1,162 @@
+import http.client
+import json
+import socket
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib import parse
+
+from algosdk import constants, error
+from algosdk.v2client.algod import AlgodClient, api_version_path_prefix
+
+from . import metrics
+
+# failures on the connection, a request may still have reached algod and been acted on, so only
+# reads are safe to retry
+RETRYABLE_ERRORS = (ConnectionError, http.client.RemoteDisconnected, http.client.BadStatusLine, socket.timeout)
+
+LONG_POLL_PATH = "/status/wait-for-block-after/"
+
+
+class TransportStats:
+    def __init__(self) -> None:
+        self.requests = 0
+        self.connectionsCreated = 0
+        self.connectionsReused = 0
+        self.retries = 0
+
+    def asDict(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "connections_created": self.connectionsCreated,
+            "connections_reused": self.connectionsReused,
+            "retries": self.retries,
+        }
+
+
+class PooledAlgodClient(AlgodClient):
+    """
+    AlgodClient keeping a pool of keep-alive HTTP connections.
+
+    At most ``maxConnections`` requests are in flight at once, further callers wait for a free
+    connection. GET requests failing on the connection level are retried up to ``retries`` times,
+    which also covers a pooled connection the server has closed in the meantime. Other requests,
+    e.g. submitting transactions, raise the error, the caller knows whether resending is safe.
+    """
+
+    def __init__(self, algod_token: str, algod_address: str, headers: Optional[Dict[str, str]] = None,
+                 maxConnections: int = 8, timeout: float = 10.0, longPollTimeout: float = 70.0,
+                 retries: int = 2, backoff: float = 0.1) -> None:
+        super().__init__(algod_token, algod_address, headers)
+        url = parse.urlsplit(algod_address)
+        self._scheme = url.scheme or "http"
+        self._host = url.hostname or "localhost"
+        self._port = url.port
+        self._basePath = url.path.rstrip("/")
+
+        self.timeout = timeout
+        self.longPollTimeout = longPollTimeout
+        self.retries = retries
+        self.backoff = backoff
+        self.stats = TransportStats()
+
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(maxConnections)
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self._scheme == "https":
+            return http.client.HTTPSConnection(self._host, self._port, timeout=self.timeout)
+        return http.client.HTTPConnection(self._host, self._port, timeout=self.timeout)
+
+    def _acquire(self) -> http.client.HTTPConnection:
+        with self._lock:
+            if self._idle:
+                self.stats.connectionsReused += 1
+                return self._idle.pop()
+            self.stats.connectionsCreated += 1
+        return self._connect()
+
+    def _release(self, connection: http.client.HTTPConnection) -> None:
+        with self._lock:
+            self._idle.append(connection)
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json"):
+        metrics.countAlgodCall()
+        header = {"User-Agent": "py-algorand-sdk", "Connection": "keep-alive"}
+        if self.headers:
+            header.update(self.headers)
+        if headers:
+            header.update(headers)
+        if requrl not in constants.no_auth:
+            header.update({constants.algod_auth_header: self.algod_token})
+
+        timeout = self.longPollTimeout if requrl.startswith(LONG_POLL_PATH) else self.timeout
+        if requrl not in constants.unversioned_paths:
+            requrl = api_version_path_prefix + requrl
+        if params:
+            requrl = requrl + "?" + parse.urlencode(params)
+        path = self._basePath + requrl
+
+        with self._slots:
+            status, body = self._send(method, path, data, header, timeout)
+
+        if status >= 400:
+            message = body.decode("utf-8")
+            try:
+                message = json.loads(message)["message"]
+            except (ValueError, KeyError, TypeError):
+                pass
+            raise error.AlgodHTTPError(message, status)
+
+        if response_format == "json":
+            try:
+                return json.loads(body)
+            except Exception as e:
+                raise error.AlgodResponseError("Failed to parse JSON response from algod") from e
+        return body
+
+    def _send(self, method, path, data, header, timeout):
+        attempt = 0
+        while True:
+            connection = self._acquire()
+            try:
+                connection.timeout = timeout
+                if connection.sock is not None:
+                    connection.sock.settimeout(timeout)
+                connection.request(method, path, body=data, headers=header)
+                response = connection.getresponse()
+                body = response.read()
+            except RETRYABLE_ERRORS:
+                connection.close()
+                if method != "GET" or attempt >= self.retries:
+                    raise
+                attempt += 1
+                with self._lock:
+                    self.stats.retries += 1
+                time.sleep(self.backoff * attempt)
+                continue
+            except BaseException:
+                connection.close()
+                raise
+
+            with self._lock:
+                self.stats.requests += 1
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(connection)
+
+            if response.status >= 500 and method == "GET" and attempt < self.retries:
+                attempt += 1
+                with self._lock:
+                    self.stats.retries += 1
+                time.sleep(self.backoff * attempt)
+                continue
+            return response.status, body
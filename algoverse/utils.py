@@ -1,67 +1,77 @@
 import os
 from base64 import b64decode
-from typing import Dict, Union, List, Any, Optional
+from typing import TYPE_CHECKING, Dict, Union, List, Any
 
 from algosdk import encoding
 from algosdk.v2client.algod import AlgodClient
-from pyteal import compileTeal, Expr, Mode
+from algosdk.v2client.indexer import IndexerClient
 
 from .account import Account
+from .confirmation import PendingTxnResponse, getConfirmationTracker
+from .transport import PooledAlgodClient
 
+if TYPE_CHECKING:
+    from pyteal import Expr
 
-def getAlgodClient() -> AlgodClient:
+
+def getAlgodClient(**kwargs) -> AlgodClient:
+    """
+    :param kwargs: connection pool settings passed to PooledAlgodClient
+    """
     algod_address = os.environ.get('ALGOD_ADDRESS')
     algod_token = os.environ.get('ALGOD_TOKEN')
     headers = {
         'X-API-Key': algod_token
     }
-    return AlgodClient(algod_token, algod_address, headers)
-
+    return PooledAlgodClient(algod_token, algod_address, headers, **kwargs)
 
-class PendingTxnResponse:
-    def __init__(self, response: Dict[str, Any]) -> None:
-        self.poolError: str = response["pool-error"]
-        self.txn: Dict[str, Any] = response["txn"]
 
-        self.applicationIndex: Optional[int] = response.get("application-index")
-        self.assetIndex: Optional[int] = response.get("asset-index")
-        self.closeRewards: Optional[int] = response.get("close-rewards")
-        self.closingAmount: Optional[int] = response.get("closing-amount")
-        self.confirmedRound: Optional[int] = response.get("confirmed-round")
-        self.globalStateDelta: Optional[Any] = response.get("global-state-delta")
-        self.localStateDelta: Optional[Any] = response.get("local-state-delta")
-        self.receiverRewards: Optional[int] = response.get("receiver-rewards")
-        self.senderRewards: Optional[int] = response.get("sender-rewards")
-
-        self.innerTxns: List[Any] = response.get("inner-txns", [])
-        self.logs: List[bytes] = [b64decode(l) for l in response.get("logs", [])]
+def getIndexerClient() -> IndexerClient:
+    indexer_address = os.environ.get('INDEXER_ADDRESS')
+    indexer_token = os.environ.get('INDEXER_TOKEN', '')
+    headers = {
+        'X-API-Key': indexer_token
+    }
+    return IndexerClient(indexer_token, indexer_address, headers)
 
 
 def waitForTransaction(
         client: AlgodClient, txID: str
 ) -> PendingTxnResponse:
-    lastStatus = client.status()
-    last_round = lastStatus.get("last-round")
-    pending_txn = client.pending_transaction_info(txID)
-    while not (pending_txn.get("confirmed-round") and pending_txn.get("confirmed-round") > 0):
-        print("Waiting for confirmation...")
-        last_round += 1
-        client.status_after_block(last_round)
-        pending_txn = client.pending_transaction_info(txID)
+    response = getConfirmationTracker(client).wait(txID)
     print(
         "Transaction {} confirmed in round {}.".format(
-            txID, pending_txn.get("confirmed-round")
+            txID, response.confirmedRound
         )
     )
-    return PendingTxnResponse(pending_txn)
+    return response
+
+
+def waitForTransactions(
+        client: AlgodClient, txIDs: List[str]
+) -> List[PendingTxnResponse]:
+    return getConfirmationTracker(client).waitAll(txIDs)
 
 
-def fullyCompileContract(client: AlgodClient, contract: Expr) -> bytes:
-    teal = compileTeal(contract, mode=Mode.Application, version=5)
+TEAL_VERSION = 8
+
+
+def compileContract(contract: "Expr", version: int = TEAL_VERSION) -> str:
+    # PyTeal is slow to import and only needed when a program is built
+    from pyteal import compileTeal, Mode
+
+    return compileTeal(contract, mode=Mode.Application, version=version)
+
+
+def assembleProgram(client: AlgodClient, teal: str) -> bytes:
     response = client.compile(teal)
     return b64decode(response["result"])
 
 
+def fullyCompileContract(client: AlgodClient, contract: "Expr") -> bytes:
+    return assembleProgram(client, compileContract(contract))
+
+
 def decodeState(stateArray: List[Any]) -> Dict[bytes, Union[int, bytes]]:
     state: Dict[bytes, Union[int, bytes]] = dict()
 
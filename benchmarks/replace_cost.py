@@ -0,0 +1,59 @@
+"""
+Opcode cost of a ``replace`` call as the number of registered President sets grows.
+
+Runs the approval program in the in-process evaluator, so no algod node is needed.
+
+    python -m benchmarks.replace_cost
+"""
+import json
+from typing import Dict, Any
+
+from algosdk import account
+
+from algoverse.testing.avm import Program, Ledger, AppCall
+
+FIRST_ASSET_ID = 10_000
+
+
+def registerSets(program: Program, ledger: Ledger, creator: str, start: int, stop: int) -> None:
+    for index in range(start, stop):
+        assets = [FIRST_ASSET_ID + 4 * index + tier for tier in range(4)]
+        for asset in assets:
+            ledger.createAsset(asset, creator, 20)
+        result = program.evaluate(ledger, AppCall(creator, [b"setup"], assets, fee=5_000))
+        assert result.passed, result.error
+        ledger.commit(result)
+
+
+def replaceCost(program: Program, ledger: Ledger, holder: str, asset_cnt: int) -> Dict[str, Any]:
+    # upgrade inside the last registered set
+    base = FIRST_ASSET_ID + 4 * (asset_cnt - 1)
+    ledger.holdings[(holder, base)] = 10
+    ledger.optIn(holder, base + 1)
+    ledger.holdings[(ledger.appAddress, base + 1)] = 20
+
+    result = program.evaluate(ledger, AppCall(holder, [b"replace", (2).to_bytes(8, "big")], [base, base + 1],
+                                              boxes=[b"a" + base.to_bytes(8, "big")], fee=3_000))
+    return {
+        "asset_cnt": asset_cnt,
+        "passed": result.passed,
+        "cost": result.cost,
+        "inner_txns": len(result.innerTxns),
+    }
+
+
+if __name__ == "__main__":
+    program = Program.approval()
+    creator = account.generate_account()[1]
+    holder = account.generate_account()[1]
+    # setup is for the creator only
+    ledger = Ledger(creator=creator)
+
+    created = program.evaluate(ledger, AppCall(creator, appId=0))
+    ledger.commit(created)
+
+    registered = 0
+    for asset_cnt in (1, 10, 100, 1_000, 5_000):
+        registerSets(program, ledger, creator, registered, asset_cnt)
+        registered = asset_cnt
+        print(json.dumps(replaceCost(program, ledger, holder, asset_cnt)))
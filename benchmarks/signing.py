@@ -0,0 +1,69 @@
+"""
+Signatures per second for the SDK's ``txn.sign``, a cached ``Account.sign`` and the batch
+``signTransactions`` over a process pool.
+
+    python -m benchmarks.signing [--count 20000] [--processes N]
+"""
+import argparse
+import json
+import os
+import time
+from typing import Dict, Any, List, Optional
+
+from algosdk.account import generate_account
+from algosdk.future import transaction
+
+from algoverse.account import Account
+from algoverse.signing import signTransactions, shutdownSigningPool
+
+GENESIS_HASH = "SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI="
+
+
+def replaceCalls(sender: str, count: int) -> List[transaction.Transaction]:
+    params = transaction.SuggestedParams(1_000, 1, 1_000, GENESIS_HASH, flat_fee=True)
+    return [
+        transaction.ApplicationCallTxn(sender, params, 1, transaction.OnComplete.NoOpOC,
+                                       app_args=[b"replace", (2).to_bytes(8, "big")], foreign_assets=[1, 2],
+                                       note=i.to_bytes(8, "big"))
+        for i in range(count)
+    ]
+
+
+def signingThroughput(count: int, processes: Optional[int] = None) -> Dict[str, Any]:
+    signer = Account(generate_account()[0])
+    txns = replaceCalls(signer.getAddress(), count)
+
+    started = time.perf_counter()
+    expected = [txn.sign(signer.getPrivateKey()) for txn in txns]
+    sdk = time.perf_counter() - started
+
+    started = time.perf_counter()
+    [signer.sign(txn) for txn in txns]
+    cached = time.perf_counter() - started
+
+    # the first batch starts the worker processes
+    signTransactions(signer, txns[:1_000], processes)
+    started = time.perf_counter()
+    signed = signTransactions(signer, txns, processes)
+    batch = time.perf_counter() - started
+    assert [s.signature for s in signed] == [s.signature for s in expected]
+
+    return {
+        "count": count,
+        "processes": processes or os.cpu_count(),
+        "sdk_per_second": count / sdk,
+        "cached_key_per_second": count / cached,
+        "batch_per_second": count / batch,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure transaction signing throughput")
+    parser.add_argument("--count", type=int, default=20_000)
+    parser.add_argument("--processes", type=int)
+    args = parser.parse_args()
+
+    try:
+        print(json.dumps(signingThroughput(args.count, args.processes), indent=2))
+    finally:
+        shutdownSigningPool()
@@ -0,0 +1,60 @@
+"""
+Import time of the AlgoVerse entry points, each measured in a fresh interpreter.
+
+Short-lived workers and CLI invocations pay this on every start. Pass ``--path`` with another
+checkout to compare, e.g. a ``git worktree`` of an older commit:
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --path ../algoverse-before
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, Optional
+
+MODULES = ("algoverse.operations", "algoverse.aio", "algoverse.contracts")
+
+_MEASURE = (
+    "import sys, time\n"
+    "started = time.perf_counter()\n"
+    "import {module}\n"
+    "print(time.perf_counter() - started, 'pyteal' in sys.modules)\n"
+)
+
+
+def importTime(module: str, path: Optional[str] = None, repeat: int = 5) -> Dict[str, Any]:
+    root = os.path.abspath(path or os.getcwd())
+    env = dict(os.environ, PYTHONPATH=root)
+    # bytecode is written on the first run, so every measured run starts from the same cache
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=root, env=env, check=True)
+
+    timings = []
+    pyteal = False
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", _MEASURE.format(module=module)], cwd=root, env=env,
+                                check=True, capture_output=True, text=True).stdout.split()
+        timings.append(float(output[0]))
+        pyteal = output[1] == "True"
+    return {"seconds": statistics.median(timings), "imports_pyteal": pyteal}
+
+
+def startupBenchmarks(path: Optional[str] = None, repeat: int = 5) -> Dict[str, Any]:
+    results: Dict[str, Any] = dict()
+    for module in MODULES:
+        measured = importTime(module, path, repeat)
+        name = module.split(".")[-1]
+        results[f"startup.{name}_import_seconds"] = measured["seconds"]
+        results[f"startup.{name}_imports_pyteal"] = int(measured["imports_pyteal"])
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the import time of the AlgoVerse modules")
+    parser.add_argument("--path", help="checkout to measure, defaults to the current directory")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(json.dumps(startupBenchmarks(args.path, args.repeat), indent=2, sort_keys=True))
@@ -0,0 +1,207 @@
+"""
+Contract and client benchmarks for AlgoVerse.
+
+Everything runs against the in-process evaluator and the local stand-in node, so results
+only depend on this code and can be compared between commits:
+
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --compare bench.json
+
+With ``--http`` the client benchmarks talk to the node through the HTTP stand-in server
+instead, which adds the transport to what is measured.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, Any, Callable, List
+
+from algosdk import encoding
+from algosdk.account import generate_account
+from algosdk.future import transaction
+from algosdk.logic import get_application_address
+
+from algoverse.assets import President
+from algoverse.contracts import AlgoVerse
+from algoverse.operations import BaseApp, Replace
+from algoverse.params import getSuggestedParams
+from algoverse.spool import Spool
+from algoverse.testing.avm import Program, Ledger, AppCall
+from algoverse.testing.node import LocalNode, LocalAlgodClient, fundedAccount
+from algoverse.testing.server import NodeBackend, StandinServer
+from algoverse.tokens import createTokens
+from algoverse.utils import compileContract
+from benchmarks.replace_cost import registerSets, replaceCost
+from benchmarks.startup import startupBenchmarks
+
+ASSET_COUNTS = (1, 10, 100, 1_000)
+
+# metrics where a higher value is a regression, with the tolerated relative increase
+REGRESSION_THRESHOLDS = {
+    "contract.replace_cost": 0.0,
+    "contract.setup_cost": 0.0,
+    "contract.approval_ops": 0.0,
+    "client.replace.algod_calls": 0.0,
+}
+
+
+def _median(fn: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def contractBenchmarks() -> Dict[str, Any]:
+    results: Dict[str, Any] = dict()
+
+    app = AlgoVerse()
+    results["contract.pyteal_compile_seconds"] = _median(lambda: compileContract(app.approval_program()), 5)
+
+    teal = compileContract(app.approval_program())
+    program = Program(teal)
+    results["contract.approval_teal_bytes"] = len(teal.encode())
+    results["contract.approval_ops"] = len(program.ops)
+
+    creator = generate_account()[1]
+    holder = generate_account()[1]
+    # setup is for the creator only
+    ledger = Ledger(creator=creator)
+    ledger.commit(program.evaluate(ledger, AppCall(creator, appId=0)))
+
+    replaceCosts: Dict[int, int] = dict()
+    setupCosts: Dict[int, int] = dict()
+    registered = 0
+    for asset_cnt in ASSET_COUNTS:
+        registerSets(program, ledger, creator, registered, asset_cnt)
+        registered = asset_cnt
+
+        # cost of registering one more set on top of asset_cnt existing ones
+        assets = [90_000 + tier for tier in range(4)]
+        setup = program.evaluate(ledger, AppCall(creator, [b"setup"], assets, fee=5_000))
+        setupCosts[asset_cnt] = setup.cost
+        replaceCosts[asset_cnt] = replaceCost(program, ledger, holder, asset_cnt)["cost"]
+
+    results["contract.replace_cost_by_asset_cnt"] = replaceCosts
+    results["contract.setup_cost_by_asset_cnt"] = setupCosts
+    results["contract.replace_cost"] = max(replaceCosts.values())
+    results["contract.setup_cost"] = max(setupCosts.values())
+
+    started = time.perf_counter()
+    call = AppCall(holder, [b"replace", (2).to_bytes(8, "big")], [10_000, 10_001], fee=3_000)
+    for _ in range(1_000):
+        program.evaluate(ledger, call)
+    results["contract.replace_evals_per_second"] = 1_000 / (time.perf_counter() - started)
+    return results
+
+
+def clientBenchmarks(http: bool = False) -> Dict[str, Any]:
+    results: Dict[str, Any] = dict()
+    node = LocalNode()
+    server = StandinServer(NodeBackend(node)).start() if http else None
+    client = server.client() if server is not None else LocalAlgodClient(node)
+    creator = fundedAccount(node)
+    app = BaseApp()
+
+    def measure(name: str, operation: Callable[[], Any]) -> Any:
+        requests = sum(node.requests.values())
+        started = time.perf_counter()
+        future = operation()
+        submitted = time.perf_counter()
+        result = future.result()
+        confirmed = time.perf_counter()
+        results[f"client.{name}.submit_seconds"] = submitted - started
+        results[f"client.{name}.confirm_seconds"] = confirmed - submitted
+        results[f"client.{name}.algod_calls"] = sum(node.requests.values()) - requests
+        return result
+
+    app_id = measure("create", lambda: app.create_app(client, creator, wait=False)).applicationIndex
+    ids = createTokens(client, creator, [(20, get_application_address(app_id))] * 4)
+    asset = President(*ids, 20)
+    measure("fund", lambda: app.fund_algo_to_app(client, creator, app_id, wait=False))
+    measure("setup", lambda: app.setup_app(client, creator, app_id, asset, wait=False))
+
+    # give the app a silver to hand out
+    txn = transaction.AssetTransferTxn(creator.getAddress(), getSuggestedParams(client),
+                                       get_application_address(app_id), 12, asset.silver)
+    app.submit(client, creator.sign(txn)).result()
+    measure("replace", lambda: app.send_asset(client, creator, app_id, asset.base, asset.silver, 2, wait=False))
+
+    # 8 more upgrades in a single atomic group
+    entries = [(creator, asset.base, asset.silver, 2)] * 8
+    requests = sum(node.requests.values())
+    started = time.perf_counter()
+    replaced = app.send_assets(client, app_id, entries)
+    assert all(result.ok for result in replaced), [result.error for result in replaced]
+    results["client.bulk_replace.seconds_per_entry"] = (time.perf_counter() - started) / len(entries)
+    results["client.bulk_replace.algod_calls"] = sum(node.requests.values()) - requests
+
+    # the same replace, built and signed ahead of time
+    spool = Spool(client, os.path.join(tempfile.mkdtemp(prefix="algoverse-spool-"), "bench.spool"))
+    key = spool.addReplace(app_id, Replace(creator, asset.base, asset.silver, 2), copies=2)
+    measure("spooled_replace", lambda: spool.send([key])[0])
+    spool.close()
+
+    replace = transaction.ApplicationCallTxn(
+        sender=creator.getAddress(), index=app_id, on_complete=transaction.OnComplete.NoOpOC,
+        app_args=[b"replace", (2).to_bytes(8, "big")], foreign_assets=[asset.base, asset.silver],
+        sp=getSuggestedParams(client),
+    )
+    results["client.sign_seconds"] = _median(lambda: creator.sign(replace), 200)
+    signed = creator.sign(replace)
+    results["client.encode_seconds"] = _median(lambda: encoding.msgpack_encode(signed), 200)
+
+    results["client.requests_by_endpoint"] = dict(node.requests)
+    if server is not None:
+        server.stop()
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    regressions = []
+    for key, value in sorted(current["results"].items()):
+        previous = baseline.get("results", {}).get(key)
+        if not isinstance(value, (int, float)) or not isinstance(previous, (int, float)):
+            continue
+        change = (value - previous) / previous if previous else 0.0
+        print(f"{key:45} {previous:>14.6g} -> {value:>14.6g} ({change:+.1%})")
+        threshold = REGRESSION_THRESHOLDS.get(key)
+        if threshold is not None and change > threshold:
+            regressions.append(key)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the AlgoVerse benchmarks")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="compare against a previous JSON result and fail on regressions")
+    parser.add_argument("--http", action="store_true", help="run the client benchmarks over HTTP")
+    args = parser.parse_args()
+
+    # every run starts from a cold artifact cache
+    os.environ["ALGOVERSE_ARTIFACT_DIR"] = tempfile.mkdtemp(prefix="algoverse-bench-")
+
+    report = {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "results": {**contractBenchmarks(), **clientBenchmarks(args.http), **startupBenchmarks()},
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    else:
+        print(json.dumps(report, indent=2, sort_keys=True))
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressed = compare(report, json.load(f))
+        if regressed:
+            print("regressions:", ", ".join(regressed))
+            sys.exit(1)
@@ -1,16 +1,13 @@
 import os
 import random
 import traceback
-from typing import List
 
 import dotenv
-from algosdk.error import AlgodHTTPError
-from algosdk.logic import get_application_address
 
 from algoverse.account import Account
-from algoverse.assets import President
+from algoverse.assets import PresidentRegistry
 from algoverse.operations import BaseApp
-from algoverse.testing.resources import createToken
+from algoverse.provisioning import AlgoVerseSpec, provisionAlgoVerse
 from algoverse.utils import getAlgodClient, getAppAddress
 
 
@@ -21,91 +18,48 @@ class AlgoVerseExample(BaseApp):
         self.creator = Account.FromMnemonic(os.environ.get('ACCOUNT_MNEMONIC'))
         self.receiver = Account.FromMnemonic(os.environ.get('RECEIVER_MNEMONIC'))
         self.app_id = 0
-        self.assets: List[President] = []
+        self.assets = PresidentRegistry()
         self.amount = 20
+        self.sets = 45
 
-    def create_example_assets(self):
-        for _ in range(45):
-            try:
-                print("=========================================")
-                print("Generating an example base token....")
-                base_token_id = createToken(self.client, self.creator, self.amount,
-                                            get_application_address(self.app_id))
-                print("The base token id is:", base_token_id)
-
-                print("=========================================")
-                print("Generating an example silver token....")
-                silver_token_id = createToken(self.client, self.creator, self.amount,
-                                              get_application_address(self.app_id))
-                print("The silver token id is:", silver_token_id)
-
-                print("=========================================")
-                print("Generating an example gold token....")
-                gold_token_id = createToken(self.client, self.creator, self.amount,
-                                            get_application_address(self.app_id))
-                print("The gold token id is:", gold_token_id)
-
-                print("=========================================")
-                print("Generating an example diamond token....")
-                diamond_token_id = createToken(self.client, self.creator, self.amount,
-                                               get_application_address(self.app_id))
-                print("The diamond token id is:", diamond_token_id)
-
-                self.assets.append(
-                    President(base_token_id, silver_token_id, gold_token_id, diamond_token_id, self.amount))
-
-            except AlgodHTTPError:
-                traceback.print_exc()
-
-    def deploy_app(self):
+    def provision(self):
         try:
             print("=========================================")
-            print("Deploying the smart contract....")
-            self.app_id = self.create_app(client=self.client, creator=self.creator)
+            print("Deploying the smart contract, generating and setting up the tokens....")
+            spec = AlgoVerseSpec(self.creator, self.sets, self.amount, stock=self.amount // 2)
+            provisioned = provisionAlgoVerse(self.client, spec, app=self)
+            self.app_id = provisioned.app_id
+            self.assets = provisioned.presidents
             print("App ID: ", self.app_id)
-            print("App Address:", getAppAddress(self.app_id))  # max apps per acct is 10
+            print("App Address:", getAppAddress(self.app_id))
+            print("Provisioned", provisioned.report)
 
-        except AlgodHTTPError:
+        except Exception:
             traceback.print_exc()
 
-    def fund_assets(self):
-        for asset in self.assets:
-            try:
-                print("=========================================")
-                print("Funding Algo to the smart contract....")
-                self.fund_algo_to_app(
-                    client=self.client,
-                    funder=self.creator,
-                    app_id=self.app_id,
-                )
-
-                print("=========================================")
-                print("Setting up the app....")
-                self.setup_app(self.client, self.creator, self.app_id, asset)
-            except AlgodHTTPError:
-                traceback.print_exc()
-
     def test_send_asset(self):
         asset = random.choice(self.assets)
+        upgrade = self.assets.lookup(asset.base)
         try:
             print("=========================================")
             print("Replacing token....")
-            self.send_asset(self.client, self.creator, self.app_id, asset.base, asset.silver, 2)
-        except AlgodHTTPError:
+            self.send_asset(self.client, self.creator, self.app_id, asset.base, upgrade.nextAsset,
+                            upgrade.requiredAmount)
+        except Exception:
             traceback.print_exc()
 
     def close_algoverse_app(self):
         try:
             print("=========================================")
-            print("Closing the smart contract....")
-            self.close_app(self.client, self.app_id, self.creator)
-        except AlgodHTTPError:
+            print("Retiring the sets, destroying the tokens and closing the smart contract....")
+            teardown = self.teardown_app(self.client, self.creator, self.app_id, list(self.assets))
+            print("Retired sets:", len(teardown.retired), "destroyed tokens:", len(teardown.destroyed),
+                  "kept tokens:", teardown.kept)
+        except Exception:
             traceback.print_exc()
 
     def start(self):
-        self.deploy_app()
-        self.create_example_assets()
-        self.fund_assets()
+        self.provision()
         self.test_send_asset()
         self.close_algoverse_app()
 
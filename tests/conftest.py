@@ -0,0 +1,77 @@
+import os
+from typing import List, Tuple
+
+import pytest
+from algosdk.future import transaction
+from algosdk.logic import get_application_address
+
+from algoverse.account import Account
+from algoverse.assets import President
+from algoverse.operations import BaseApp
+from algoverse.params import getSuggestedParams
+from algoverse.testing.node import LocalAlgodClient, LocalNode, fundedAccount
+from algoverse.tokens import createTokens
+
+AMOUNT = 20
+STOCK = 5
+
+
+@pytest.fixture(autouse=True, scope="session")
+def artifactDir(tmp_path_factory):
+    # compiled programs of the local node stay out of the real artifact cache
+    os.environ["ALGOVERSE_ARTIFACT_DIR"] = str(tmp_path_factory.mktemp("artifacts"))
+
+
+@pytest.fixture
+def node() -> LocalNode:
+    return LocalNode()
+
+
+@pytest.fixture
+def client(node) -> LocalAlgodClient:
+    return LocalAlgodClient(node)
+
+
+@pytest.fixture
+def creator(node) -> Account:
+    return fundedAccount(node)
+
+
+@pytest.fixture
+def app() -> BaseApp:
+    return BaseApp()
+
+
+def transfer(client, sender: Account, receiver: str, asset_id: int, amount: int) -> None:
+    txn = transaction.AssetTransferTxn(sender.getAddress(), getSuggestedParams(client), receiver, amount, asset_id)
+    BaseApp().submit(client, sender.sign(txn)).result()
+
+
+def deploy(client, creator: Account, app: BaseApp, sets: int = 1) -> Tuple[int, List[President]]:
+    """An app with sets registered President sets and STOCK of every higher tier to hand out"""
+    app_id = app.create_app(client, creator)
+    app_address = get_application_address(app_id)
+    ids = createTokens(client, creator, [(AMOUNT, app_address)] * (4 * sets))
+    presidents = [President(*ids[i:i + 4], AMOUNT) for i in range(0, len(ids), 4)]
+    app.fund_algo_to_app(client, creator, app_id, sets)
+    for president in presidents:
+        app.setup_app(client, creator, app_id, president)
+        for asset_id in president.tiers()[1:]:
+            transfer(client, creator, app_address, asset_id, STOCK)
+    return app_id, presidents
+
+
+@pytest.fixture
+def deployed(client, creator, app) -> Tuple[int, President]:
+    app_id, presidents = deploy(client, creator, app)
+    return app_id, presidents[0]
+
+
+@pytest.fixture
+def holder(node, client, creator, app, deployed) -> Account:
+    """An account holding 10 base tokens of the deployed set and nothing else"""
+    _, president = deployed
+    holder = fundedAccount(node)
+    app.opt_in_to_asset(client, president.base, holder)
+    transfer(client, creator, holder.getAddress(), president.base, 10)
+    return holder
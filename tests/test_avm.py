@@ -0,0 +1,28 @@
+from algosdk.account import generate_account
+
+from algoverse.testing.avm import AppCall, Ledger, Program
+
+SUBTRACT = """#pragma version 8
+int 99
+int 10
+int 3
+callsub sub
+int 7
+==
+assert
+int 99
+==
+return
+sub:
+proto 2 1
+frame_dig -2
+frame_dig -1
+-
+retsub
+"""
+
+
+def test_retsub_replaces_the_proto_args_with_the_return_values():
+    result = Program(SUBTRACT).evaluate(Ledger(), AppCall(generate_account()[1]))
+
+    assert result.passed, result.error
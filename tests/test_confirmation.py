@@ -0,0 +1,41 @@
+import asyncio
+
+import pytest
+from algosdk.error import AlgodHTTPError
+from algosdk.future import transaction
+
+from algoverse.aio import AsyncBaseApp, getAsyncConfirmationTracker, getSuggestedParamsAsync
+from algoverse.confirmation import getConfirmationTracker
+from algoverse.operations import BaseApp
+from algoverse.params import getSuggestedParams
+from algoverse.testing.node import AsyncLocalAlgodClient, fundedAccount
+
+UNKNOWN_TXID = "A" * 52
+
+
+def test_an_unknown_txid_fails_alone(client, creator):
+    unknown = getConfirmationTracker(client).watch(UNKNOWN_TXID)
+    payment = transaction.PaymentTxn(creator.getAddress(), getSuggestedParams(client), creator.getAddress(), 0)
+
+    response = BaseApp().submit(client, creator.sign(payment)).result()
+
+    assert response.confirmedRound > 0
+    with pytest.raises(AlgodHTTPError, match="txn does not exist"):
+        unknown.result()
+
+
+def test_an_unknown_txid_fails_alone_async(node):
+    async def run():
+        client = AsyncLocalAlgodClient(node)
+        creator = fundedAccount(node)
+        unknown = getAsyncConfirmationTracker(client).watch(UNKNOWN_TXID)
+        payment = transaction.PaymentTxn(creator.getAddress(), await getSuggestedParamsAsync(client),
+                                         creator.getAddress(), 0)
+
+        response = await (await AsyncBaseApp().submit(client, creator.sign(payment)))
+
+        assert response.confirmedRound > 0
+        with pytest.raises(AlgodHTTPError, match="txn does not exist"):
+            await unknown
+
+    asyncio.run(run())
@@ -0,0 +1,152 @@
+import pytest
+from algosdk.error import AlgodHTTPError
+from algosdk.future import transaction
+from algosdk.logic import get_application_address
+
+from algoverse.assets import President
+from algoverse.operations import ACCOUNT_MIN_BALANCE, BaseApp, asset_box_key
+from algoverse.params import getSuggestedParams
+from algoverse.state import AppStateMirror
+from algoverse.testing.node import fundedAccount
+from algoverse.tokens import createTokens
+from algoverse.utils import getBalances
+
+from .conftest import AMOUNT, STOCK
+
+
+def test_setup_registers_the_set(node, client, deployed):
+    app_id, president = deployed
+    mirror = AppStateMirror(client, app_id).load()
+
+    assert mirror.assetCount == 1
+    assert mirror.presidents()[0].tiers() == president.tiers()
+    boxes = node.apps[app_id].ledger.boxes
+    assert all(asset_box_key(asset_id) in boxes for asset_id in president.tiers()[:3])
+    assert getBalances(client, get_application_address(app_id))[president.diamond] == STOCK
+
+
+def test_setup_never_remaps_a_registered_asset(client, creator, app, deployed):
+    app_id, president = deployed
+    others = createTokens(client, creator, [(AMOUNT, get_application_address(app_id))] * 3)
+    app.fund_algo_to_app(client, creator, app_id)
+
+    with pytest.raises(AlgodHTTPError, match="assert failed"):
+        app.setup_app(client, creator, app_id, President(president.base, *others, AMOUNT))
+    assert AppStateMirror(client, app_id).load().assetCount == 1
+
+
+def test_setup_is_for_the_creator_only(node, client, creator, app, deployed):
+    app_id, _ = deployed
+    ids = createTokens(client, creator, [(AMOUNT, get_application_address(app_id))] * 4)
+    app.fund_algo_to_app(client, creator, app_id)
+
+    with pytest.raises(AlgodHTTPError, match="assert failed"):
+        app.setup_app(client, fundedAccount(node), app_id, President(*ids, AMOUNT))
+
+
+def test_setup_needs_the_min_balance_of_the_set(client, creator, app):
+    app_id = app.create_app(client, creator)
+    app_address = get_application_address(app_id)
+    ids = createTokens(client, creator, [(AMOUNT, app_address)] * 4)
+    payment = transaction.PaymentTxn(creator.getAddress(), getSuggestedParams(client), app_address,
+                                     ACCOUNT_MIN_BALANCE + 5_000)
+    app.submit(client, creator.sign(payment)).result()
+
+    with pytest.raises(AlgodHTTPError, match="below min"):
+        app.setup_app(client, creator, app_id, President(*ids, AMOUNT))
+
+
+def test_replace_opts_in_and_hands_out_the_next_tier(client, app, deployed, holder):
+    app_id, president = deployed
+
+    app.send_asset(client, holder, app_id, president.base, president.silver, 2)
+
+    balances = getBalances(client, holder.getAddress())
+    assert balances[president.base] == 8
+    assert balances[president.silver] == 1
+
+
+def test_replace_rejects_a_wrong_amount(client, app, deployed, holder):
+    app_id, president = deployed
+    app.opt_in_to_asset(client, president.silver, holder)
+
+    with pytest.raises(AlgodHTTPError, match="assert failed"):
+        app.send_asset(client, holder, app_id, president.base, president.silver, 3)
+    assert getBalances(client, holder.getAddress())[president.base] == 10
+
+
+def test_upgrade_skips_tiers(client, app, deployed, holder):
+    app_id, president = deployed
+
+    # 2 base for a silver and 3 silver for a gold
+    app.upgrade_asset(client, holder, app_id, president, 0, 2)
+
+    balances = getBalances(client, holder.getAddress())
+    assert balances[president.base] == 4
+    assert balances[president.gold] == 1
+    assert president.silver not in balances
+
+
+def test_upgrade_rejects_a_lower_tier(client, app, deployed, holder):
+    app_id, president = deployed
+
+    with pytest.raises(ValueError):
+        app.upgrade_asset(client, holder, app_id, president, 2, 1)
+
+
+def test_retire_returns_the_set_to_the_creator(node, client, creator, app, deployed):
+    app_id, president = deployed
+    mirror = AppStateMirror(client, app_id).load()
+    txn = BaseApp._retire_txn(getSuggestedParams(client), creator, app_id, 0, president)
+
+    mirror.apply(app.submit(client, creator.sign(txn)).result())
+
+    assert mirror.presidents()[0].base == 0
+    assert mirror.lookup(president.base) is None
+    assert node.apps[app_id].ledger.boxes == {}
+    balances = getBalances(client, creator.getAddress())
+    assert all(balances[asset_id] == AMOUNT for asset_id in president.tiers())
+    assert getBalances(client, get_application_address(app_id)) == {0: node.balances[get_application_address(app_id)]}
+
+
+def test_retire_is_for_the_creator_only(node, client, app, deployed):
+    app_id, president = deployed
+    stranger = fundedAccount(node)
+    txn = BaseApp._retire_txn(getSuggestedParams(client), stranger, app_id, 0, president)
+
+    with pytest.raises(AlgodHTTPError, match="assert failed"):
+        app.submit(client, stranger.sign(txn))
+
+
+def test_delete_by_a_stranger_is_rejected(node, client, app, deployed):
+    app_id, _ = deployed
+
+    with pytest.raises(AlgodHTTPError, match="assert failed"):
+        app.close_app(client, app_id, fundedAccount(node))
+
+
+def test_teardown_deletes_the_app_and_closes_its_account(node, client, creator, app, deployed):
+    app_id, president = deployed
+
+    teardown = app.teardown_app(client, creator, app_id)
+
+    assert teardown.retired == [0]
+    assert teardown.destroyed == sorted(president.tiers())
+    assert teardown.kept == []
+    assert teardown.app_deleted
+    assert app_id not in node.apps
+    assert node.balances.get(get_application_address(app_id), 0) == 0
+
+
+def test_teardown_twice_reports_nothing_left(client, creator, app, deployed, holder):
+    app_id, president = deployed
+    app.send_asset(client, holder, app_id, president.base, president.silver, 2)
+
+    first = app.teardown_app(client, creator, app_id)
+    second = app.teardown_app(client, creator, app_id, [president])
+
+    # the holder still has base and silver units, so those two are kept both times
+    assert first.kept == sorted([president.base, president.silver])
+    assert second.retired == [] and second.destroyed == []
+    assert second.kept == first.kept
+    assert second.app_deleted
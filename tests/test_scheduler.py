@@ -0,0 +1,92 @@
+import time
+
+import pytest
+from algosdk.error import AlgodHTTPError
+from algosdk.future import transaction
+
+from algoverse.params import getSuggestedParams
+from algoverse.scheduler import SubmissionScheduler, getScheduler
+from algoverse.testing.node import LocalAlgodClient
+
+
+def payment(client, account, note: bytes = b"") -> transaction.SignedTransaction:
+    txn = transaction.PaymentTxn(account.getAddress(), getSuggestedParams(client), account.getAddress(), 0,
+                                 note=note or None)
+    return account.sign(txn)
+
+
+class DroppingClient(LocalAlgodClient):
+    """Delivers the first send to the node, then loses the response like a broken connection"""
+
+    def __init__(self, node) -> None:
+        super().__init__(node)
+        self.sends = 0
+
+    def send_raw_transaction(self, txn, **kwargs):
+        self.sends += 1
+        txID = super().send_raw_transaction(txn, **kwargs)
+        if self.sends == 1:
+            raise ConnectionResetError("connection lost after the request was sent")
+        return txID
+
+
+class StuckClient:
+    """A node that accepts the first send, never confirms and rejects every later send"""
+
+    def __init__(self) -> None:
+        self.round = 1
+        self.sends = 0
+
+    def send_raw_transaction(self, body):
+        self.sends += 1
+        if self.sends > 1:
+            raise AlgodHTTPError("rejected", 400)
+        return "T"
+
+    def status(self):
+        return {"last-round": self.round}
+
+    def status_after_block(self, round):
+        time.sleep(0.005)
+        self.round = max(self.round, round) + 1
+        return {"last-round": self.round}
+
+    def pending_transaction_info(self, txID):
+        return {"pool-error": "", "txn": {"txn": {"lv": 200}}}
+
+
+def test_submit_confirms(client, creator):
+    response = getScheduler(client).submit([payment(client, creator)])[0].result()
+
+    assert response.confirmedRound > 0
+
+
+def test_first_submit_of_a_duplicate_raises(client, creator):
+    signedTxn = payment(client, creator)
+    getScheduler(client).submit([signedTxn])[0].result()
+
+    with pytest.raises(AlgodHTTPError, match="already in ledger"):
+        getScheduler(client).submit([signedTxn])
+
+
+def test_group_delivered_before_a_connection_error_is_not_failed(node, creator):
+    client = DroppingClient(node)
+    scheduler = SubmissionScheduler(client, backoff=0.01)
+
+    response = scheduler.submit([payment(client, creator)])[0].result()
+
+    # the resend got "already in pool" back, which only counts as sent because the first try may have landed
+    assert client.sends == 2
+    assert response.confirmedRound > 0
+    assert scheduler.stats.failed == 0
+
+
+def test_failed_stale_resend_waits_for_the_next_resubmit_round():
+    client = StuckClient()
+    scheduler = SubmissionScheduler(client, resubmitRounds=4, interval=0.01)
+
+    scheduler.submitEncoded(b"group", ["T"], 200)
+    time.sleep(0.5)
+
+    # one send plus at most one resend every resubmitRounds, not one per tick
+    assert client.sends <= 2 + client.round // 4
@@ -0,0 +1,38 @@
+import pytest
+
+from algoverse.operations import Replace
+from algoverse.spool import Spool, transferKey
+
+
+@pytest.fixture
+def spool(client, tmp_path):
+    spool = Spool(client, str(tmp_path / "spool"), margin=3, validity=12)
+    yield spool
+    spool.close()
+
+
+def test_a_rejected_group_goes_back_and_the_other_keys_still_go_out(client, deployed, holder, spool):
+    app_id, president = deployed
+    rejected = spool.addReplace(app_id, Replace(holder, president.base, president.silver, 10 ** 6))
+    replace = spool.addReplace(app_id, Replace(holder, president.base, president.silver, 2))
+    unknown = transferKey("nobody", holder.getAddress(), president.base, 1)
+
+    futures = spool.send([rejected, unknown, replace])
+
+    assert "assert failed" in str(futures[0].exception())
+    assert "No spooled transactions" in str(futures[1].exception())
+    assert futures[2].result().confirmedRound > 0
+    assert spool.available(rejected) == 1
+    assert spool.available(replace) == 0
+
+
+def test_a_group_taken_before_compact_is_appended_again(client, deployed, holder, spool):
+    app_id, president = deployed
+    key = spool.addReplace(app_id, Replace(holder, president.base, president.silver, 2), copies=2)
+
+    taken = spool._take(key)
+    spool.compact()
+    spool._putBack(taken[2], taken)
+
+    assert spool.available(key) == 2
+    assert spool.take(key) is not None and spool.take(key) is not None